@@ -0,0 +1,415 @@
+"""Per-client admission control: cost-weighted token buckets, two priority
+lanes and load shedding on a standing extraction queue.
+
+Every metered request (see ROUTES) is admitted by `AdmissionMiddleware`
+before its body is read, so a client flooding /upload is turned away before
+its PDFs are spooled or queued:
+
+- each client (API key from `key_header`, else the peer address) has a token
+  bucket refilled at `rate` tokens/s up to `burst`. A request costs
+  `costs.request`, plus `costs.upload_mb` per MB and `costs.upload_page` per
+  page for uploads (pages estimated from Content-Length first, settled with
+  the real count after extraction), plus `costs.score_item` per CV for batch
+  scoring (settled once the body is parsed). The upload terms add up rather
+  than multiply: extraction time grows with the page count (one text layer
+  per page) and separately with the bytes (spooling, fonts and images that
+  are parsed either way), so a one-page scan and a long text-only PDF are
+  each charged for what they cost; a size x pages product would count a
+  large, long PDF twice. A request is admitted while the bucket holds its
+  cost (or is full); the cost is then taken in full, so an expensive
+  request leaves the bucket in debt and the client's next requests
+  wait it off. Refused requests get 429 with Retry-After;
+- a request is in the "bulk" lane when its route is a bulk route or it says
+  `X-Priority: bulk`, "interactive" otherwise. Bulk requests may not take the
+  last `interactive_reserve` extraction slots;
+- queue delay (time an upload waits for an extraction worker) is tracked per
+  `interval_s` window. When even the shortest wait of the last window exceeds
+  `target_queue_ms`, the queue is standing rather than bursting, and bulk
+  requests are shed with 503; interactive ones only past
+  `target_queue_ms * interactive_factor`.
+
+Buckets live in memory, or with `store: sqlite` in a local SQLite file so all
+worker processes of one host share them. SQLite calls never run on the event
+loop: decisions go through a thread, refunds/charges through one writer
+thread, and a database locked for longer than `busy_timeout_ms` falls back to
+the process's own buckets for that call. Queue delay is per process (each
+worker has its own extraction pool).
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from app.settings import config_section
+
+DEFAULTS = {
+    "enabled": True,
+    "store": "memory",        # memory | sqlite
+    "db_path": "data/admission/buckets.sqlite",
+    "busy_timeout_ms": 50,
+    "key_header": "x-api-key",
+    "rate": 20.0,
+    "burst": 200.0,
+    "costs": {"request": 1.0, "upload_mb": 4.0, "upload_page": 2.0, "score_item": 0.1},
+    "bytes_per_page": 50_000,
+    "target_queue_ms": 500,
+    "interval_s": 5,
+    "interactive_factor": 4,
+    "interactive_reserve": 1,
+    "retry_after_max_s": 60,
+    "max_clients": 10_000,
+}
+
+LANES = ("interactive", "bulk")
+
+# metered POST routes -> (kind, default lane)
+ROUTES = {
+    "/upload": ("upload", "interactive"),
+    "/evaluate": ("upload", "interactive"),
+    "/jobs": ("upload", "bulk"),
+    "/ingest": ("request", "bulk"),
+    "/score": ("request", "interactive"),
+    "/score/roles": ("request", "interactive"),
+    "/score/batch": ("request", "bulk"),
+}
+
+
+class Ticket(NamedTuple):
+    """What the middleware admitted; endpoints settle the real cost against it."""
+
+    client: str
+    lane: str
+    cost: float
+
+
+class MemoryBucketStore:
+    """Token buckets in a dict; buckets that refilled completely are pruned past `max_clients`."""
+
+    blocking = False  # cheap enough to call on the event loop
+
+    def __init__(self, max_clients: int = 10_000):
+        self.max_clients = max_clients
+        self._buckets: dict[str, list[float]] = {}  # client -> [tokens, updated]
+        self._lock = threading.Lock()
+
+    def take(self, client: str, need: float, cost: float, rate: float, burst: float) -> float:
+        """Take `cost` if `need` tokens are there; returns 0 when taken, else seconds to wait."""
+        now = time.time()
+        with self._lock:
+            b = self._buckets.get(client)
+            if b is None:
+                if len(self._buckets) >= self.max_clients:
+                    self._prune(now, rate, burst)
+                b = self._buckets[client] = [burst, now]
+            tokens = min(burst, b[0] + (now - b[1]) * rate)
+            b[1] = now
+            if tokens < need:
+                b[0] = tokens
+                return (need - tokens) / rate
+            b[0] = tokens - cost
+            return 0.0
+
+    def charge(self, client: str, amount: float, rate: float, burst: float) -> None:
+        """Add `amount` to the client's spend (negative refunds, up to a full bucket)."""
+        now = time.time()
+        with self._lock:
+            b = self._buckets.setdefault(client, [burst, now])
+            b[0] = min(burst, b[0] + (now - b[1]) * rate - amount)
+            b[1] = now
+
+    def clients(self) -> int:
+        return len(self._buckets)
+
+    def _prune(self, now: float, rate: float, burst: float) -> None:
+        full = [c for c, (tokens, updated) in self._buckets.items() if tokens + (now - updated) * rate >= burst]
+        for c in full:
+            del self._buckets[c]
+
+
+class SqliteBucketStore:
+    """Token buckets as rows of a local SQLite file, shared by every worker
+    process of the host. Each update is one IMMEDIATE transaction.
+
+    Calls may wait on another process's write lock, so they are made off the
+    event loop (`blocking`): `take` through Admission.admit_async, `charge`
+    queued to a single writer thread. When the lock is not free within
+    `busy_timeout_ms`, the call uses an in-process MemoryBucketStore instead
+    (counted in `fallbacks`): admission stays per-process for that request
+    rather than stalling it.
+    """
+
+    _PRUNE_EVERY = 1000
+    blocking = True
+
+    def __init__(self, db_path: str, busy_timeout_ms: float = 50):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, timeout=max(0.0, busy_timeout_ms) / 1000,
+                                   isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=OFF")  # buckets are soft state; a lost write only refills one
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (client TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._fallback = MemoryBucketStore()
+        self.fallbacks = 0
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="admission-writer")
+
+    def _update(self, client: str, fn, rate: float, burst: float):
+        now = time.time()
+        with self._lock:
+            db = self._db
+            try:
+                db.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError:  # locked past the busy timeout
+                self.fallbacks += 1
+                return None
+            try:
+                row = db.execute("SELECT tokens, updated FROM buckets WHERE client = ?", (client,)).fetchone()
+                tokens = burst if row is None else min(burst, row[0] + max(0.0, now - row[1]) * rate)
+                tokens, out = fn(tokens)
+                db.execute("INSERT OR REPLACE INTO buckets (client, tokens, updated) VALUES (?, ?, ?)",
+                           (client, tokens, now))
+                self._writes += 1
+                if self._writes % self._PRUNE_EVERY == 0:
+                    # a bucket that refilled completely is the same as no row
+                    db.execute("DELETE FROM buckets WHERE tokens + (? - updated) * ? >= ?", (now, rate, burst))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return out
+
+    def take(self, client: str, need: float, cost: float, rate: float, burst: float) -> float:
+        def fn(tokens):
+            if tokens < need:
+                return tokens, (need - tokens) / rate
+            return tokens - cost, 0.0
+        wait = self._update(client, fn, rate, burst)
+        return self._fallback.take(client, need, cost, rate, burst) if wait is None else wait
+
+    def charge(self, client: str, amount: float, rate: float, burst: float) -> None:
+        """Queued to the writer thread; returns at once."""
+        self._writer.submit(self._charge, client, amount, rate, burst)
+
+    def _charge(self, client: str, amount: float, rate: float, burst: float) -> None:
+        if self._update(client, lambda tokens: (min(burst, tokens - amount), True), rate, burst) is None:
+            self._fallback.charge(client, amount, rate, burst)
+
+    def clients(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM buckets").fetchone()[0]
+
+    def close(self) -> None:
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            self._db.close()
+
+
+class QueueDelay:
+    """Standing queue delay: the smallest wait seen in the last full window.
+
+    A burst that drains within a window always shows some short waits; only
+    a queue that never empties keeps the minimum high. An idle process has no
+    waits at all and reports 0.
+    """
+
+    def __init__(self, interval_s: float = 5):
+        self.interval_s = float(interval_s)
+        self._window_start = time.monotonic()
+        self._window_min: float | None = None
+        self._standing = 0.0
+        self._standing_at = 0.0
+        self._lock = threading.Lock()
+
+    def _roll(self, now: float) -> None:
+        if now - self._window_start >= self.interval_s:
+            if self._window_min is not None:
+                self._standing, self._standing_at = self._window_min, now
+            self._window_start, self._window_min = now, None
+
+    def observe(self, ms: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._roll(now)
+            self._window_min = ms if self._window_min is None else min(self._window_min, ms)
+
+    def standing_ms(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            self._roll(now)
+            if now - self._standing_at > 2 * self.interval_s:
+                return 0.0  # no waits observed lately
+            return self._standing
+
+
+class Rejected(Exception):
+    """A request refused by admission control (429 rate limit or 503 shed)."""
+
+    def __init__(self, status: int, retry_after_s: int, detail: str):
+        super().__init__(detail)
+        self.status, self.retry_after_s, self.detail = status, retry_after_s, detail
+
+
+class Admission:
+    def __init__(self, enabled: bool = True, store=None, key_header: str = "x-api-key",
+                 rate: float = 20.0, burst: float = 200.0, costs: dict | None = None,
+                 bytes_per_page: int = 50_000, max_pages: int = 50, target_queue_ms: float = 500,
+                 interval_s: float = 5, interactive_factor: float = 4, interactive_reserve: int = 1,
+                 retry_after_max_s: int = 60):
+        self.enabled = bool(enabled)
+        self.store = store if store is not None else MemoryBucketStore()
+        self.key_header = key_header.lower()
+        self.rate = float(rate)
+        self.burst = float(burst)
+        if self.rate <= 0 or self.burst <= 0:
+            raise ValueError("admission rate and burst must be positive")
+        self.costs = {**DEFAULTS["costs"], **(costs or {})}
+        self.bytes_per_page = max(1, int(bytes_per_page))
+        self.max_pages = int(max_pages)
+        self.target_queue_ms = float(target_queue_ms)
+        self.interactive_factor = float(interactive_factor)
+        self.interactive_reserve = max(0, int(interactive_reserve))
+        self.retry_after_max_s = int(retry_after_max_s)
+        self.queue = QueueDelay(interval_s)
+
+    @classmethod
+    def from_config(cls) -> "Admission":
+        cfg = config_section("admission", DEFAULTS)
+        max_pages = config_section("extraction", {"max_pages": 50})["max_pages"]  # no estimate past the cap
+        if cfg["store"] == "sqlite":
+            store = SqliteBucketStore(cfg["db_path"], float(cfg["busy_timeout_ms"]))
+        elif cfg["store"] == "memory":
+            store = MemoryBucketStore(int(cfg["max_clients"]))
+        else:
+            raise ValueError(f"admission store must be memory or sqlite: {cfg['store']}")
+        return cls(cfg["enabled"], store, cfg["key_header"], cfg["rate"], cfg["burst"], cfg["costs"],
+                   cfg["bytes_per_page"], max_pages,
+                   cfg["target_queue_ms"], cfg["interval_s"], cfg["interactive_factor"],
+                   cfg["interactive_reserve"], cfg["retry_after_max_s"])
+
+    # --- costs ----------------------------------------------------------------
+
+    def upload_cost(self, size: int, pages: int | None = None) -> float:
+        """Cost of an upload of `size` bytes; pages estimated from the size when unknown.
+
+        Additive: request + upload_mb x MB + upload_page x pages (see the module docstring).
+        """
+        if pages is None:
+            pages = max(1, math.ceil(size / self.bytes_per_page))
+            if self.max_pages:
+                pages = min(pages, self.max_pages)
+        c = self.costs
+        return c["request"] + c["upload_mb"] * size / (1 << 20) + c["upload_page"] * pages
+
+    def items_cost(self, n: int) -> float:
+        return self.costs["request"] + self.costs["score_item"] * n
+
+    # --- decisions --------------------------------------------------------------
+
+    def client_of(self, scope) -> str:
+        for name, value in scope.get("headers") or ():
+            if name == self.key_header.encode() and value:
+                return "key:" + hashlib.sha256(value).hexdigest()[:16]  # never store the key itself
+        peer = scope.get("client")
+        return f"ip:{peer[0]}" if peer else "ip:unknown"
+
+    def shedding(self, lane: str) -> bool:
+        limit = self.target_queue_ms * (1 if lane == "bulk" else self.interactive_factor)
+        return self.queue.standing_ms() > limit
+
+    def reserve(self, lane: str) -> int:
+        """Extraction slots a request of `lane` must leave free."""
+        return self.interactive_reserve if lane == "bulk" else 0
+
+    def _retry_after(self, wait_s: float) -> int:
+        return max(1, min(self.retry_after_max_s, math.ceil(wait_s)))
+
+    def admit(self, client: str, lane: str, cost: float) -> Ticket:
+        """Ticket for an admitted request; raises Rejected otherwise."""
+        if self.shedding(lane):
+            wait = self.queue.standing_ms() / 1000 or 1
+            raise Rejected(503, self._retry_after(wait), "Sunucu yoğun, lütfen biraz sonra tekrar deneyin.")
+        wait = self.store.take(client, min(cost, self.burst), cost, self.rate, self.burst)
+        if wait:
+            retry = self._retry_after(wait)
+            raise Rejected(429, retry, f"İstek sınırı aşıldı, lütfen {retry} sn sonra tekrar deneyin.")
+        return Ticket(client, lane, cost)
+
+    async def admit_async(self, client: str, lane: str, cost: float) -> Ticket:
+        """`admit` for the event loop: a store that may block runs in a thread."""
+        if self.store.blocking:
+            return await asyncio.to_thread(self.admit, client, lane, cost)
+        return self.admit(client, lane, cost)
+
+    def settle(self, ticket: Ticket | None, cost: float) -> None:
+        """Charge (or refund) the difference between the admitted and the real cost."""
+        if ticket is not None and cost != ticket.cost:
+            self.store.charge(ticket.client, cost - ticket.cost, self.rate, self.burst)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "store": type(self.store).__name__,
+            "store_fallbacks": getattr(self.store, "fallbacks", 0),
+            "clients": self.store.clients(),
+            "rate": self.rate,
+            "burst": self.burst,
+            "costs": self.costs,
+            "queue_delay_ms": round(self.queue.standing_ms(), 1),
+            "target_queue_ms": self.target_queue_ms,
+            "shedding": {lane: self.shedding(lane) for lane in LANES},
+            "interactive_reserve": self.interactive_reserve,
+        }
+
+
+def ticket_of(request) -> Ticket | None:
+    """The admission ticket of the current request (None if not metered)."""
+    return getattr(request.state, "admission", None)
+
+
+class AdmissionMiddleware:
+    """Raw ASGI middleware admitting metered routes before their body is read."""
+
+    def __init__(self, app, admission: Admission, on_decision=None):
+        self.app = app
+        self.admission = admission
+        self.on_decision = on_decision  # (lane, outcome) -> None, e.g. a counter
+
+    async def __call__(self, scope, receive, send):
+        adm = self.admission
+        route = ROUTES.get(scope.get("path")) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if route is None or not adm.enabled:
+            return await self.app(scope, receive, send)
+        kind, lane = route
+        size = 0
+        for name, value in scope.get("headers") or ():
+            if name == b"x-priority" and value.strip().lower() == b"bulk":
+                lane = "bulk"
+            elif name == b"content-length" and value.isdigit():
+                size = int(value)
+        cost = adm.upload_cost(size) if kind == "upload" else adm.costs["request"]
+        try:
+            ticket = await adm.admit_async(adm.client_of(scope), lane, cost)
+        except Rejected as e:
+            if self.on_decision is not None:
+                self.on_decision(lane, "limited" if e.status == 429 else "shed")
+            body = json.dumps({"detail": e.detail}, ensure_ascii=False).encode("utf-8")
+            await send({"type": "http.response.start", "status": e.status, "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(e.retry_after_s).encode()),
+            ]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        if self.on_decision is not None:
+            self.on_decision(lane, "admitted")
+        scope.setdefault("state", {})["admission"] = ticket
+        await self.app(scope, receive, send)
@@ -0,0 +1,44 @@
+"""Pre-rendered response bodies (the /ui page, the OpenAPI schema).
+
+Both are identical for every request of a process, so they are encoded once
+and served as bytes with a strong ETag; a browser revalidating with
+If-None-Match gets an empty 304 instead of ~20 KB of HTML or JSON.
+"""
+import hashlib
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 prescribes for it)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+class CachedBody:
+    """Immutable response body with its ETag."""
+
+    __slots__ = ("body", "media_type", "etag")
+
+    def __init__(self, body: bytes, media_type: str):
+        self.body = body
+        self.media_type = media_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:20] + '"'
+
+    @classmethod
+    def from_file(cls, path: str, media_type: str) -> "CachedBody":
+        with open(path, "rb") as fh:
+            return cls(fh.read(), media_type)
+
+    def response(self, request: Request) -> Response:
+        # no-cache: clients may store it but must revalidate, so a deploy is
+        # picked up on the next load while unchanged pages cost a 304
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(self.body, media_type=self.media_type, headers=headers)
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.settings import config_section
+from app.shared import SharedCache
+
+# Bump whenever extraction or simple_parse_cv output changes; older entries
+# are then treated as misses and overwritten.
+PARSER_VERSION = "3"
+
+DEFAULTS = {"max_entries": 1024, "db_path": None, "db_max_entries": 100_000, "db_max_age_days": 30}
+
+PRUNE_EVERY = 64  # disk writes between two prunes
+
+
+def extraction_version(backends, max_pages: int | None, max_chars: int | None) -> str:
+    """Cache version for the extraction settings the output depends on.
+
+    Backend order decides which backend's text (or layout sections) is kept,
+    and the page/character limits truncate it: changing any of them must not
+    serve entries extracted under the old settings.
+    """
+    return f"{PARSER_VERSION}:{','.join(backends)}:p{max_pages or 0}:c{max_chars or 0}"
+
+
+def content_key(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+class ExtractionCache:
+    """Content-addressed cache of {"text", "parsed"} keyed by SHA-256 of the upload.
+
+    Tier 1 is an in-process LRU capped at `max_entries`; tier 2 is an optional
+    SharedCache mapped by every worker on the host (JSON bytes, keyed by
+    cache version + content key); tier 3 is an optional SQLite file that
+    survives restarts. Hits are promoted into the tiers above them.
+
+    The SQLite table is pruned on open and every PRUNE_EVERY writes: rows
+    older than `db_max_age_days` go, then the oldest rows beyond
+    `db_max_entries` (other versions first). 0 disables either limit.
+
+    get()/put() block on SQLite when the disk tier is on; async handlers use
+    aget()/aput(), which answer memory and shared hits inline and run only the
+    SQLite work in a worker thread. The connection has its own lock, so a slow
+    disk read or commit never holds up memory-tier lookups.
+    """
+
+    def __init__(self, max_entries: int = 1024, db_path: str | None = None,
+                 version: str = PARSER_VERSION, shared: SharedCache | None = None,
+                 db_max_entries: int = 100_000, db_max_age_days: float = 30):
+        self.max_entries = max(0, int(max_entries))
+        self.version = version
+        self.shared = shared
+        self.db_max_entries = max(0, int(db_max_entries))
+        self.db_max_age_s = max(0.0, float(db_max_age_days)) * 86400
+        self._lru: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._writes = 0
+        self.hits = {"memory": 0, "shared": 0, "disk": 0}
+        self.misses = 0
+        self.pruned = 0
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS extraction ("
+                " key TEXT PRIMARY KEY, version TEXT NOT NULL, payload TEXT NOT NULL,"
+                " at REAL NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(extraction)")}
+            if "at" not in columns:  # files written before rows were timestamped
+                self._db.execute("ALTER TABLE extraction ADD COLUMN at REAL NOT NULL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS extraction_at ON extraction (at)")
+            self._prune()
+            self._db.commit()
+
+    @classmethod
+    def from_config(cls) -> "ExtractionCache":
+        from app.extract import configured_backends
+        from app.uploads import UploadLimits
+
+        cfg = config_section("cache", DEFAULTS)
+        limits = UploadLimits.from_config()
+        version = extraction_version(configured_backends(), limits.max_pages, limits.max_chars)
+        return cls(cfg["max_entries"], cfg["db_path"], version, SharedCache.from_config("extraction"),
+                   cfg["db_max_entries"], cfg["db_max_age_days"])
+
+    def _prune(self) -> None:
+        """Drop expired rows, then the oldest beyond db_max_entries (caller commits)."""
+        if self.db_max_age_s:
+            cur = self._db.execute("DELETE FROM extraction WHERE at < ?", (time.time() - self.db_max_age_s,))
+            self.pruned += cur.rowcount
+        if self.db_max_entries:
+            excess = self._db.execute("SELECT COUNT(*) FROM extraction").fetchone()[0] - self.db_max_entries
+            if excess > 0:
+                cur = self._db.execute(
+                    "DELETE FROM extraction WHERE key IN ("
+                    " SELECT key FROM extraction ORDER BY version = ?, at LIMIT ?)",
+                    (self.version, excess),
+                )
+                self.pruned += cur.rowcount
+
+    def _shared_key(self, key: str) -> bytes:
+        return hashlib.blake2b(f"{self.version}:{key}".encode(), digest_size=32).digest()
+
+    def _share(self, key: str, value: dict) -> None:
+        if self.shared is not None:
+            self.shared.put(self._shared_key(key), json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def _remember(self, key: str, value: dict) -> None:
+        if not self.max_entries:
+            return
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def _cached(self, key: str) -> dict | None:
+        """Memory and shared tiers: no I/O, fine on the event loop."""
+        with self._lock:
+            value = self._lru.get(key)
+            if value is not None:
+                self._lru.move_to_end(key)
+                self.hits["memory"] += 1
+                return value
+            if self.shared is not None:
+                raw = self.shared.get(self._shared_key(key))
+                if raw is not None:
+                    value = json.loads(raw)
+                    self._remember(key, value)
+                    self.hits["shared"] += 1
+                    return value
+        return None
+
+    def _stored(self, key: str) -> dict | None:
+        """SQLite tier (blocking); a hit is promoted into the tiers above."""
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT payload FROM extraction WHERE key = ? AND version = ?",
+                (key, self.version),
+            ).fetchone()
+        if row is None:
+            return None
+        value = json.loads(row[0])
+        self._keep(key, value)
+        with self._lock:
+            self.hits["disk"] += 1
+        return value
+
+    def _missed(self, value: dict | None) -> dict | None:
+        if value is None:
+            with self._lock:
+                self.misses += 1
+        return value
+
+    def get(self, key: str) -> dict | None:
+        value = self._cached(key)
+        if value is None and self._db is not None:
+            value = self._stored(key)
+        return self._missed(value)
+
+    async def aget(self, key: str) -> dict | None:
+        """get() for async handlers: only the SQLite lookup leaves the event loop."""
+        value = self._cached(key)
+        if value is None and self._db is not None:
+            value = await asyncio.to_thread(self._stored, key)
+        return self._missed(value)
+
+    def _keep(self, key: str, value: dict) -> None:
+        with self._lock:
+            self._remember(key, value)
+            self._share(key, value)
+
+    def put(self, key: str, value: dict) -> None:
+        self._keep(key, value)
+        if self._db is not None:
+            self._write(key, value)
+
+    async def aput(self, key: str, value: dict) -> None:
+        """put() for async handlers: the SQLite write and commit run in a worker thread."""
+        self._keep(key, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._write, key, value)
+
+    def _write(self, key: str, value: dict) -> None:
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO extraction (key, version, payload, at) VALUES (?, ?, ?, ?)",
+                (key, self.version, payload, time.time()),
+            )
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._prune()
+            self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            if self.shared is not None:
+                self.shared.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM extraction")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = sum(self.hits.values())
+            lookups = hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+                "disk": self._db is not None,
+                "disk_pruned": self.pruned,
+                "shared": self.shared.stats() if self.shared is not None else None,
+                "hits": dict(self.hits),
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,738 @@
+"""Candidate pool with precomputed features, re-ranked without re-parsing.
+
+Each parsed CV is reduced once to what scoring needs: normalized skills, the
+canonical keywords they match, per-role must/nice hit counts, experience
+months/years and education level. Ranking the whole pool for another job
+title or weight set is then a handful of numpy operations over a cached score table.
+
+Role hits depend on the scoring config. Reads go through a ScoreTable that
+is published for one config version; after a config change app.rescore
+re-matches only the candidates the change can affect (from their stored
+skills, not the raw CV) in the background and swaps in the next table.
+Records the change cannot affect are not rewritten: the pool remembers, per
+config digest a record may still carry, which roles' stored hits hold under
+the active config (`trusted`); roles added since read as [0, 0] and roles
+removed since are ignored.
+
+Experience is stored as of the add; a CV with an open-ended range ("2020 -
+Present") also stores its app.tenure open offset, and the score table and
+index resolve its years for the current month when they are read.
+
+Records added from an upload also carry a MinHash fingerprint of the CV text
+(app.dedup), so near-duplicate uploads can be matched to them.
+
+With a SQLite pool and app.shared enabled, workers attach to one
+RecordSnapshot of the pool (payloads plus score-table, index and fingerprint
+columns) instead of each decoding every row into its own dicts. Rows written
+after the snapshot, and rows a worker changes, live privately on top of it
+(RecordMap). A config change re-matches into private records too, and the
+next worker start rewrites the snapshot once enough rows have moved.
+"""
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from app import dedup, shared
+from app.features import edu_level_from_text, exp_months_from_lines
+from app.index import EDU_ORDER, SkillIndex
+from app.profiles import ScoringConfig, current
+from app.rescore import Rescorer
+from app.scorer import matched_keywords, points_from_columns, rank_order, role_hits
+from app.settings import config_section
+from app.tenure import NO_OPEN, open_offset, resolve_years, today_index
+
+DEFAULTS = {"db_path": None, "index_path": None, "auto_add": True, "rescore_chunk": 2000}
+SNAPSHOT_FORMAT = 2
+_NO_HITS = (0, 0)
+
+
+def _normalize_skills(skills) -> list[str]:
+    seen = {}
+    for s in skills or []:
+        if isinstance(s, str) and s.strip():
+            seen.setdefault(" ".join(s.lower().split()), None)
+    return list(seen)
+
+
+def _apply_config(record: dict, cfg: ScoringConfig) -> dict:
+    matched = matched_keywords(record["skills"], cfg)
+    record["matched"] = sorted(matched)
+    record["role_hits"] = {role: list(h) for role, h in role_hits(matched, cfg).items()}
+    record["digest"] = cfg.digest
+    return record
+
+
+def stored_hits(record: dict, role: str, roles: frozenset | None) -> list | tuple:
+    """Hits of `role` from a record whose digest is trusted for `roles` (None: every role)."""
+    return record["role_hits"][role] if roles is None or role in roles else _NO_HITS
+
+
+def _open_of(record: dict) -> int:
+    offset = record.get("experience_open")
+    return NO_OPEN if offset is None else offset
+
+
+def resolved(record: dict, now: int | None = None) -> dict:
+    """`record` with its experience brought up to `now` (default: this month)."""
+    offset = record.get("experience_open")
+    if offset is None:
+        return record
+    months = max(record["experience_months"], offset + (now if now is not None else today_index()))
+    if months == record["experience_months"]:
+        return record
+    return {**record, "experience_months": months, "experience_years": round(months / 12.0, 1)}
+
+
+def build_record(cid: str, parsed: dict, cfg: ScoringConfig | None = None) -> dict:
+    """Features of one parsed CV (simple_parse_cv output) as a JSON-able record."""
+    lines = parsed.get("experience", []) or []
+    months = exp_months_from_lines(lines)
+    record = {
+        "id": cid,
+        "name": parsed.get("name"),
+        "skills": _normalize_skills(parsed.get("skills")),
+        "experience_months": months,
+        "experience_years": round(months / 12.0, 1),
+        "experience_open": open_offset(lines),
+        "education_level": edu_level_from_text(parsed.get("education", []) or []),
+        "added_at": time.time(),
+    }
+    return _apply_config(record, cfg or current())
+
+
+class ScoreTable:
+    """Column arrays over the pool for one config version.
+
+    Published tables are never modified: `evolve` and `patch` share the
+    unchanged arrays and copy the ones they change, so a reader holding a
+    table (and its `cfg`) sees one consistent version for the whole request.
+    """
+
+    __slots__ = ("cfg", "digest", "version", "ids", "names", "years", "open", "levels", "hits", "_rows", "_edu",
+                 "_now")
+
+    def __init__(self, records, cfg: ScoringConfig, trusted: dict | None = None):
+        self.cfg = cfg
+        self.digest = cfg.digest
+        self.version = cfg.version
+        self.ids, self.names, years, opens, levels = [], [], [], [], []
+        hits = {role: [] for role in cfg.roles}
+        for r in records:  # one pass: `records` may decode rows on the fly
+            self.ids.append(r["id"])
+            self.names.append(r["name"])
+            years.append(r["experience_years"])
+            opens.append(_open_of(r))
+            levels.append(r["education_level"])
+            roles = trusted.get(r.get("digest")) if trusted else None
+            for role, acc in hits.items():
+                acc.extend(stored_hits(r, role, roles))
+        self.years = np.asarray(years, dtype=np.float64)
+        self.open = np.asarray(opens, dtype=np.int64)
+        self.levels = np.array(levels, dtype=object)
+        self.hits = {}
+        for role, acc in hits.items():
+            arr = np.asarray(acc, dtype=np.int64).reshape(-1, 2)
+            self.hits[role] = (arr[:, 0], arr[:, 1])
+        self._rows = None
+        self._edu = None
+        self._now = None
+
+    @classmethod
+    def from_snapshot(cls, records: "RecordMap", cfg: ScoringConfig, trusted: dict) -> "ScoreTable | None":
+        """Table from the snapshot's feature columns plus the private rows on
+        top; None unless the snapshot was written under `cfg`."""
+        snap = records.base
+        added = list(records.added())
+        if snap.meta.get("digest") != cfg.digest or any(r.get("digest") not in trusted for r in added):
+            return None
+        live = records.live_rows()
+        tail = cls(added, cfg, trusted)
+        cols = snap.columns
+        table = object.__new__(cls)
+        table.cfg, table.digest, table.version = cfg, cfg.digest, cfg.version
+        ids, names, named = records.base_ids(), cols["names"][live].tolist(), cols["named"][live]
+        table.ids = [ids[i] for i in live.tolist()] + tail.ids
+        table.names = [n if ok else None for n, ok in zip(names, named.tolist())] + tail.names
+        table.years = np.concatenate([cols["years"][live], tail.years])
+        table.open = np.concatenate([cols["open"][live], tail.open])
+        table.levels = np.concatenate([np.array(EDU_ORDER, dtype=object)[cols["level"][live]], tail.levels])
+        roles = snap.meta["roles"]
+        table.hits = {}
+        for role in cfg.roles:
+            base = cols["hits"][live, roles.index(role)]
+            must, nice = tail.hits[role]
+            table.hits[role] = (np.concatenate([base[:, 0], must]), np.concatenate([base[:, 1], nice]))
+        table._rows = table._edu = table._now = None
+        return table
+
+    def row_map(self) -> dict[str, int]:
+        if self._rows is None:
+            self._rows = {cid: i for i, cid in enumerate(self.ids)}
+        return self._rows
+
+    def rows(self, ids) -> np.ndarray:
+        rows = self.row_map()
+        return np.fromiter((rows[c] for c in ids if c in rows), dtype=np.int64)
+
+    def years_now(self) -> np.ndarray:
+        """Experience years as of this month: rows with an open-ended range
+        keep growing after they were added (cached until the month changes)."""
+        month = today_index()
+        if self._now is None or self._now[0] != month:
+            self._now = (month, resolve_years(self.years, self.open, month))
+        return self._now[1]
+
+    def edu_points(self) -> np.ndarray:
+        if self._edu is None:
+            out = np.full(len(self.ids), 2, dtype=np.int64)
+            for level, pts in self.cfg.edu_points.items():
+                out[self.levels == level] = pts
+            self._edu = out
+        return self._edu
+
+    def evolve(self, cfg: ScoringConfig, changed: dict[str, dict]) -> "ScoreTable":
+        """The same rows under `cfg`: hits of `changed` records (id -> record)
+        replaced, added roles starting at zero, removed roles dropped."""
+        table = object.__new__(ScoreTable)
+        table.cfg, table.digest, table.version = cfg, cfg.digest, cfg.version
+        table.ids, table.names, table.years, table.open, table.levels = (
+            self.ids, self.names, self.years, self.open, self.levels)
+        table._rows, table._edu, table._now = self._rows, None, self._now
+        n = len(self.ids)
+        rowmap = self.row_map()
+        ids = [cid for cid in changed if cid in rowmap]
+        rows = self.rows(ids)
+        table.hits = {}
+        for role in cfg.roles:
+            must, nice = self.hits.get(role) or (np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64))
+            if len(rows):
+                vals = np.array([changed[cid]["role_hits"][role] for cid in ids], dtype=np.int64).reshape(-1, 2)
+                must, nice = must.copy(), nice.copy()
+                must[rows], nice[rows] = vals[:, 0], vals[:, 1]
+            table.hits[role] = (must, nice)
+        return table
+
+    def patch(self, changed: dict[str, dict | None]) -> "ScoreTable":
+        """The same table with the rows of `changed` (id -> record, None when
+        removed) dropped and its records appended in order, as a rebuild from
+        the pool would place them. Only the changed records are read; the
+        columns are copied with numpy."""
+        tail = ScoreTable([r for r in changed.values() if r is not None], self.cfg)
+        rowmap = self.row_map()
+        drop = [rowmap[cid] for cid in changed if cid in rowmap]
+        ids, names, years, opens, levels, hits = self.ids, self.names, self.years, self.open, self.levels, self.hits
+        if drop:
+            keep = np.ones(len(ids), dtype=bool)
+            keep[drop] = False
+            ids, names = list(itertools.compress(ids, keep)), list(itertools.compress(names, keep))
+            years, opens, levels = years[keep], opens[keep], levels[keep]
+            hits = {role: (must[keep], nice[keep]) for role, (must, nice) in hits.items()}
+        table = object.__new__(ScoreTable)
+        table.cfg, table.digest, table.version = self.cfg, self.digest, self.version
+        table.ids, table.names = ids + tail.ids, names + tail.names
+        table.years = np.concatenate([years, tail.years])
+        table.open = np.concatenate([opens, tail.open])
+        table.levels = np.concatenate([levels, tail.levels])
+        table.hits = {role: (np.concatenate([must, tail.hits[role][0]]), np.concatenate([nice, tail.hits[role][1]]))
+                      for role, (must, nice) in hits.items()}
+        table._rows = table._edu = table._now = None
+        if not drop:
+            table._rows = {**rowmap, **{cid: len(ids) + i for i, cid in enumerate(tail.ids)}}
+            if self._edu is not None:
+                table._edu = np.concatenate([self._edu, tail.edu_points()])
+        return table
+
+
+class RecordMap(MutableMapping):
+    """Candidate records over a shared RecordSnapshot, with private changes on top.
+
+    Behaves like the dict it replaces, order included: base rows in snapshot
+    order, then additions. A base row read with `[]`/`get` stays decoded so
+    the same object comes back next time; `values()` decodes the other rows
+    transiently, one at a time.
+    """
+
+    def __init__(self, base: shared.RecordSnapshot):
+        self.base = base
+        self._ids: list[str] | None = None
+        self._loaded: dict[str, dict] = {}  # base rows decoded and kept
+        self._gone: set[str] = set()        # base rows removed (or re-added on top)
+        self._added: dict[str, dict] = {}   # rows not in the base, insertion order
+
+    def base_ids(self) -> list[str]:
+        if self._ids is None:
+            self._ids = self.base.ids()
+        return self._ids
+
+    def live_rows(self) -> np.ndarray:
+        if not self._gone:
+            return np.arange(len(self.base))
+        gone = np.fromiter((self.base.find(c) for c in self._gone), dtype=np.int64, count=len(self._gone))
+        return np.setdiff1d(np.arange(len(self.base)), gone)
+
+    def added(self):
+        return self._added.values()
+
+    def private(self) -> list[dict]:
+        """Records held by this process: base rows kept decoded, then additions."""
+        return [*self._loaded.values(), *self._added.values()]
+
+    def _in_base(self, cid: str) -> bool:
+        return cid not in self._gone and self.base.find(cid) is not None
+
+    def __getitem__(self, cid: str) -> dict:
+        record = self._added.get(cid) or self._loaded.get(cid)
+        if record is not None:
+            return record
+        row = None if cid in self._gone else self.base.find(cid)
+        if row is None:
+            raise KeyError(cid)
+        return self._loaded.setdefault(cid, json.loads(self.base.payload(row)))
+
+    def __setitem__(self, cid: str, record: dict) -> None:
+        if cid not in self._added and self._in_base(cid):
+            self._loaded[cid] = record  # replacing keeps the position, as in a dict
+        else:
+            self._added[cid] = record
+
+    def __delitem__(self, cid: str) -> None:
+        if self._added.pop(cid, None) is not None:
+            return
+        if not self._in_base(cid):
+            raise KeyError(cid)
+        self._gone.add(cid)
+        self._loaded.pop(cid, None)
+
+    def __contains__(self, cid) -> bool:
+        return cid in self._added or self._in_base(cid)
+
+    def __len__(self) -> int:
+        return len(self.base) - len(self._gone) + len(self._added)
+
+    def __iter__(self):
+        gone = self._gone
+        yield from (cid for cid in self.base_ids() if cid not in gone)
+        yield from list(self._added)
+
+    def values(self):
+        gone, loaded = self._gone, self._loaded
+        for row, cid in enumerate(self.base_ids()):
+            if cid not in gone:
+                record = loaded.get(cid)
+                yield record if record is not None else json.loads(self.base.payload(row))
+        yield from list(self._added.values())
+
+    def keep(self, records) -> None:
+        """Hold on to base rows changed in place (e.g. transient ones from values())."""
+        for r in records:
+            if r["id"] not in self._added and self._in_base(r["id"]):
+                self._loaded.setdefault(r["id"], r)
+
+
+class CandidateStore:
+    """In-memory records (optionally mirrored to SQLite), a versioned score
+    table and an inverted skill index kept in step with every add/remove."""
+
+    def __init__(self, db_path: str | None = None, index_path: str | None = None,
+                 min_similarity: float = 0.7, rescore_chunk: int = 2000, shared_dir: str | None = None):
+        self._records: dict[str, dict] | RecordMap = {}
+        self._lock = threading.Lock()
+        self._table: ScoreTable | None = None
+        self._pending: dict[str, dict | None] = {}  # added (record) / removed (None) since _table was built
+        # config the pool's records are known to hold under, and the record digests that
+        # still hold under it -> roles whose stored hits hold (None: all)
+        self._digest: str | None = None
+        self._trusted: dict[str, frozenset | None] = {}
+        self.rescorer = Rescorer(self, rescore_chunk)
+        self._db: sqlite3.Connection | None = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS candidates (id TEXT PRIMARY KEY, payload TEXT NOT NULL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS pool_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.commit()
+            row = self._db.execute("SELECT value FROM pool_meta WHERE key = 'trusted'").fetchone()
+            if row is not None:
+                meta = json.loads(row[0])
+                self._digest = meta["digest"]
+                self._trusted = {d: None if roles is None else frozenset(roles) for d, roles in meta["trusted"].items()}
+        self.index_path = index_path
+        if self._db is not None and shared_dir:
+            tag = hashlib.sha1(os.path.abspath(db_path).encode()).hexdigest()[:12]
+            self._attach(os.path.join(shared_dir, f"candidates-{tag}"), os.path.abspath(db_path), min_similarity)
+            return
+        if self._db is not None:
+            for (payload,) in self._db.execute("SELECT payload FROM candidates ORDER BY rowid"):
+                rec = json.loads(payload)
+                self._records[rec["id"]] = rec
+        self.index = self._open_index()
+        self.duplicates = dedup.DedupIndex.build(
+            ((r["id"], fp) for r in self._records.values() if (fp := dedup.decode(r.get("fingerprint")))),
+            min_similarity,
+        )
+
+    # --- shared snapshot ----------------------------------------------------
+
+    def _attach(self, base: str, db_path: str, min_similarity: float) -> None:
+        """Map the host's snapshot of the SQLite pool (writing it first if it
+        is missing or too far behind) and put newer rows on top."""
+        with shared.locked(base + ".lock"):
+            snap, overlay = self._open_snapshot(base + ".snap", db_path)
+            if snap is None:
+                self._write_snapshot(base, db_path)
+                snap, overlay = self._open_snapshot(base + ".snap", db_path)
+            index = None
+            try:
+                index = SkillIndex.load(base + ".idx")
+                if index.digest != snap.meta["digest"] or len(index.docs) != len(snap):
+                    index = None
+            except (OSError, ValueError):
+                pass
+        cfg = current()
+        trusted = self._trusted_for(cfg)
+        stale = [r for r in overlay if r.get("digest") not in trusted]
+        for r in stale:
+            _apply_config(r, cfg)
+        records = self._records = RecordMap(snap)
+        for r in overlay:
+            records.pop(r["id"], None)  # rows rewritten since the snapshot move to the end, as on a fresh load
+            records[r["id"]] = r
+        self._persist(stale)
+        if index is None:
+            self.index = self._open_index()
+        else:
+            self.index = index
+            for r in overlay:
+                index.add(r)
+        cols = snap.columns
+        live = records.live_rows()
+        ids = records.base_ids()
+        base_fps = ((ids[i], cols["fingerprint"][i].tobytes()) for i in live[cols["has_fingerprint"][live] == 1].tolist())
+        self.duplicates = dedup.DedupIndex.build(
+            [*base_fps, *((r["id"], fp) for r in overlay if (fp := dedup.decode(r.get("fingerprint"))))],
+            min_similarity,
+        )
+
+    def _open_snapshot(self, path: str, db_path: str) -> tuple[shared.RecordSnapshot | None, list[dict]]:
+        """The snapshot at `path` and the rows written after it, or (None, [])
+        if it is missing, for another database or stale."""
+        try:
+            snap = shared.RecordSnapshot(path)
+        except (OSError, ValueError):
+            return None, []
+        meta = snap.meta
+        if meta.get("format") != SNAPSHOT_FORMAT or meta.get("db") != db_path:
+            return None, []
+        overlay = [json.loads(p) for (p,) in self._db.execute(
+            "SELECT payload FROM candidates WHERE rowid > ? ORDER BY rowid", (meta["max_rowid"],))]
+        replaced = sum(snap.find(r["id"]) is not None for r in overlay)
+        (count,) = self._db.execute("SELECT COUNT(*) FROM candidates").fetchone()
+        if count != len(snap) + len(overlay) - replaced or len(overlay) > max(1000, len(snap) // 10):
+            return None, []  # rows deleted behind its back, or too much on top
+        return snap, overlay
+
+    def _write_snapshot(self, base: str, db_path: str) -> None:
+        """Snapshot every SQLite row (re-matched to the active config) with the
+        score-table, fingerprint and skill-index data next to it."""
+        cfg = current()
+        roles = list(cfg.roles)
+        trusted = self._trusted_for(cfg)
+        rows, stale, names, named, years, opens, level, hits, fps, has_fp = [], [], [], [], [], [], [], [], [], []
+        index = SkillIndex(cfg.digest)
+        empty = bytes(dedup.FINGERPRINT_BYTES)
+        for (payload,) in self._db.execute("SELECT payload FROM candidates ORDER BY rowid"):
+            r = json.loads(payload)
+            if r.get("digest") not in trusted:
+                _apply_config(r, cfg)
+                stale.append(r)
+                payload = json.dumps(r, ensure_ascii=False)
+            rows.append((r["id"], payload.encode("utf-8")))
+            names.append(r["name"] or "")
+            named.append(r["name"] is not None)
+            years.append(r["experience_years"])
+            opens.append(_open_of(r))
+            level.append(EDU_ORDER.index(r["education_level"]) if r["education_level"] in EDU_ORDER else 0)
+            hits.append([stored_hits(r, role, trusted[r["digest"]]) for role in roles])
+            fp = dedup.decode(r.get("fingerprint"))
+            fps.append(fp or empty)
+            has_fp.append(fp is not None)
+            index.add(r)
+        self._persist(stale)  # before reading max(rowid): re-written rows get new rowids
+        self._trust(cfg, trusted)
+        (max_rowid,) = self._db.execute("SELECT COALESCE(MAX(rowid), 0) FROM candidates").fetchone()
+        n = len(rows)
+        shared.RecordSnapshot.write(base + ".snap", rows, {
+            "format": SNAPSHOT_FORMAT, "db": db_path, "max_rowid": max_rowid, "digest": cfg.digest, "roles": roles,
+        }, {
+            "names": np.array(names, dtype=str) if n else np.empty(0, dtype="U1"),
+            "named": np.array(named, dtype=np.uint8),
+            "years": np.array(years, dtype=np.float64),
+            "open": np.array(opens, dtype=np.int64),
+            "level": np.array(level, dtype=np.uint8),
+            "hits": np.array(hits, dtype=np.int64).reshape(n, len(roles), 2),
+            "fingerprint": np.frombuffer(b"".join(fps), dtype=np.uint8).reshape(n, dedup.FINGERPRINT_BYTES),
+            "has_fingerprint": np.array(has_fp, dtype=np.uint8),
+        })
+        index.save(base + ".idx")
+
+    def _open_index(self) -> SkillIndex:
+        """Map the saved index if it still describes this pool; rebuild otherwise."""
+        cfg = current()
+        if self.index_path and os.path.exists(self.index_path):
+            try:
+                index = SkillIndex.load(self.index_path)
+                if index.digest == cfg.digest and index.docs.keys() == self._records.keys():
+                    return index
+            except (OSError, ValueError):
+                pass
+        return self._rebuild_index(cfg)
+
+    def _trusted_for(self, cfg: ScoringConfig) -> dict[str, frozenset | None]:
+        """Record digests whose stored matches hold under `cfg` -> roles whose stored hits do."""
+        trusted = dict(self._trusted) if self._digest == cfg.digest else {}
+        trusted[cfg.digest] = None
+        return trusted
+
+    def _trust(self, cfg: ScoringConfig, trusted: dict[str, frozenset | None]) -> None:
+        """Record that the pool holds under `cfg` for the `trusted` digests."""
+        if self._digest == cfg.digest and self._trusted == trusted:
+            return
+        self._digest, self._trusted = cfg.digest, trusted
+        if self._db is not None:
+            meta = {"digest": cfg.digest,
+                    "trusted": {d: None if roles is None else sorted(roles) for d, roles in trusted.items()}}
+            self._db.execute("INSERT OR REPLACE INTO pool_meta (key, value) VALUES ('trusted', ?)", (json.dumps(meta),))
+            self._db.commit()
+
+    def moved_to(self, old: ScoringConfig, cfg: ScoringConfig) -> None:
+        """The pool went from `old` to `cfg` without touching unaffected records
+        (app.rescore): their digests stay trusted, for the roles both configs have."""
+        roles = frozenset(cfg.roles)
+        trusted = {d: (frozenset(old.roles) if kept is None else kept) & roles
+                   for d, kept in self._trusted_for(old).items()}
+        trusted[cfg.digest] = None
+        self._trust(cfg, trusted)
+
+    def _bring_up_to(self, cfg: ScoringConfig) -> None:
+        """Re-match every record not holding under `cfg` (full, synchronous path)."""
+        records = self._records
+        trusted = self._trusted_for(cfg)
+        if isinstance(records, RecordMap) and records.base.meta["digest"] == cfg.digest:
+            stale = [r for r in records.private() if r.get("digest") not in trusted]
+        else:
+            stale = [r for r in records.values() if r.get("digest") not in trusted]
+        for r in stale:
+            _apply_config(r, cfg)
+        self._persist(stale)
+        self._trust(cfg, trusted)
+
+    def _rebuild_index(self, cfg: ScoringConfig) -> SkillIndex:
+        self._bring_up_to(cfg)
+        return SkillIndex.build(self._records.values(), cfg.digest)
+
+    def _table_for(self, cfg: ScoringConfig, changed: dict[str, dict]) -> ScoreTable:
+        """Next table under `cfg` (call with the lock held): the current one
+        with the `changed` records' hits and the rows added or removed since
+        it was built patched in; built from the whole pool only the first time."""
+        if self._table is None:
+            self._bring_up_to(cfg)
+            trusted = self._trusted_for(cfg)
+            table = None
+            if isinstance(self._records, RecordMap):
+                table = ScoreTable.from_snapshot(self._records, cfg, trusted)
+            if table is None:
+                table = ScoreTable(self._records.values(), cfg, trusted)
+        else:
+            table = self._table if self._table.digest == cfg.digest else self._table.evolve(cfg, changed)
+            if self._pending:
+                # added under another config (it changed between build and insert)
+                stale = [r for r in self._pending.values() if r is not None and r.get("digest") != cfg.digest]
+                for r in stale:
+                    _apply_config(r, cfg)
+                    self.index.add(r)
+                self._persist(stale)
+                table = table.patch(self._pending)
+        self._pending = {}
+        return table
+
+    def save_index(self) -> None:
+        if self.index_path:
+            with self._lock:
+                self.index.save(self.index_path)
+
+    @classmethod
+    def from_config(cls) -> "CandidateStore":
+        cfg = config_section("candidates", DEFAULTS)
+        share = config_section("shared", shared.DEFAULTS)["candidates"]
+        return cls(cfg["db_path"], cfg["index_path"], dedup.DedupPolicy.from_config().min_similarity,
+                   cfg["rescore_chunk"], shared.shared_dir() if share else None)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, cid: str) -> bool:
+        return cid in self._records
+
+    def get(self, cid: str) -> dict | None:
+        return self._records.get(cid)
+
+    def view(self, cid: str) -> dict | None:
+        """The stored record as the published table reads it: experience as of
+        this month, and role hits for that config's roles, whatever config the
+        record was last matched under."""
+        record = self._records.get(cid)
+        if record is None:
+            return None
+        record = resolved(record)
+        table = self._table
+        if table is None or record.get("digest") == table.digest:
+            return record
+        trusted = self._trusted_for(table.cfg)
+        if record.get("digest") not in trusted:
+            return record  # added under another config; the next table re-matches it
+        roles = trusted[record["digest"]]
+        return {**record, "digest": table.digest,
+                "role_hits": {role: list(stored_hits(record, role, roles)) for role in table.cfg.roles}}
+
+    def _persist(self, records: list[dict]) -> None:
+        if not records:
+            return
+        if isinstance(self._records, RecordMap):
+            self._records.keep(records)
+        if self._db is not None:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO candidates (id, payload) VALUES (?, ?)",
+                [(r["id"], json.dumps(r, ensure_ascii=False)) for r in records],
+            )
+            self._db.commit()
+
+    def add(self, cid: str, parsed: dict, fingerprint: bytes | None = None,
+            duplicate_of: str | None = None) -> dict:
+        """Insert or replace a candidate from its parsed CV; returns the stored record.
+
+        `fingerprint` (dedup.fingerprint of the CV text) makes it findable by
+        near_duplicates(); `duplicate_of` records a flagged near-duplicate.
+        """
+        record = build_record(cid, parsed)
+        if fingerprint is not None:
+            record["fingerprint"] = dedup.encode(fingerprint)
+        if duplicate_of is not None:
+            record["duplicate_of"] = duplicate_of
+        with self._lock:
+            self._records.pop(cid, None)  # re-adding moves it to the end, like a fresh insert
+            self._records[cid] = record
+            self._pending.pop(cid, None)
+            self._pending[cid] = record
+            self._persist([record])
+            self.index.add(record)
+            if fingerprint is not None:
+                self.duplicates.add(cid, fingerprint)
+            else:
+                self.duplicates.remove(cid)
+        return record
+
+    def remove(self, cid: str) -> bool:
+        with self._lock:
+            if self._records.pop(cid, None) is None:
+                return False
+            self._pending[cid] = None
+            self.index.remove(cid)
+            self.duplicates.remove(cid)
+            if self._db is not None:
+                self._db.execute("DELETE FROM candidates WHERE id = ?", (cid,))
+                self._db.commit()
+            return True
+
+    def near_duplicates(self, fingerprint: bytes, exclude: str | None = None) -> list[dict]:
+        """Pooled candidates whose CV text is estimated to be a near-duplicate, most similar first."""
+        return [
+            {"id": cid, "name": self._records[cid]["name"], "similarity": sim}
+            for cid, sim in self.duplicates.near(fingerprint, exclude)
+            if cid in self._records
+        ]
+
+    def link(self, cid: str, duplicate_id: str) -> bool:
+        """Remember that upload `duplicate_id` was resolved to candidate `cid`."""
+        with self._lock:
+            record = self._records.get(cid)
+            if record is None:
+                return False
+            linked = record.setdefault("linked", [])
+            if duplicate_id not in linked:
+                linked.append(duplicate_id)
+                self._persist([record])
+            return True
+
+    def table(self) -> ScoreTable:
+        """The published score table, consistent with its own `cfg`.
+
+        After a config change this keeps returning the previous table (and
+        schedules a background re-score) until the new one is swapped in;
+        candidates added or removed meanwhile show up with that swap.
+        Otherwise they are patched into the next read's table (ScoreTable.patch).
+        """
+        cfg = current()
+        table = self._table
+        if table is not None and table.digest != cfg.digest:
+            self.rescorer.schedule()
+            return table
+        if table is not None and (not self._pending or self.rescorer.running):
+            return table
+        with self._lock:
+            if self._table is None or (self._pending and self._table.digest == cfg.digest):
+                if self.index.digest != cfg.digest:
+                    self.index = self._rebuild_index(cfg)
+                self._table = self._table_for(cfg, {})
+            return self._table
+
+    def search(self, skills=(), any_skills=(), min_years: float | None = None,
+               min_education: str | None = None) -> list[str]:
+        """Candidate ids having every skill in `skills`, at least one of
+        `any_skills` (if given), at least `min_years` and `min_education`.
+
+        A query skill also matches its canonical keyword, so "sklearn" finds
+        CVs listing "scikit-learn".
+        """
+        table = self.table()  # search with the config the published table was built with
+        cfg = table.cfg
+        if min_education is not None and min_education not in EDU_ORDER:
+            raise ValueError(f"unknown education level: {min_education} (one of {', '.join(EDU_ORDER)})")
+
+        def alternatives(skill: str) -> list[str]:
+            norm = " ".join(skill.lower().split())
+            return [f"skill:{t}" for t in {norm, *cfg.matcher.matches(norm)}]
+
+        docs = self.index.search(
+            [alternatives(s) for s in skills if s.strip()],
+            [t for s in any_skills if s.strip() for t in alternatives(s)],
+            min_years, min_education,
+        )
+        return self.index.candidate_ids(docs)
+
+    def rank(self, job_title: str, weights: dict, top_k: int | None = None,
+             ids: list[str] | None = None) -> list[dict]:
+        """Rank the whole pool, or only `ids` (e.g. search hits) when given."""
+        cols = self.table()
+        cfg = cols.cfg
+        rows = cols.rows(ids) if ids is not None else np.arange(len(cols.ids))
+        if not len(rows):
+            return []
+        role = job_title.lower() if job_title and job_title.lower() in cfg.roles else cfg.default_role
+        must, nice = cols.hits[role]
+        points = points_from_columns(must[rows], nice[rows], cols.years_now()[rows], cols.edu_points()[rows],
+                                     len(cfg.roles[role].must), cfg, weights)
+        order = rank_order(points["weighted"], top_k)
+        keys = ("skills_points", "experience_points", "education_points", "total", "weighted")
+        return [
+            {"rank": rank, "id": cols.ids[rows[i]], "name": cols.names[rows[i]],
+             "points": {k: int(points[k][i]) for k in keys}}
+            for rank, i in enumerate(order, 1)
+        ]
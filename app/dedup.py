@@ -0,0 +1,225 @@
+"""Near-duplicate CV detection: MinHash signatures plus a banded LSH index.
+
+A CV text is reduced to its distinct word 3-shingles (lowercased, punctuation
+dropped). Re-exported PDFs, a changed phone number or an extra bullet keep
+the Jaccard similarity of those sets above ~0.85, while different people on
+the same CV template stay below ~0.5. (SimHash was tried first: on CV-length
+texts its bit distances for the two groups overlap.)
+
+The fingerprint is a MinHash of PERMS hash functions, kept in two forms:
+
+- BANDS band keys, each a 32-bit hash of ROWS consecutive minima. Two CVs with
+  similarity s share at least one key with probability 1 - (1 - s^ROWS)^BANDS:
+  ~0.9995 at s = 0.85, ~0.15 at s = 0.45;
+- the low byte of every minimum (b-bit MinHash), from which the similarity of
+  two candidates is estimated without the texts.
+
+The index keeps one sorted array of `band_key << 32 | doc` per band, so a
+lookup is one binary search per band plus a comparison of the few signatures
+found; there is no pairwise scan, and a CV costs BANDS * 8 + PERMS bytes.
+"""
+import base64
+import hashlib
+import re
+import threading
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from app.settings import config_section
+
+DEFAULTS = {"enabled": True, "min_similarity": 0.7, "action": "link"}
+ACTIONS = ("link", "flag")
+
+SHINGLE = 3
+BANDS, ROWS = 16, 6
+PERMS = BANDS * ROWS
+FINGERPRINT_BYTES = BANDS * 4 + PERMS
+
+_WORD_RE = re.compile(r"[^\W_]+")
+_MERGE_AT = 1024  # tail keys per band before they are merged into the sorted array
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_SEEDS = np.random.default_rng(20240917).integers(0, 2**63, PERMS, dtype=np.uint64)
+_LOW32 = np.uint64(0xFFFFFFFF)
+
+
+@lru_cache(maxsize=1 << 16)
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer: a cheap, well-spread 64-bit permutation
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """Distinct 64-bit hashes of the word 3-shingles of `text` (shorter texts: one shingle)."""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    tok = np.fromiter((_token_hash(w) for w in words), dtype=np.uint64, count=len(words))
+    n = max(1, len(tok) - SHINGLE + 1)
+    with np.errstate(over="ignore"):
+        h = tok[:n] * _GOLDEN
+        for k in range(1, min(SHINGLE, len(tok))):
+            h = (h ^ tok[k:k + n]) * _GOLDEN
+        return np.unique(_mix(h))
+
+
+def fingerprint(text: str) -> bytes | None:
+    """BANDS little-endian uint32 band keys followed by PERMS signature bytes;
+    None when the text has no words."""
+    shingles = shingle_hashes(text)
+    if not len(shingles):
+        return None
+    with np.errstate(over="ignore"):
+        mins = _mix(shingles[:, None] ^ _SEEDS[None, :]).min(axis=0)
+        bands = mins.reshape(BANDS, ROWS)
+        key = np.full(BANDS, np.uint64(BANDS), dtype=np.uint64) + np.arange(BANDS, dtype=np.uint64)
+        for r in range(ROWS):
+            key = _mix((key ^ bands[:, r]) * _GOLDEN)
+    return (key >> np.uint64(32)).astype("<u4").tobytes() + (mins & np.uint64(0xFF)).astype(np.uint8).tobytes()
+
+
+def _split(fp: bytes) -> tuple[np.ndarray, np.ndarray]:
+    return np.frombuffer(fp, dtype="<u4", count=BANDS), np.frombuffer(fp, dtype=np.uint8, offset=BANDS * 4)
+
+
+def _estimate(agree: np.ndarray) -> np.ndarray:
+    # two different minima share their low byte with probability 1/256
+    return np.clip((agree - 1 / 256) / (1 - 1 / 256), 0.0, 1.0)
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity of the two texts' shingle sets."""
+    return float(_estimate(np.mean(_split(a)[1] == _split(b)[1])))
+
+
+def encode(fp: bytes | None) -> str | None:
+    return None if fp is None else base64.b64encode(fp).decode("ascii")
+
+
+def decode(value: str | None) -> bytes | None:
+    """Stored (base64) form -> bytes; None and malformed values give None."""
+    if not value:
+        return None
+    try:
+        raw = base64.b64decode(value)
+    except ValueError:
+        return None
+    return raw if len(raw) == FINGERPRINT_BYTES else None
+
+
+class DedupPolicy(NamedTuple):
+    """What /upload does with a near-duplicate: link it to the pooled CV
+    (the upload is not pooled itself) or flag it (pooled, with duplicate_of)."""
+
+    enabled: bool = True
+    min_similarity: float = 0.7
+    action: str = "link"
+
+    @classmethod
+    def from_config(cls) -> "DedupPolicy":
+        cfg = config_section("dedup", DEFAULTS)
+        if cfg["action"] not in ACTIONS:
+            raise ValueError(f"dedup action must be one of {', '.join(ACTIONS)}: {cfg['action']}")
+        return cls(bool(cfg["enabled"]), float(cfg["min_similarity"]), cfg["action"])
+
+
+class DedupIndex:
+    """Banded MinHash LSH keyed by candidate id."""
+
+    def __init__(self, min_similarity: float = 0.7):
+        self.min_similarity = float(min_similarity)
+        if not 0 < self.min_similarity <= 1:
+            raise ValueError("dedup min_similarity must be in (0, 1]")
+        self.ids: list[str] = []          # doc -> candidate id
+        self.docs: dict[str, int] = {}    # candidate id -> live doc
+        self._sigs = np.empty((0, PERMS), dtype=np.uint8)
+        self._sig_tail: list[bytes] = []
+        self._keys = [np.empty(0, dtype=np.uint64) for _ in range(BANDS)]
+        self._tails: list[list[int]] = [[] for _ in range(BANDS)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    @classmethod
+    def build(cls, items, min_similarity: float = 0.7) -> "DedupIndex":
+        """Index (candidate id, fingerprint) pairs with one sort per band."""
+        index = cls(min_similarity)
+        ids, fps = [], []
+        for cid, fp in items:
+            index.docs[cid] = len(ids)  # a repeated id: the later entry is the live one
+            ids.append(cid)
+            fps.append(fp)
+        index.ids = ids
+        if fps:
+            raw = np.frombuffer(b"".join(fps), dtype=np.uint8).reshape(len(fps), FINGERPRINT_BYTES)
+            index._sigs = raw[:, BANDS * 4:].copy()
+            keys = raw[:, :BANDS * 4].copy().view("<u4").astype(np.uint64)
+            doc = np.arange(len(fps), dtype=np.uint64)
+            index._keys = [np.sort((keys[:, b] << np.uint64(32)) | doc) for b in range(BANDS)]
+        return index
+
+    def add(self, cid: str, fp: bytes) -> None:
+        keys, _ = _split(fp)
+        with self._lock:
+            self.docs.pop(cid, None)  # a replaced doc stays in the arrays but is no longer live
+            doc = len(self.ids)
+            self.ids.append(cid)
+            self.docs[cid] = doc
+            self._sig_tail.append(fp[BANDS * 4:])
+            for b, key in enumerate(keys.tolist()):
+                tail = self._tails[b]
+                tail.append(key << 32 | doc)
+                if len(tail) >= _MERGE_AT:
+                    self._merge(b)
+
+    def remove(self, cid: str) -> bool:
+        with self._lock:
+            return self.docs.pop(cid, None) is not None
+
+    def _merge(self, b: int) -> None:
+        extra = np.sort(np.asarray(self._tails[b], dtype=np.uint64))
+        base = self._keys[b]
+        self._keys[b] = np.insert(base, np.searchsorted(base, extra), extra)
+        self._tails[b] = []
+
+    def _signatures(self) -> np.ndarray:
+        if self._sig_tail:
+            extra = np.frombuffer(b"".join(self._sig_tail), dtype=np.uint8).reshape(-1, PERMS)
+            self._sigs = np.concatenate([self._sigs, extra])
+            self._sig_tail = []
+        return self._sigs
+
+    def near(self, fp: bytes, exclude: str | None = None) -> list[tuple[str, float]]:
+        """Live candidates with estimated similarity >= min_similarity, most similar first."""
+        keys, sig = _split(fp)
+        with self._lock:
+            found = []
+            for b, key in enumerate(keys.tolist()):
+                lo, hi = key << 32, (key + 1) << 32
+                arr = self._keys[b]
+                i, j = np.searchsorted(arr, np.array([lo, hi], dtype=np.uint64))
+                if j > i:
+                    found.append(arr[i:j] & _LOW32)
+                tail = [k & 0xFFFFFFFF for k in self._tails[b] if lo <= k < hi]
+                if tail:
+                    found.append(np.asarray(tail, dtype=np.uint64))
+            if not found:
+                return []
+            docs = np.unique(np.concatenate(found)).astype(np.int64)
+            sims = _estimate((self._signatures()[docs] == sig).mean(axis=1))
+            ids, live = self.ids, self.docs
+            hits = [(ids[d], round(s, 3)) for d, s in zip(docs.tolist(), sims.tolist())
+                    if s >= self.min_similarity and live.get(ids[d]) == d and ids[d] != exclude]
+        return sorted(hits, key=lambda h: -h[1])
+
+    def stats(self) -> dict:
+        return {"fingerprints": len(self.docs), "doc_ids": len(self.ids), "bands": BANDS, "rows": ROWS,
+                "min_similarity": self.min_similarity}
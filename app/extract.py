@@ -1,16 +1,301 @@
+import importlib
 import io
-import pdfplumber
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Iterator, NamedTuple
 
-def extract_text_from_pdf_fileobj(fileobj) -> str:
-    text = ""
-    fileobj.seek(0)
+# PDF libraries are imported by the backends themselves (pdfplumber alone
+# costs ~70 ms); the API process never needs them, extraction workers load
+# them up front through warm_backends().
+
+def _open_src(src):
+    """bytes -> in-memory file; str -> filesystem path (spooled uploads, ingest)."""
+    return io.BytesIO(src) if isinstance(src, (bytes, bytearray)) else src
+
+def iter_pdf_pages(fileobj, max_pages: int | None = None) -> Iterator[str]:
+    """Yield page text lazily, releasing each page's parsed objects after use."""
+    import pdfplumber
+
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
     with pdfplumber.open(fileobj) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() or ""
-    return (text or "").strip()
+        for i, page in enumerate(pdf.pages):
+            if max_pages is not None and i >= max_pages:
+                break
+            try:
+                yield page.extract_text() or ""
+            finally:
+                page.close()
+
+def iter_pdf_pages_pypdf2(fileobj, max_pages: int | None = None) -> Iterator[str]:
+    from PyPDF2 import PdfReader  # type: ignore
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    reader = PdfReader(fileobj)
+    for i, page in enumerate(reader.pages):
+        if max_pages is not None and i >= max_pages:
+            break
+        try:
+            yield page.extract_text() or ""
+        except Exception:
+            continue
+
+def collect_text(pages: Iterator[str], sep: str = "", max_chars: int | None = None) -> str:
+    """Join page texts, stopping (and closing the generator) once `max_chars` is reached."""
+    parts: list[str] = []
+    size = 0
+    for text in pages:
+        parts.append(text)
+        size += len(text) + len(sep)
+        if max_chars is not None and size >= max_chars:
+            if hasattr(pages, "close"):
+                pages.close()
+            break
+    out = sep.join(parts)
+    return out[:max_chars] if max_chars is not None else out
+
+class _PageCounter:
+    """Iterator wrapper that counts how many pages a backend actually read."""
+
+    def __init__(self, pages: Iterator[str]):
+        self._pages = pages
+        self.n = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        text = next(self._pages)
+        self.n += 1
+        return text
+
+    def close(self) -> None:
+        self._pages.close()
+
+def extract_text_from_pdf_fileobj(fileobj, max_pages: int | None = None, max_chars: int | None = None) -> str:
+    return collect_text(iter_pdf_pages(fileobj, max_pages), "", max_chars).strip()
+
+def extract_text_with_pypdf2(fileobj, max_pages: int | None = None, max_chars: int | None = None) -> str:
+    return collect_text(iter_pdf_pages_pypdf2(fileobj, max_pages), "\n", max_chars)
+
+# --- backend registry -------------------------------------------------------
+# Each backend takes (src, max_pages, max_chars) and returns
+# (text, layout_ok, pages_read), or (text, layout_ok, pages_read, parsed,
+# page_ms) when it already split the CV into sections (app.layout).
+# layout_ok=False means the backend suspects its reading order is wrong and a
+# later, layout-aware backend should be tried.
+
+DEFAULT_BACKENDS = ("pdfium", "pdfplumber", "pypdf2")
+BACKENDS: dict[str, Callable] = {}
+_MAX_BACKWARD_JUMPS = 2  # per page, before a text layer counts as multi-column
+
+def register_backend(name: str):
+    def deco(fn):
+        BACKENDS[name] = fn
+        return fn
+    return deco
+
+@register_backend("pdfium")
+def _pdfium_backend(src, max_pages=None, max_chars=None):
+    import pypdfium2 as pdfium
+
+    doc = pdfium.PdfDocument(src)
+    layout_ok = True
+
+    def pages():
+        nonlocal layout_ok
+        for i in range(len(doc) if max_pages is None else min(len(doc), max_pages)):
+            page = doc[i]
+            tp = page.get_textpage()
+            try:
+                # text rects come in content-stream order; jumping back up the
+                # page means columns or floating boxes that need pdfplumber
+                jumps, prev = 0, None
+                for j in range(tp.count_rects()):
+                    top = tp.get_rect(j)[3]
+                    if prev is not None and top > prev + 2:
+                        jumps += 1
+                    prev = top
+                if jumps > _MAX_BACKWARD_JUMPS:
+                    layout_ok = False
+                yield tp.get_text_bounded().replace("\r\n", "\n")
+            finally:
+                tp.close()
+                page.close()
+
+    counter = _PageCounter(pages())
+    try:
+        text = collect_text(counter, "\n", max_chars).strip()
+    finally:
+        doc.close()
+    return text, layout_ok and not looks_broken(text), counter.n
+
+@register_backend("pdfplumber")
+def _pdfplumber_backend(src, max_pages=None, max_chars=None):
+    counter = _PageCounter(iter_pdf_pages(_open_src(src), max_pages))
+    return collect_text(counter, "", max_chars).strip(), True, counter.n
+
+@register_backend("pypdf2")
+def _pypdf2_backend(src, max_pages=None, max_chars=None):
+    counter = _PageCounter(iter_pdf_pages_pypdf2(_open_src(src), max_pages))
+    text = collect_text(counter, "\n", max_chars)
+    if not text.strip():
+        raise RuntimeError("PyPDF2 fallback produced empty text")
+    return text, True, counter.n
+
+@register_backend("layout")
+def _layout_backend(src, max_pages=None, max_chars=None):
+    from app.layout import extract_layout
+
+    r = extract_layout(src, "pdfium", max_pages, max_chars)
+    return r.text, not looks_broken(r.text), r.pages, r.parsed, r.page_ms
+
+@register_backend("layout_pdfplumber")
+def _layout_pdfplumber_backend(src, max_pages=None, max_chars=None):
+    from app.layout import extract_layout
+
+    r = extract_layout(src, "pdfplumber", max_pages, max_chars)
+    return r.text, not looks_broken(r.text), r.pages, r.parsed, r.page_ms
+
+_CID_RE = re.compile(r"\(cid:\d+\)")
+
+def looks_broken(text: str) -> bool:
+    """Cheap quality probe: empty, glyph-id soup or mostly non-letters."""
+    visible = [c for c in text if not c.isspace()]
+    if not visible:
+        return True
+    if len(_CID_RE.findall(text)) > 3 or text.count("\ufffd") > len(visible) // 100:
+        return True
+    letters = sum(1 for c in visible if c.isalpha())
+    return letters / len(visible) < 0.5
+
+@lru_cache(maxsize=1)
+def configured_backends() -> tuple:
+    from app.settings import config_section
+
+    order = tuple(config_section("extraction", {"backends": DEFAULT_BACKENDS})["backends"])
+    unknown = [b for b in order if b not in BACKENDS]
+    if unknown:
+        raise ValueError(f"unknown extraction backends: {', '.join(unknown)}")
+    return order
+
+BACKEND_MODULES = {"pdfium": "pypdfium2", "pdfplumber": "pdfplumber", "pypdf2": "PyPDF2",
+                   "layout": "pypdfium2", "layout_pdfplumber": "pdfplumber"}
+
+def warm_backends(order: tuple | None = None) -> None:
+    """Import the libraries of the configured backends (extraction worker initializer).
+
+    Without this the first PDF in every worker pays for the imports, and the
+    first fallback to PyPDF2 pays again.
+    """
+    for name in order or configured_backends():
+        module = BACKEND_MODULES.get(name)
+        if module:
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                pass  # the backend reports the error when it is tried
+
+class ExtractionFailed(ValueError):
+    """Every backend failed; carries the attempts so the caller can still record them."""
+
+    def __init__(self, message: str, attempts: tuple = ()):
+        super().__init__(message, attempts)
+        self.message = message
+        self.attempts = attempts
+
+    def __str__(self) -> str:
+        return self.message
+
+class ExtractionResult(NamedTuple):
+    text: str
+    backend: str
+    pages: int
+    attempts: tuple  # (backend, elapsed_ms, "ok" | "rejected" | "error")
+    parsed: dict | None = None  # simple_parse_cv-shaped sections from a layout backend
+    page_ms: tuple = ()         # per-page time, from layout backends
+
+def extract_pdf(src, max_pages: int | None = None, max_chars: int | None = None,
+                order: tuple | None = None) -> ExtractionResult:
+    """Try backends in order until one returns text it trusts.
+
+    A rejected result (suspect layout or quality) is kept as a last resort
+    in case every later backend fails. Runs inside extraction workers.
+    """
+    attempts = []
+    errors = []
+    fallback = None
+    for name in order or configured_backends():
+        t0 = time.perf_counter()
+        try:
+            text, ok, pages, *layout = BACKENDS[name](src, max_pages, max_chars)
+        except Exception as e:
+            attempts.append((name, round((time.perf_counter() - t0) * 1000, 3), "error"))
+            errors.append(str(e))
+            continue
+        attempts.append((name, round((time.perf_counter() - t0) * 1000, 3), "ok" if ok else "rejected"))
+        if ok:
+            return ExtractionResult(text, name, pages, tuple(attempts), *layout)
+        if fallback is None and text.strip():
+            fallback = (text, name, pages, layout)
+    if fallback is not None:
+        text, name, pages, layout = fallback
+        return ExtractionResult(text, name, pages, tuple(attempts), *layout)
+    raise ExtractionFailed(" | ".join(errors) or "no text layer found", tuple(attempts))
+
+def extract_pdf_text(src, max_pages: int | None = None, max_chars: int | None = None) -> str:
+    """Text only; `src` is the raw bytes or a path to a spooled temp file."""
+    return extract_pdf(src, max_pages, max_chars).text
+
+class BackendStats:
+    """Per-backend call/outcome counters and cumulative time, fed from worker results."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict] = {}
+
+    def record(self, attempts) -> None:
+        with self._lock:
+            for name, ms, outcome in attempts:
+                st = self._stats.setdefault(name, {"calls": 0, "ok": 0, "rejected": 0, "error": 0, "total_ms": 0.0})
+                st["calls"] += 1
+                st[outcome] += 1
+                st["total_ms"] += ms
+
+    def record_pages(self, name: str, page_ms) -> None:
+        """Per-page times reported by a layout backend."""
+        if not page_ms:
+            return
+        with self._lock:
+            st = self._stats.setdefault(name, {"calls": 0, "ok": 0, "rejected": 0, "error": 0, "total_ms": 0.0})
+            st["pages"] = st.get("pages", 0) + len(page_ms)
+            st["page_ms"] = st.get("page_ms", 0.0) + sum(page_ms)
+            st["max_page_ms"] = max(st.get("max_page_ms", 0.0), max(page_ms))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                name: {**st, "total_ms": round(st["total_ms"], 3),
+                       "avg_ms": round(st["total_ms"] / st["calls"], 3) if st["calls"] else 0.0,
+                       **({"page_ms": round(st["page_ms"], 3), "avg_page_ms": round(st["page_ms"] / st["pages"], 3)}
+                          if st.get("pages") else {})}
+                for name, st in self._stats.items()
+            }
+
+BACKEND_STATS = BackendStats()
 
 def extract_text_from_bytes_or_txt(filename: str, raw: bytes) -> str:
     name = (filename or "").lower()
     if name.endswith(".txt"):
         return raw.decode("utf-8", errors="ignore").strip()
     raise ValueError("TXT dışı içerik için bu fonksiyonu kullanmayın.")
+
+def extract_text_any(filename: str, raw: bytes, max_pages: int | None = None,
+                     max_chars: int | None = None) -> str:
+    """Dispatch on extension the same way /upload does (.pdf or .txt)."""
+    if (filename or "").lower().endswith(".pdf"):
+        return extract_pdf_text(raw, max_pages, max_chars)
+    text = raw.decode("utf-8", errors="ignore").strip()
+    return text[:max_chars] if max_chars is not None else text
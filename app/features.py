@@ -0,0 +1,48 @@
+from typing import List
+
+import numpy as np
+
+from app.tenure import months_batch, months_from_lines
+
+# (level, keywords) in decision order: the first group with a keyword in the
+# text gives the level, so the highest available level wins (Turkish variants
+# included); any hint of a university means bachelor at least
+EDU_KEYWORDS = (
+    ("phd", ("phd", "ph.d", "doctorate", "doctoral", "dphil", "doktor", "doktora")),
+    ("master", ("master", "msc", "m.sc", "m.s", "ms ", "yüksek lisans", "yuksek lisans", "tezli", "tezsiz")),
+    ("bachelor", ("bachelor", "bsc", "b.sc", "b.s ", "bs ", "licence", "license", "lisans", "undergraduate")),
+    ("bachelor", ("university", "üniversite", "universitesi", "faculty", "fakülte", "fakulte")),
+    ("high_school", ("high school", "lise")),
+)
+
+def edu_level_from_text(education_lines: List[str]) -> str:
+    text = " \n".join(education_lines).lower()
+    for level, keywords in EDU_KEYWORDS:
+        if any(k in text for k in keywords):
+            return level
+    return "unknown"
+
+def exp_years_from_lines(exper_lines: List[str]) -> float:
+    """Years of experience from date ranges like 'Jul 2024 - Sep 2024', '2022-2024',
+    '03/2021 - Halen'; overlapping jobs count once (see app.tenure)."""
+    return round(exp_months_from_lines(exper_lines)/12.0, 1)
+
+FALLBACK_MONTHS_PER_LINE = 2
+
+def _fallback_months(exper_lines: List[str]) -> int:
+    # if nothing parsed but there are experience bullets, assume ~2 months each
+    return len([l for l in exper_lines if l]) * FALLBACK_MONTHS_PER_LINE
+
+def exp_months_from_lines(exper_lines: List[str]) -> int:
+    """Total months behind exp_years_from_lines (before rounding to years)."""
+    total_months = months_from_lines(exper_lines)
+    if total_months == 0 and exper_lines:
+        total_months = _fallback_months(exper_lines)
+    return total_months
+
+def exp_months_batch(line_lists: List[List[str]]) -> np.ndarray:
+    """exp_months_from_lines for many CVs; interval merging is vectorized."""
+    months = months_batch(line_lists)
+    for i in np.flatnonzero(months == 0):
+        months[i] = _fallback_months(line_lists[i])
+    return months
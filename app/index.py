@@ -0,0 +1,271 @@
+"""Inverted index over the candidate pool: skills, education level, experience.
+
+Every candidate gets a dense integer doc id. Each term ("skill:python",
+"edu:master", "exp:3" for 3-4 years) owns a posting list: a sorted uint32
+array of doc ids. Queries are intersections/unions of those arrays, smallest
+list first, so "python AND sql AND >=2y AND master+" touches only the docs
+that carry the rarest term.
+
+Updates are incremental: new docs only ever get larger ids, so they are
+appended to a per-term tail list and merged into the array on the next read;
+removals set a tombstone bit. `save()` writes one file (JSON header + raw
+uint32/float32/int32/uint8 sections) that `load()` maps with np.memmap, so startup
+costs a header parse instead of a rebuild.
+
+Years are stored as of the add. Docs with an open-ended range ("2020 -
+Present") also carry "exp:open" and their app.tenure open offset; a
+`min_years` query takes them from that term and resolves their years for
+the current month.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+from app.tenure import NO_OPEN, resolve_years
+
+EDU_ORDER = ("unknown", "high_school", "bachelor", "master", "phd")
+EXP_BUCKETS = 16  # whole years 0..14, 15 = 15+
+MAGIC = b"CVIDX002"
+OPEN_TERM = "exp:open"
+
+
+def exp_bucket(years: float) -> int:
+    return min(int(years), EXP_BUCKETS - 1)
+
+
+def doc_terms(record: dict) -> set[str]:
+    terms = {f"skill:{s}" for s in record["skills"]}
+    terms.update(f"skill:{k}" for k in record["matched"])
+    terms.add(f"edu:{record['education_level']}")
+    terms.add(f"exp:{exp_bucket(record['experience_years'])}")
+    if record.get("experience_open") is not None:
+        terms.add(OPEN_TERM)
+    return terms
+
+
+def intersect(lists: list[np.ndarray]) -> np.ndarray:
+    if not lists:
+        return np.empty(0, dtype=np.uint32)
+    lists = sorted(lists, key=len)
+    out = lists[0]
+    for arr in lists[1:]:
+        if not len(out):
+            break
+        out = np.intersect1d(out, arr, assume_unique=True)
+    return out
+
+
+def union(lists: list[np.ndarray]) -> np.ndarray:
+    lists = [a for a in lists if len(a)]
+    if not lists:
+        return np.empty(0, dtype=np.uint32)
+    if len(lists) == 1:
+        return lists[0]
+    return np.unique(np.concatenate(lists))
+
+
+class SkillIndex:
+    """Posting lists keyed by term, plus per-doc years/open offset/level/tombstone columns."""
+
+    def __init__(self, digest: str = ""):
+        self.digest = digest
+        self.ids: list[str] = []           # doc id -> candidate id
+        self.docs: dict[str, int] = {}     # candidate id -> live doc id
+        self._postings: dict[str, np.ndarray] = {}
+        self._tails: dict[str, list[int]] = {}
+        self._years: list[float] = []
+        self._open: list[int] = []
+        self._levels: list[int] = []
+        self._base_years = np.empty(0, dtype=np.float32)
+        self._base_open = np.empty(0, dtype=np.int32)
+        self._base_levels = np.empty(0, dtype=np.uint8)
+        self._deleted = np.zeros(0, dtype=bool)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    @classmethod
+    def build(cls, records, digest: str = "") -> "SkillIndex":
+        index = cls(digest)
+        for r in records:
+            index.add(r)
+        return index
+
+    # --- updates ------------------------------------------------------------
+
+    def add(self, record: dict) -> int:
+        with self._lock:
+            old = self.docs.get(record["id"])
+            if old is not None:
+                self._tombstone(old)
+            doc = len(self.ids)
+            self.ids.append(record["id"])
+            self.docs[record["id"]] = doc
+            for term in doc_terms(record):
+                self._tails.setdefault(term, []).append(doc)
+            self._years.append(float(record["experience_years"]))
+            offset = record.get("experience_open")
+            self._open.append(NO_OPEN if offset is None else offset)
+            self._levels.append(EDU_ORDER.index(record["education_level"]) if record["education_level"] in EDU_ORDER else 0)
+            return doc
+
+    def remove(self, cid: str) -> bool:
+        with self._lock:
+            doc = self.docs.pop(cid, None)
+            if doc is None:
+                return False
+            self._tombstone(doc)
+            return True
+
+    def _tombstone(self, doc: int) -> None:
+        if len(self._deleted) <= doc:
+            grown = np.zeros(max(len(self.ids), doc + 1), dtype=bool)
+            grown[:len(self._deleted)] = self._deleted
+            self._deleted = grown
+        self._deleted[doc] = True
+
+    # --- reads --------------------------------------------------------------
+
+    def postings(self, term: str) -> np.ndarray:
+        tail = self._tails.get(term)
+        base = self._postings.get(term)
+        if tail:
+            with self._lock:
+                tail = self._tails.pop(term, None)
+                base = self._postings.get(term)
+                if tail:
+                    extra = np.asarray(tail, dtype=np.uint32)
+                    base = extra if base is None else np.concatenate([base, extra])
+                    self._postings[term] = base
+        return base if base is not None else np.empty(0, dtype=np.uint32)
+
+    def terms(self, prefix: str = "") -> list[str]:
+        """Every term starting with `prefix` (dead docs' terms included)."""
+        with self._lock:
+            keys = self._postings.keys() | self._tails.keys()
+        return [t for t in keys if t.startswith(prefix)]
+
+    def years(self) -> np.ndarray:
+        if self._years:
+            with self._lock:
+                if self._years:
+                    self._base_years = np.concatenate([self._base_years, np.asarray(self._years, dtype=np.float32)])
+                    self._base_open = np.concatenate([self._base_open, np.asarray(self._open, dtype=np.int32)])
+                    self._base_levels = np.concatenate([self._base_levels, np.asarray(self._levels, dtype=np.uint8)])
+                    self._years, self._open, self._levels = [], [], []
+        return self._base_years
+
+    def open_offsets(self) -> np.ndarray:
+        self.years()
+        return self._base_open
+
+    def levels(self) -> np.ndarray:
+        self.years()
+        return self._base_levels
+
+    def search(self, all_terms=(), any_terms=(), min_years: float | None = None,
+               min_education: str | None = None, now: int | None = None) -> np.ndarray:
+        """Doc ids matching every group in `all_terms` (each group a list of
+        alternative terms), at least one of `any_terms`, and the numeric bounds
+        (years as of month index `now`, default: this month)."""
+        must = [union([self.postings(t) for t in group]) for group in all_terms]
+        if any_terms:
+            must.append(union([self.postings(t) for t in any_terms]))
+        if min_education:
+            lo = EDU_ORDER.index(min_education)
+            must.append(union([self.postings(f"edu:{lvl}") for lvl in EDU_ORDER[lo:]]))
+        if min_years is not None and min_years > 0:
+            first = exp_bucket(min_years)
+            must.append(union([self.postings(f"exp:{b}") for b in [*range(first, EXP_BUCKETS), "open"]]))
+        if must:
+            docs = intersect(must)
+        else:
+            docs = np.arange(len(self.ids), dtype=np.uint32)
+        if min_years is not None and min_years > 0 and len(docs):
+            years = resolve_years(self.years()[docs], self.open_offsets()[docs], now)
+            docs = docs[years >= np.float32(min_years)]
+        if len(self._deleted) and len(docs):
+            live = docs[docs < len(self._deleted)]
+            docs = np.concatenate([live[~self._deleted[live]], docs[docs >= len(self._deleted)]])
+        return docs
+
+    def candidate_ids(self, docs: np.ndarray) -> list[str]:
+        return [self.ids[d] for d in docs]
+
+    def stats(self) -> dict:
+        sizes = [len(self.postings(t)) for t in set(self._postings) | set(self._tails)]
+        return {
+            "docs": len(self.docs),
+            "doc_ids": len(self.ids),
+            "terms": len(sizes),
+            "postings": int(sum(sizes)),
+            "digest": self.digest,
+        }
+
+    # --- on-disk format -----------------------------------------------------
+
+    def save(self, path: str) -> None:
+        """Compact (drop tombstoned docs) and write atomically."""
+        years, opens, levels = self.years(), self.open_offsets(), self.levels()
+        live = sorted(self.docs.values())
+        remap = np.full(len(self.ids), -1, dtype=np.int64)
+        remap[live] = np.arange(len(live))
+        terms, offsets, chunks, pos = [], [], [], 0
+        for term in sorted(set(self._postings) | set(self._tails)):
+            arr = self.postings(term)
+            arr = remap[arr]
+            arr = arr[arr >= 0].astype(np.uint32)
+            if not len(arr):
+                continue
+            terms.append(term)
+            offsets.append([pos, len(arr)])
+            chunks.append(arr)
+            pos += len(arr)
+        header = {
+            "digest": self.digest,
+            "ids": [self.ids[d] for d in live],
+            "terms": terms,
+            "offsets": offsets,
+            "postings": pos,
+        }
+        raw = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        raw += b" " * (-(len(MAGIC) + 8 + len(raw)) % 4)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(MAGIC)
+            fh.write(len(raw).to_bytes(8, "little"))
+            fh.write(raw)
+            for arr in chunks:
+                fh.write(arr.tobytes())
+            fh.write(np.asarray(years[live], dtype=np.float32).tobytes())
+            fh.write(np.asarray(opens[live], dtype=np.int32).tobytes())
+            fh.write(np.asarray(levels[live], dtype=np.uint8).tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SkillIndex":
+        with open(path, "rb") as fh:
+            if fh.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"not a candidate index file: {path}")
+            size = int.from_bytes(fh.read(8), "little")
+            header = json.loads(fh.read(size))
+        start = len(MAGIC) + 8 + size
+        n_post, n_docs = header["postings"], len(header["ids"])
+        if n_post or n_docs:
+            blob = np.memmap(path, dtype=np.uint8, mode="r", offset=start)
+        else:
+            blob = np.empty(0, dtype=np.uint8)
+        postings = blob[:n_post * 4].view(np.uint32)
+        index = cls(header["digest"])
+        index.ids = header["ids"]
+        index.docs = {cid: i for i, cid in enumerate(index.ids)}
+        index._postings = {t: postings[o:o + n] for t, (o, n) in zip(header["terms"], header["offsets"])}
+        at = n_post * 4
+        index._base_years = blob[at:at + n_docs * 4].view(np.float32)
+        index._base_open = blob[at + n_docs * 4:at + n_docs * 8].view(np.int32)
+        index._base_levels = blob[at + n_docs * 8:at + n_docs * 9]
+        return index
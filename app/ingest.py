@@ -0,0 +1,269 @@
+"""Bulk CV ingestion from a directory or ZIP archive into a JSONL results file.
+
+    python -m app.ingest data/samples -o results.jsonl --workers 8
+
+Each input file yields exactly one JSON line: status "ok" with the parsed CV
+and derived features, or status "error" with the message. Re-running with the
+same output file skips files already recorded, so a crashed run resumes.
+"""
+import argparse
+import functools
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import uuid
+import zipfile
+
+import orjson
+
+from app.cache import content_key
+from app.extract import extract_pdf, extract_text_any, warm_backends
+from app.features import edu_level_from_text, exp_years_from_lines
+from app.parser import simple_parse_cv
+from app.settings import config_section
+from app.uploads import UploadLimits
+
+SUPPORTED = (".pdf", ".txt")
+DEFAULTS = {"workers": 0, "allowed_roots": ["data"]}
+
+
+def list_sources(src: str) -> list[tuple[str, str, str]]:
+    """(display name, container path, member) triples; member is '' for plain files."""
+    out = []
+    if os.path.isdir(src):
+        for root, _, files in os.walk(src):
+            for f in files:
+                if f.lower().endswith(SUPPORTED):
+                    full = os.path.join(root, f)
+                    out.append((os.path.relpath(full, src), full, ""))
+    elif zipfile.is_zipfile(src):
+        with zipfile.ZipFile(src) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(SUPPORTED):
+                    out.append((info.filename, src, info.filename))
+    else:
+        raise ValueError(f"not a directory or zip archive: {src}")
+    out.sort()
+    return out
+
+
+_open_zips: dict[str, zipfile.ZipFile] = {}
+
+
+def _read(container: str, member: str) -> bytes:
+    if not member:
+        with open(container, "rb") as fh:
+            return fh.read()
+    zf = _open_zips.get(container)
+    if zf is None:
+        zf = _open_zips[container] = zipfile.ZipFile(container)
+    return zf.read(member)
+
+
+def process_one(task: tuple[str, str, str], max_pages: int | None = None,
+                max_chars: int | None = None) -> tuple[bool, bytes]:
+    """Worker entry point: one file in, (ok, serialized JSONL record) out. Never raises."""
+    name, container, member = task
+    t0 = time.perf_counter()
+    try:
+        raw = _read(container, member)
+        parsed = None
+        if name.lower().endswith(".pdf"):
+            result = extract_pdf(raw, max_pages, max_chars)
+            text, parsed = result.text, result.parsed
+        else:
+            text = extract_text_any(name, raw, max_pages, max_chars)
+        if parsed is None:
+            parsed = simple_parse_cv(text)
+        rec = {
+            "source": name,
+            "status": "ok",
+            "id": content_key(raw),
+            "bytes": len(raw),
+            "chars": len(text),
+            "parsed": parsed,
+            "experience_years": exp_years_from_lines(parsed["experience"]),
+            "education_level": edu_level_from_text(parsed["education"]),
+        }
+    except Exception as e:
+        rec = {"source": name, "status": "error", "error": f"{type(e).__name__}: {e}"}
+    rec["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    return rec["status"] == "ok", orjson.dumps(rec) + b"\n"
+
+
+def load_done(output: str, retry_errors: bool = False) -> set[str]:
+    """Sources already recorded in `output`; trims a torn last line left by a crash."""
+    done: set[str] = set()
+    if not os.path.exists(output):
+        return done
+    good_end = 0
+    with open(output, "rb") as fh:
+        for line in fh:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                rec = orjson.loads(line)
+            except Exception:
+                break
+            good_end += len(line)
+            if retry_errors and rec.get("status") == "error":
+                continue
+            done.add(rec["source"])
+    if good_end != os.path.getsize(output):
+        with open(output, "r+b") as fh:
+            fh.truncate(good_end)
+    return done
+
+
+class IngestJob:
+    """Progress of one ingestion run; counters are updated by the driving thread."""
+
+    def __init__(self, source: str, output: str):
+        self.id = uuid.uuid4().hex
+        self.source = source
+        self.output = output
+        self.status = "pending"
+        self.total = 0
+        self.skipped = 0
+        self.ok = 0
+        self.errors = 0
+        self.error: str | None = None
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+
+    @property
+    def done(self) -> int:
+        return self.ok + self.errors
+
+    def snapshot(self) -> dict:
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "source": self.source,
+            "output": self.output,
+            "total": self.total,
+            "skipped": self.skipped,
+            "done": self.done,
+            "ok": self.ok,
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 2),
+            "files_per_s": round(self.done / elapsed, 2) if elapsed else 0.0,
+            "error": self.error,
+        }
+
+
+def run_ingest(job: IngestJob, workers: int = 0, retry_errors: bool = False,
+               on_progress=None) -> IngestJob:
+    job.status = "running"
+    job.started_at = time.time()
+    try:
+        tasks = list_sources(job.source)
+        done = load_done(job.output, retry_errors)
+        todo = [t for t in tasks if t[0] not in done]
+        job.total = len(tasks)
+        job.skipped = len(tasks) - len(todo)
+        workers = int(workers) or (os.cpu_count() or 1)
+        limits = UploadLimits.from_config()
+        work = functools.partial(process_one, max_pages=limits.max_pages, max_chars=limits.max_chars)
+        ctx = multiprocessing.get_context("spawn")
+        os.makedirs(os.path.dirname(os.path.abspath(job.output)), exist_ok=True)
+        with open(job.output, "ab") as out, ctx.Pool(workers, initializer=warm_backends) as pool:
+            chunksize = max(1, min(32, len(todo) // (workers * 8) or 1))
+            for ok, line in pool.imap_unordered(work, todo, chunksize):
+                out.write(line)
+                out.flush()
+                if ok:
+                    job.ok += 1
+                else:
+                    job.errors += 1
+                if on_progress:
+                    on_progress(job)
+        job.status = "finished"
+    except Exception as e:
+        job.status = "failed"
+        job.error = f"{type(e).__name__}: {e}"
+    finally:
+        job.finished_at = time.time()
+    return job
+
+
+# --- API job registry -------------------------------------------------------
+
+_jobs: dict[str, IngestJob] = {}
+
+
+def _within(path: str, roots: list[str]) -> bool:
+    real = os.path.realpath(path)
+    return any(real == os.path.realpath(r) or real.startswith(os.path.realpath(r) + os.sep) for r in roots)
+
+
+def start_job(source: str, output: str, workers: int | None = None,
+              retry_errors: bool = False) -> IngestJob:
+    """Validate paths against ingest.allowed_roots and run the job on a background thread."""
+    cfg = config_section("ingest", DEFAULTS)
+    roots = cfg["allowed_roots"] or []
+    for p in (source, output):
+        if not _within(p, roots):
+            raise PermissionError(f"path outside ingest.allowed_roots: {p}")
+    if not os.path.exists(source):
+        raise FileNotFoundError(source)
+    job = IngestJob(source, output)
+    _jobs[job.id] = job
+    threading.Thread(
+        target=run_ingest,
+        args=(job, workers if workers is not None else cfg["workers"], retry_errors),
+        name=f"ingest-{job.id[:8]}",
+        daemon=True,
+    ).start()
+    return job
+
+
+def get_job(job_id: str) -> IngestJob | None:
+    return _jobs.get(job_id)
+
+
+# --- CLI --------------------------------------------------------------------
+
+def _progress_printer(interval_s: float = 1.0):
+    last = 0.0
+
+    def report(job: IngestJob) -> None:
+        nonlocal last
+        now = time.time()
+        if now - last < interval_s and job.done + job.skipped < job.total:
+            return
+        last = now
+        s = job.snapshot()
+        print(
+            f"\r{s['done'] + s['skipped']}/{s['total']}  ok={s['ok']} err={s['errors']} "
+            f"skipped={s['skipped']}  {s['files_per_s']} files/s",
+            end="", file=sys.stderr, flush=True,
+        )
+
+    return report
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.ingest", description=__doc__.splitlines()[0])
+    ap.add_argument("source", help="directory or .zip of .pdf/.txt CVs")
+    ap.add_argument("-o", "--output", required=True, help="JSONL results file (appended, resumable)")
+    ap.add_argument("-w", "--workers", type=int, default=0, help="worker processes (0 = all cores)")
+    ap.add_argument("--retry-errors", action="store_true", help="re-process files recorded as errors")
+    args = ap.parse_args(argv)
+
+    job = run_ingest(IngestJob(args.source, args.output), args.workers, args.retry_errors,
+                     on_progress=_progress_printer())
+    print(file=sys.stderr)
+    s = job.snapshot()
+    print(f"{s['status']}: ok={s['ok']} errors={s['errors']} skipped={s['skipped']} in {s['elapsed_s']}s",
+          file=sys.stderr)
+    if job.error:
+        print(job.error, file=sys.stderr)
+    return 0 if job.status == "finished" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
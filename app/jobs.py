@@ -0,0 +1,429 @@
+"""Asynchronous upload jobs: POST /jobs returns at once, GET /jobs/{id} polls.
+
+Jobs are persisted in a pluggable store (memory or SQLite) and drained by a
+fixed number of asyncio workers through a two-lane scheduler: uploads above
+`large_mb` go to the "large" lane, which may occupy at most `large_slots`
+workers at a time, so a handful of huge PDFs cannot hold every worker while
+many small CVs wait. Small jobs are preferred, but every `small_burst` picks
+the large lane gets a turn so it is never starved either.
+
+When a job finishes, an optional callback URL receives the job snapshot as a
+JSON POST. Only hosts listed in `callback_hosts` are accepted (a local sink by
+default; run one with `python -m app.jobs sink --port 9009`).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import deque
+
+from app.settings import config_section
+
+DEFAULTS = {
+    "workers": 2,
+    "store": "memory",       # memory | sqlite
+    "db_path": "data/jobs/jobs.sqlite",
+    "max_pending": 256,
+    "large_mb": 2,
+    "large_slots": 1,
+    "small_burst": 4,
+    "ttl_s": 3600,
+    "callback_hosts": ["127.0.0.1", "localhost"],
+    "callback_timeout_s": 5,
+    "callback_retries": 3,
+}
+
+FINAL = ("done", "failed")
+
+
+class JobQueueFull(Exception):
+    """Raised when `max_pending` jobs are already queued."""
+
+
+class RetryLater(Exception):
+    """Raised by a handler when the job should be requeued after `delay_s`."""
+
+    def __init__(self, delay_s: float):
+        super().__init__(delay_s)
+        self.delay_s = delay_s
+
+
+class MemoryJobStore:
+    """Job snapshots in a dict; finished jobs older than `ttl_s` are pruned on insert."""
+
+    def __init__(self, ttl_s: float = 3600):
+        self.ttl_s = ttl_s
+        self._jobs: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def put(self, job: dict) -> None:
+        with self._lock:
+            self._prune()
+            self._jobs[job["job_id"]] = dict(job)
+
+    def update(self, job_id: str, **fields) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.update(fields)
+            return dict(job)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def fail_unfinished(self, error: dict) -> int:
+        return 0  # nothing survives a restart
+
+    def _prune(self) -> None:
+        if not self.ttl_s:
+            return
+        cutoff = time.time() - self.ttl_s
+        stale = [k for k, j in self._jobs.items() if j["status"] in FINAL and (j["finished_at"] or 0) < cutoff]
+        for k in stale:
+            del self._jobs[k]
+
+
+class SqliteJobStore:
+    """Job snapshots as JSON rows; survives restarts so finished results stay pollable."""
+
+    def __init__(self, db_path: str, ttl_s: float = 3600):
+        self.ttl_s = ttl_s
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY, status TEXT NOT NULL, finished_at REAL, payload TEXT NOT NULL)"
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def _write(self, job: dict) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, status, finished_at, payload) VALUES (?, ?, ?, ?)",
+            (job["job_id"], job["status"], job["finished_at"], json.dumps(job, ensure_ascii=False)),
+        )
+        self._db.commit()
+
+    def _read(self, job_id: str) -> dict | None:
+        row = self._db.execute("SELECT payload FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, job: dict) -> None:
+        with self._lock:
+            if self.ttl_s:
+                self._db.execute("DELETE FROM jobs WHERE finished_at < ?", (time.time() - self.ttl_s,))
+            self._write(job)
+
+    def update(self, job_id: str, **fields) -> dict | None:
+        with self._lock:
+            job = self._read(job_id)
+            if job is None:
+                return None
+            job.update(fields)
+            self._write(job)
+            return job
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            return self._read(job_id)
+
+    def fail_unfinished(self, error: dict) -> int:
+        """Queued/running rows from a previous process lost their upload; mark them failed."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT payload FROM jobs WHERE status NOT IN (?, ?)", FINAL
+            ).fetchall()
+            now = time.time()
+            for (payload,) in rows:
+                job = json.loads(payload)
+                job.update(status="failed", error=error, finished_at=now)
+                self._write(job)
+            return len(rows)
+
+
+def make_store(kind: str, db_path: str | None, ttl_s: float):
+    if kind == "memory":
+        return MemoryJobStore(ttl_s)
+    if kind == "sqlite":
+        if not db_path:
+            raise ValueError("jobs.db_path is required for the sqlite store")
+        return SqliteJobStore(db_path, ttl_s)
+    raise ValueError(f"unknown job store: {kind}")
+
+
+class FairScheduler:
+    """Two FIFO lanes; the large lane is capped at `large_slots` concurrent jobs."""
+
+    def __init__(self, large_slots: int = 1, small_burst: int = 4, max_pending: int = 256):
+        self.large_slots = max(1, int(large_slots))
+        self.small_burst = max(1, int(small_burst))
+        self.max_pending = int(max_pending)
+        self.lanes = {"small": deque(), "large": deque()}
+        self.running = {"small": 0, "large": 0}
+        self._small_streak = 0
+        self._cond = asyncio.Condition()
+
+    @property
+    def pending(self) -> int:
+        return len(self.lanes["small"]) + len(self.lanes["large"])
+
+    @property
+    def full(self) -> bool:
+        return bool(self.max_pending) and self.pending >= self.max_pending
+
+    def _pick(self) -> str | None:
+        small = bool(self.lanes["small"])
+        large = bool(self.lanes["large"]) and self.running["large"] < self.large_slots
+        if small and large:
+            return "large" if self._small_streak >= self.small_burst else "small"
+        return "small" if small else "large" if large else None
+
+    async def submit(self, lane: str, item, front: bool = False) -> None:
+        async with self._cond:
+            if not front and self.full:
+                raise JobQueueFull()
+            (self.lanes[lane].appendleft if front else self.lanes[lane].append)(item)
+            self._cond.notify_all()
+
+    async def take(self) -> tuple[str, object]:
+        async with self._cond:
+            while (lane := self._pick()) is None:
+                await self._cond.wait()
+            self._small_streak = self._small_streak + 1 if lane == "small" else 0
+            self.running[lane] += 1
+            return lane, self.lanes[lane].popleft()
+
+    async def release(self, lane: str) -> None:
+        async with self._cond:
+            self.running[lane] -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "queued": {k: len(v) for k, v in self.lanes.items()},
+            "running": dict(self.running),
+            "large_slots": self.large_slots,
+        }
+
+
+def validate_callback(url: str, allowed_hosts) -> str:
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("callback_url must be an absolute http(s) URL")
+    if parts.hostname not in allowed_hosts:
+        raise ValueError(f"callback host not allowed: {parts.hostname}")
+    return url
+
+
+def deliver_callback(url: str, payload: dict, timeout_s: float = 5, retries: int = 3) -> dict:
+    """POST `payload` as JSON; retried with exponential backoff on errors and 5xx."""
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    outcome = {"url": url, "attempts": 0, "status": None, "error": None}
+    for attempt in range(max(1, retries)):
+        outcome["attempts"] = attempt + 1
+        req = urllib.request.Request(url, data=body, method="POST",
+                                     headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=timeout_s) as resp:
+                outcome.update(status=resp.status, error=None)
+                return outcome
+        except urllib.error.HTTPError as e:
+            outcome.update(status=e.code, error=f"HTTP {e.code}")
+            if e.code < 500:
+                return outcome
+        except Exception as e:
+            outcome.update(status=None, error=str(e))
+        time.sleep(0.5 * 2 ** attempt)
+    return outcome
+
+
+class JobRunner:
+    """Queue + workers + store. `handler(filename, upload)` is awaited per job and
+    returns the result dict; raising RetryLater requeues it at the head of its lane
+    once `delay_s` has passed, without holding a worker meanwhile.
+
+    Store calls run in a worker thread (the SQLite store commits on every update).
+    """
+
+    def __init__(self, store, handler=None, workers: int = 2, large_bytes: int = 2 << 20,
+                 large_slots: int = 1, small_burst: int = 4, max_pending: int = 256,
+                 callback_hosts=("127.0.0.1", "localhost"), callback_timeout_s: float = 5,
+                 callback_retries: int = 3):
+        self.store = store
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.large_bytes = int(large_bytes)
+        self.callback_hosts = frozenset(callback_hosts or ())
+        self.callback_timeout_s = callback_timeout_s
+        self.callback_retries = callback_retries
+        self._sched_args = (large_slots, small_burst, max_pending)
+        self.scheduler: FairScheduler | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._delayed: set[asyncio.Task] = set()
+
+    @classmethod
+    def from_config(cls, handler=None) -> "JobRunner":
+        cfg = config_section("jobs", DEFAULTS)
+        return cls(
+            make_store(cfg["store"], cfg["db_path"], cfg["ttl_s"]), handler,
+            workers=cfg["workers"], large_bytes=int(float(cfg["large_mb"]) * (1 << 20)),
+            large_slots=cfg["large_slots"], small_burst=cfg["small_burst"],
+            max_pending=cfg["max_pending"], callback_hosts=cfg["callback_hosts"],
+            callback_timeout_s=cfg["callback_timeout_s"], callback_retries=cfg["callback_retries"],
+        )
+
+    def start(self) -> None:
+        """Must be called from the running event loop (e.g. an async startup hook)."""
+        if self._tasks:
+            return
+        self.scheduler = FairScheduler(*self._sched_args)
+        self.store.fail_unfinished({"status_code": 500, "detail": "interrupted by server restart"})
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        tasks = [*self._tasks, *self._delayed]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        if self.scheduler is not None:
+            for lane in self.scheduler.lanes.values():
+                while lane:
+                    _, upload = lane.popleft()
+                    upload.cleanup()
+
+    async def submit(self, filename: str, upload, callback_url: str | None = None) -> dict:
+        if callback_url:
+            validate_callback(callback_url, self.callback_hosts)
+        if self.scheduler.full:
+            raise JobQueueFull()
+        lane = "large" if upload.size > self.large_bytes else "small"
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "filename": filename,
+            "size": upload.size,
+            "lane": lane,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "callback_url": callback_url,
+            "callback": None,
+        }
+        await asyncio.to_thread(self.store.put, job)
+        await self.scheduler.submit(lane, (job["job_id"], upload))
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        return self.store.get(job_id)
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "delayed": len(self._delayed),
+                **(self.scheduler.stats() if self.scheduler else {})}
+
+    async def _update(self, job_id: str, **fields) -> dict | None:
+        return await asyncio.to_thread(self.store.update, job_id, **fields)
+
+    async def _worker(self) -> None:
+        while True:
+            lane, (job_id, upload) = await self.scheduler.take()
+            job = None
+            requeued = False
+            try:
+                job = await self._update(job_id, status="running", started_at=time.time())
+                if job is None:  # gone from the store (pruned, store reset): nobody can poll it
+                    continue
+                result = await self.handler(job["filename"], upload)
+                job = await self._update(job_id, status="done", result=result, finished_at=time.time())
+            except RetryLater as e:
+                job = await self._update(job_id, status="queued", started_at=None)
+                if job is not None:
+                    self._requeue_later(lane, (job_id, upload), e.delay_s)
+                    requeued = True
+                continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = {"status_code": getattr(e, "status_code", 500), "detail": getattr(e, "detail", str(e))}
+                job = await self._update(job_id, status="failed", error=error, finished_at=time.time())
+            finally:
+                if not requeued:
+                    upload.cleanup()
+                await self.scheduler.release(lane)
+            if job is not None and job.get("callback_url"):
+                asyncio.create_task(self._notify(job))
+
+    def _requeue_later(self, lane: str, item: tuple, delay_s: float) -> None:
+        task = asyncio.create_task(self._requeue(lane, item, delay_s))
+        self._delayed.add(task)
+        task.add_done_callback(self._delayed.discard)
+
+    async def _requeue(self, lane: str, item: tuple, delay_s: float) -> None:
+        try:
+            await asyncio.sleep(delay_s)
+            await self.scheduler.submit(lane, item, front=True)
+        except asyncio.CancelledError:
+            item[1].cleanup()
+            raise
+
+    async def _notify(self, job: dict) -> None:
+        payload = {k: v for k, v in job.items() if k != "callback"}
+        outcome = await asyncio.to_thread(
+            deliver_callback, job["callback_url"], payload, self.callback_timeout_s, self.callback_retries
+        )
+        await self._update(job["job_id"], callback=outcome)
+
+
+def _serve_sink(host: str, port: int, output: str | None) -> None:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    out = open(output, "a", encoding="utf-8") if output else None
+
+    class Sink(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            line = body.decode("utf-8", errors="replace").replace("\n", " ")
+            print(line, flush=True)
+            if out is not None:
+                out.write(line + "\n")
+                out.flush()
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    print(f"job callback sink on http://{host}:{port}/", flush=True)
+    ThreadingHTTPServer((host, port), Sink).serve_forever()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Job utilities")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sink = sub.add_parser("sink", help="print (and optionally append) received job callbacks")
+    sink.add_argument("--host", default="127.0.0.1")
+    sink.add_argument("--port", type=int, default=9009)
+    sink.add_argument("-o", "--output", help="JSONL file to append callbacks to")
+    args = ap.parse_args(argv)
+    try:
+        _serve_sink(args.host, args.port, args.output)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
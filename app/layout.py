@@ -0,0 +1,355 @@
+"""Layout-aware PDF extraction: CV sections straight from positioned text.
+
+The flat-text backends hand simple_parse_cv one string, and the parser has
+to rebuild the structure with regexes. Two-column CVs come out with their
+columns interleaved, and a header outside the parser's vocabulary
+("ORGANIZATIONAL ACTIVITIES") lets the section above it run on. Here each
+page is read once as positioned text segments with font size and weight:
+
+- segments are grouped into rows by baseline. A vertical gutter that only a
+  few rows cross splits the page into columns; between two full-width rows
+  the left column is read before the right one;
+- the body font size is the most common one, counted by characters. A row
+  in the parser's header vocabulary, or a short row set clearly larger than
+  body text, starts a section;
+- education/experience paragraphs end where the distance between baselines
+  exceeds the page's usual line pitch, instead of at blank lines.
+
+The result is simple_parse_cv's dict plus the text in reading order, so
+callers skip the re-parse. Segments come from pypdfium2 text rectangles
+(one library call per run of text) or from pdfplumber words. pdfplumber
+sends every character through pdfminer and is about 15x slower per page on
+data/samples/; it stays available for PDFs that pdfium cannot read.
+"""
+import time
+from collections import Counter
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+from app.extract import _open_src
+from app.parser import EMAIL_RE, HEADER_RE, HEADER_WORDS, LETTER_RE, PHONE_RE, SKILL_SPLIT_RE
+
+HEADER_SCALE = 1.15       # font size vs body text that marks an unlisted section header
+PARAGRAPH_GAP = 1.4       # baseline distance (in the page's usual line pitch) that ends a paragraph
+_GUTTER_MIN = 10.0        # points of empty page width between two columns
+_BIN = 2.0                # points per bin of the column coverage histogram
+
+
+class Segment(NamedTuple):
+    x0: float
+    top: float
+    x1: float
+    bottom: float
+    size: float
+    bold: bool
+    text: str
+
+
+class Line(NamedTuple):
+    text: str
+    size: float
+    bold: bool
+    top: float
+    bottom: float
+    column: int  # 0 full width / single column, 1 left, 2 right
+    para: bool = False  # starts a new paragraph
+
+
+class LayoutResult(NamedTuple):
+    text: str
+    parsed: dict
+    pages: int
+    page_ms: tuple
+
+
+# --- segment sources --------------------------------------------------------
+
+def pdfium_pages(src, max_pages: int | None = None) -> Iterator[tuple[float, list[Segment]]]:
+    """(page width, word segments) per page from pdfium's per-character loose boxes."""
+    import ctypes
+
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as pdfium_c
+
+    doc = pdfium.PdfDocument(src)
+    box = pdfium_c.FS_RECTF()
+    name = ctypes.create_string_buffer(128)
+    flags = ctypes.c_int()
+
+    def is_bold(tp, k) -> bool:
+        if pdfium_c.FPDFText_GetFontWeight(tp, k) >= 600:
+            return True
+        return bool(pdfium_c.FPDFText_GetFontInfo(tp, k, name, len(name), ctypes.byref(flags))) and b"Bold" in name.value
+
+    try:
+        for i in range(len(doc) if max_pages is None else min(len(doc), max_pages)):
+            page = doc[i]
+            tp = page.get_textpage()
+            try:
+                height = page.get_height()
+                text = tp.get_text_range().replace("\x02", "-").replace("\ufffe", "-")  # soft hyphens
+                segments = []
+                word: list[str] = []
+                x0 = x1 = top = bottom = size = 0.0
+                first = 0
+                for k, ch in enumerate(text):
+                    if ch.isspace():
+                        if word:
+                            segments.append(Segment(x0, height - top, x1, height - bottom, size, is_bold(tp, first), "".join(word) + " "))
+                            word = []
+                        continue
+                    pdfium_c.FPDFText_GetLooseCharBox(tp, k, box)
+                    char_size = pdfium_c.FPDFText_GetFontSize(tp, k)
+                    if word and (box.left - x1 > 0.3 * size or abs(box.bottom - bottom) > 0.3 * size or char_size != size):
+                        segments.append(Segment(x0, height - top, x1, height - bottom, size, is_bold(tp, first), "".join(word)))
+                        word = []
+                    if not word:
+                        x0, top, bottom, size, first = box.left, box.top, box.bottom, char_size, k
+                    word.append(ch)
+                    x1 = max(x1, box.right) if len(word) > 1 else box.right
+                    top = max(top, box.top)
+                if word:
+                    segments.append(Segment(x0, height - top, x1, height - bottom, size, is_bold(tp, first), "".join(word) + " "))
+                yield page.get_width(), segments
+            finally:
+                tp.close()
+                page.close()
+    finally:
+        doc.close()
+
+
+def pdfplumber_pages(src, max_pages: int | None = None) -> Iterator[tuple[float, list[Segment]]]:
+    """(page width, segments) per page from pdfplumber words (split on font changes)."""
+    import pdfplumber
+
+    with pdfplumber.open(_open_src(src)) as pdf:
+        for i, page in enumerate(pdf.pages):
+            if max_pages is not None and i >= max_pages:
+                break
+            try:
+                words = page.extract_words(extra_attrs=["size", "fontname"])
+                yield page.width, [
+                    Segment(w["x0"], w["top"], w["x1"], w["bottom"], w["size"], "Bold" in w["fontname"], w["text"] + " ")
+                    for w in words
+                ]
+            finally:
+                page.close()
+
+
+SOURCES = {"pdfium": pdfium_pages, "pdfplumber": pdfplumber_pages}
+
+
+# --- page layout --------------------------------------------------------------
+
+def _rows(segments: list[Segment]) -> list[list[Segment]]:
+    """Segments sharing a baseline, top to bottom, each row left to right."""
+    rows: list[list[Segment]] = []
+    anchor = None
+    for s in sorted(segments, key=lambda s: s.bottom):
+        if rows and s.bottom - anchor <= 0.45 * max(s.size, 4.0):
+            rows[-1].append(s)
+        else:
+            rows.append([s])
+            anchor = s.bottom
+    for row in rows:
+        row.sort(key=lambda s: s.x0)
+    return rows
+
+
+def _gutter(rows: list[list[Segment]], width: float) -> float | None:
+    """x of an empty vertical strip in the middle of the page that at most a
+    tenth of the rows cross, with a real column of text on both sides."""
+    if len(rows) < 6 or width <= 0:
+        return None
+    bins = int(width / _BIN) + 2
+    cover = np.zeros(bins, dtype=np.int32)
+    for row in rows:
+        hit = np.zeros(bins, dtype=bool)
+        for s in row:
+            hit[max(0, int(s.x0 / _BIN)):min(bins, int(s.x1 / _BIN) + 1)] = True
+        cover += hit
+    lo, hi = int(bins * 0.25), int(bins * 0.75)
+    empty = np.flatnonzero(cover[lo:hi] <= len(rows) // 10)
+    if not len(empty):
+        return None
+    runs = np.split(empty, np.flatnonzero(np.diff(empty) > 1) + 1)
+    best = max(runs, key=len)
+    if len(best) * _BIN < _GUTTER_MIN:
+        return None
+    x = (lo + (best[0] + best[-1]) / 2) * _BIN
+    chars = [0, 0]
+    for row in rows:
+        for s in row:
+            if s.x1 <= x:
+                chars[0] += len(s.text)
+            elif s.x0 >= x:
+                chars[1] += len(s.text)
+    total = sum(chars)
+    return x if total and min(chars) >= 0.15 * total else None
+
+
+def _line(parts: list[Segment], column: int) -> Line | None:
+    out: list[str] = []
+    prev = None
+    for s in parts:
+        if prev is not None and out and not out[-1].endswith(" ") and s.x0 - prev.x1 > 0.25 * max(s.size, 1.0):
+            out.append(" ")
+        out.append(s.text)
+        prev = s
+    text = " ".join("".join(out).split())
+    if not text:
+        return None
+    styled = [s for s in parts if LETTER_RE.search(s.text)] or parts
+    return Line(text, max(s.size for s in parts), all(s.bold for s in styled),
+                min(s.top for s in parts), max(s.bottom for s in parts), column)
+
+
+def _paragraphs(lines: list[Line]) -> list[Line]:
+    """Flag lines that start a paragraph: a column change or a baseline
+    distance well above the page's median line pitch."""
+    pitches = [b.bottom - a.bottom for a, b in zip(lines, lines[1:]) if a.column == b.column and b.bottom > a.bottom]
+    if not pitches:
+        return lines
+    limit = PARAGRAPH_GAP * float(np.median(pitches))
+    return lines[:1] + [
+        b._replace(para=a.column != b.column or not 0 < b.bottom - a.bottom <= limit)
+        for a, b in zip(lines, lines[1:])
+    ]
+
+
+def page_lines(segments: list[Segment], width: float) -> list[Line]:
+    """Lines of one page in reading order."""
+    rows = _rows(segments)
+    x = _gutter(rows, width)
+    if x is None:
+        return _paragraphs([ln for row in rows if (ln := _line(row, 0))])
+    lines: list[Line] = []
+    left: list[Line] = []
+    right: list[Line] = []
+
+    def flush():
+        lines.extend(left)
+        lines.extend(right)
+        left.clear()
+        right.clear()
+
+    for row in rows:
+        if any(s.x0 < x < s.x1 for s in row):  # full-width row: ends the band above it
+            flush()
+            if ln := _line(row, 0):
+                lines.append(ln)
+            continue
+        if ln := _line([s for s in row if s.x1 <= x], 1):
+            left.append(ln)
+        if ln := _line([s for s in row if s.x0 >= x], 2):
+            right.append(ln)
+    flush()
+    return _paragraphs(lines)
+
+
+# --- sections -----------------------------------------------------------------
+
+class Sections:
+    """simple_parse_cv's output built from positioned lines, page by page."""
+
+    def __init__(self):
+        self.sizes: Counter = Counter()  # font size -> characters, across pages so far
+        self.email = self.phone = self.name = ""
+        self.current = None
+        self.skills: list[str] = []
+        self.blocks: dict[str, list[str]] = {"education": [], "experience": []}
+        self.block: list[str] | None = None
+        self.text: list[str] = []
+        self.chars = 0
+
+    def body_size(self) -> float:
+        return self.sizes.most_common(1)[0][0] if self.sizes else 0.0
+
+    def _header(self, ln: Line, body: float) -> str | None:
+        h = HEADER_RE.match(ln.text)
+        if h:
+            return h.lastgroup if h.lastgroup != "other" else ln.text.lower().strip(":")
+        words = ln.text.split()
+        if (body and ln.size >= body * HEADER_SCALE and self.name and 0 < len(words) <= 5 and len(ln.text) <= 40
+                and LETTER_RE.search(ln.text) and not any(c.isdigit() or c == "@" for c in ln.text)):
+            return ln.text.lower().strip(": ")
+        return None
+
+    def _close_block(self) -> None:
+        if self.block:
+            self.blocks[self.current].append(" ".join(self.block))
+            self.block.clear()
+
+    def feed(self, lines: list[Line], max_chars: int | None = None) -> bool:
+        """Consume one page; False once `max_chars` of text has been taken."""
+        for ln in lines:
+            if ln.size:
+                self.sizes[round(ln.size * 2) / 2] += len(ln.text)
+        body = self.body_size()
+        for ln in lines:
+            if max_chars is not None and self.chars >= max_chars:
+                return False
+            gap = ln.para
+            self.text.append(("\n\n" if gap else "\n") + ln.text if self.text else ln.text)
+            self.chars += len(self.text[-1])
+            if not self.email and (m := EMAIL_RE.search(ln.text)):
+                self.email = m.group(0)
+            if not self.phone and (m := PHONE_RE.search(ln.text)):
+                self.phone = m.group(0)
+            section = self._header(ln, body)
+            if section is not None:
+                if self.block is not None:
+                    self._close_block()
+                self.current = section
+                self.block = [] if section in self.blocks else None
+                continue
+            if not self.name:
+                contact = (self.email and self.email in ln.text) or (self.phone and self.phone in ln.text)
+                if not contact and ln.text.lower().strip(":") not in HEADER_WORDS and LETTER_RE.search(ln.text):
+                    self.name = ln.text
+            if self.block is not None:
+                if gap:
+                    self._close_block()
+                self.block.append(ln.text)
+            elif self.current == "skills":
+                self.skills.extend(s.strip() for s in SKILL_SPLIT_RE.split(ln.text) if len(s.strip()) > 1)
+        return max_chars is None or self.chars < max_chars
+
+    def result(self, max_chars: int | None = None) -> tuple[str, dict]:
+        if self.block is not None:
+            self._close_block()
+        text = "".join(self.text)
+        if max_chars is not None:
+            text = text[:max_chars]
+        return text, {
+            "name": self.name,
+            "email": self.email,
+            "phone": self.phone,
+            "skills": self.skills,
+            "education": self.blocks["education"],
+            "experience": self.blocks["experience"],
+        }
+
+
+def extract_layout(src, source: str = "pdfium", max_pages: int | None = None,
+                   max_chars: int | None = None) -> LayoutResult:
+    """Text and parsed sections of a PDF in one pass over its pages."""
+    sections = Sections()
+    page_ms = []
+    pages = SOURCES[source](src, max_pages)
+    try:
+        while True:
+            t0 = time.perf_counter()
+            item = next(pages, None)
+            if item is None:
+                break
+            width, segments = item
+            more = sections.feed(page_lines(segments, width), max_chars)
+            page_ms.append(round((time.perf_counter() - t0) * 1000, 3))
+            if not more:
+                break
+    finally:
+        pages.close()
+    text, parsed = sections.result(max_chars)
+    return LayoutResult(text, parsed, len(page_ms), tuple(page_ms))
@@ -1,23 +1,39 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi import Body
 from datetime import datetime
 from typing import List
-from fastapi.responses import JSONResponse, HTMLResponse, ORJSONResponse, RedirectResponse, Response
+from fastapi.responses import JSONResponse, HTMLResponse, ORJSONResponse, PlainTextResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.staticfiles import StaticFiles
-from app.extract import extract_text_from_pdf_fileobj, extract_text_from_bytes_or_txt
+from app.admission import Admission, AdmissionMiddleware, ticket_of
+from app.assets import CachedBody
+from app.extract import BACKEND_STATS, ExtractionFailed, extract_text_from_pdf_fileobj, extract_text_from_bytes_or_txt, extract_pdf, warm_backends
+from app.cache import ExtractionCache
 from app.models import CVParsed
-from app.scorer import score_cv
+from app.parser import simple_parse_cv
+from app.pool import ExtractionPool, ExtractionTimeout, QueueFull
+from app.uploads import UploadLimits, UploadTooLarge, spool_stream, spool_upload
+from app.features import edu_level_from_text, exp_years_from_lines
+from app.metrics import ADMISSION, BYTES, DUPLICATES, PAGES, REGISTRY, TRACES, MetricsMiddleware, Timings, timings_of
+from app import ingest
+from app.candidates import CandidateStore
+from app.dedup import DedupPolicy, fingerprint
+from app.jobs import JobQueueFull, JobRunner, RetryLater
+from app import profiles
+from app.settings import config_section
+from app.trace import Tracer, explain, requested
+from app.scorer import (
+    cv_features, default_weights, features_batch, features_from_parsed, has_features, rank_order, score_batch, score_cv,
+    score_features, score_roles,
+)
+import asyncio
 import io
+import json
 import re
+import time
+import orjson
 from fastapi.encoders import jsonable_encoder
 
-try:
-    import orjson
-    from fastapi.responses import ORJSONResponse as DefaultResponseClass
-except Exception:  # orjson not available
-    from fastapi.responses import JSONResponse as DefaultResponseClass
-
 app = FastAPI(
     title="CV Evaluation Engine",
     description="Bir özgeçmiş (CV) yükleyin, otomatik olarak analiz ve puanlama alın! PDF ve TXT dosyalarını destekler.",
@@ -31,113 +47,136 @@ app = FastAPI(
         {"name": "health", "description": "Servis sağlık kontrolü"},
         {"name": "upload", "description": "CV dosyası yükle ve önizleme al"},
         {"name": "score", "description": "Yapılandırılmış CV üzerinden otomatik puanlama"},
+        {"name": "ingest", "description": "Klasör veya ZIP içindeki CV'leri toplu işleme"},
+        {"name": "candidates", "description": "Özellikleri önceden hesaplanmış aday havuzu ve sıralama"},
+        {"name": "admin", "description": "Çalışma zamanı yapılandırması"},
     ],
     docs_url=None,
     redoc_url=None,
-    default_response_class=DefaultResponseClass,
+    openapi_url=None,  # served pre-rendered below
+    default_response_class=ORJSONResponse,
 )
 
-def simple_parse_cv(text: str) -> dict:
-    lines = [line.strip() for line in text.splitlines()]
-    norm_lines = []
-    for ln in lines:
-        if ln is None:
-            continue
-        s = ln.strip()
-        norm_lines.append(s)
-
-    email_match = re.search(r"[\w\.-]+@[\w\.-]+\.[A-Za-z]{2,}", text, re.I)
-    email = email_match.group(0) if email_match else ""
-
-    phone_match = re.search(r"(\+?\d[\d\s\-()]{7,}\d)", text)
-    phone = phone_match.group(0) if phone_match else ""
-
-    # name heuristic = first non-empty line that is not email/phone and not a header word
-    header_words = {"summary","objective","skills","skill","education","experience","experiences","work experience","projects","certificates","languages"}
-    name = ""
-    for ln in norm_lines:
-        if not ln:
-            continue
-        low = ln.lower().strip(':')
-        if (email and email in ln) or (phone and phone in ln):
-            continue
-        if low in header_words:
-            continue
-        if re.search(r"[A-Za-zğüşöçıİĞÜŞÖÇ]", ln):
-            name = ln
-            break
-
-    # section scan
-    known_headers = [
-        r"skills?\b",
-        r"education\b",
-        r"experiences?\b|work\s+experience\b",
-        r"projects\b",
-        r"certificates?\b",
-        r"languages\b",
-        r"summary\b|objective\b",
-    ]
-    header_re = re.compile(r"^(" + r"|".join(known_headers) + r")[\s:]*$", re.I)
-
-    sections: dict[str, list[str]] = {}
-    current = None
-    for ln in norm_lines:
-        low = (ln or "").lower()
-        if header_re.match(low):
-            # normalize header key
-            if re.search(r"skills?", low): key = "skills"
-            elif re.search(r"education", low): key = "education"
-            elif re.search(r"experiences?|work\s+experience", low): key = "experience"
-            elif re.search(r"projects", low): key = "projects"
-            elif re.search(r"certificates?", low): key = "certificates"
-            elif re.search(r"languages", low): key = "languages"
-            else: key = low.strip(':')
-            current = key
-            sections.setdefault(current, [])
-            continue
-        if current:
-            sections[current].append(ln)
-
-    skills_sep = re.compile(r"[\n,;•·\u2022\u25CF]|\s\u00B7\s|")
-    skills: list[str] = []
-    if "skills" in sections:
-        buf = "\n".join(sections["skills"]) if sections["skills"] else ""
-        raw_sk = re.split(r"[\n,;•·\u2022\u25CF]", buf)
-        skills = [s.strip() for s in raw_sk if s and len(s.strip()) > 1]
-
-    def compact_block(lines_list: list[str]) -> list[str]:
-        out: list[str] = []
-        block: list[str] = []
-        for ln in lines_list:
-            if not ln:
-                if block:
-                    out.append(" ".join(block).strip())
-                    block = []
-                continue
-            block.append(ln)
-        if block:
-            out.append(" ".join(block).strip())
-        return [x for x in out if x]
-
-    education = compact_block(sections.get("education", []))
-    experience = compact_block(sections.get("experience", []))
-
-    return {
-        "name": name,
-        "email": email,
-        "phone": phone,
-        "skills": skills,
-        "education": education,
-        "experience": experience,
-    }
+# per-client token buckets, priority lanes and load shedding for the costly POST routes;
+# added first so the metrics middleware (outermost) also counts rejected requests
+admission = Admission.from_config()
+app.add_middleware(AdmissionMiddleware, admission=admission, on_decision=ADMISSION.inc)
+
+# request counters, latency histograms and Server-Timing for every route
+app.add_middleware(MetricsMiddleware)
+
+# PDF extraction runs in worker processes so /health and /score stay responsive;
+# workers are booted at startup with the PDF libraries already imported
+extraction_pool = ExtractionPool.from_config(initializer=warm_backends)
+
+@app.on_event("startup")
+def _start_extraction_pool():
+    extraction_pool.start()
+
+@app.on_event("shutdown")
+def _stop_extraction_pool():
+    extraction_pool.shutdown()
+
+# role profiles / thresholds compiled once; swapped atomically on reload
+config_watcher = profiles.ConfigWatcher(profiles.current().reload_interval_s)
+
+@app.on_event("startup")
+def _start_config_watcher():
+    config_watcher.start()
+
+@app.on_event("shutdown")
+def _stop_config_watcher():
+    config_watcher.stop()
+
+# size / page / character budgets for uploads
+upload_limits = UploadLimits.from_config()
+
+# extracted text + parsed dict keyed by SHA-256 of the uploaded bytes
+extraction_cache = ExtractionCache.from_config()
+
+# parsed CVs reduced to scoring features; uploads join the pool under their cache id
+candidate_store = CandidateStore.from_config()
+auto_add_candidates = bool(config_section("candidates", {"auto_add": True})["auto_add"])
+# a new role/keyword config re-scores only the affected candidates, in the background
+profiles.subscribe(lambda cfg: candidate_store.rescorer.schedule())
+
+@app.on_event("shutdown")
+def _save_candidate_index():
+    candidate_store.save_index()
+
+# near-duplicate uploads (same CV, different PDF) are linked to the pooled one or flagged
+dedup_policy = DedupPolicy.from_config()
+
+def _remember_candidate(key: str, content: str, parsed: dict, timings) -> dict | None:
+    """Pool an upload unless it near-duplicates a pooled CV and the policy is "link".
+
+    Returns the response's `duplicate_of` entry when a near-duplicate was found.
+    Writes to the candidate SQLite file: async handlers call it through asyncio.to_thread.
+    """
+    if key in candidate_store or not (auto_add_candidates or dedup_policy.enabled):
+        return None
+    fp = duplicate = None
+    if dedup_policy.enabled:
+        with timings.stage("dedup"):
+            fp = fingerprint(content)
+            hits = candidate_store.near_duplicates(fp) if fp is not None else []
+        if hits:
+            action = "linked" if dedup_policy.action == "link" else "flagged"
+            duplicate = {**hits[0], "action": action}
+            DUPLICATES.inc(action)
+            if action == "linked":
+                candidate_store.link(hits[0]["id"], key)
+                return duplicate
+    if auto_add_candidates:
+        candidate_store.add(key, parsed, fingerprint=fp, duplicate_of=duplicate and duplicate["id"])
+    return duplicate
+
+# evidence behind a score (matched keywords, date ranges, education keywords with offsets):
+# on request, or for a sampled share of scored CVs kept for GET /score/traces
+tracer = Tracer.from_config()
+
+async def _trace(score: dict, cv_data: dict, job_title: str, endpoint: str, wanted: bool, timings,
+           cv: dict | None = None, cache_key: str | None = None) -> dict | None:
+    """Build the trace of one scored CV if it was asked for or sampled; returned only when asked for.
+
+    `cv` is the parsed CV behind `cv_data` (its lines carry the offsets); with
+    only `cache_key`, it is looked up in the extraction cache once a trace is built.
+    """
+    sampled = not wanted and tracer.sample()
+    if not (wanted or sampled):
+        return None
+    with timings.stage("trace"):
+        if cv is None and cache_key is not None:
+            cached = await extraction_cache.aget(cache_key)
+            cv = cached["parsed"] if cached is not None else None
+        record = tracer.record({**explain(cv or {}, cv_data, job_title), "points": score["points"]},
+                               endpoint, sampled)
+    TRACES.inc("sampled" if sampled else "requested")
+    return record if wanted else None
 
 # serve static assets (custom swagger + ui assets)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# /ui and /openapi.json never change while the process runs: bytes + ETag
+OPENAPI_URL = "/openapi.json"
+ui_page = CachedBody.from_file("static/ui.html", "text/html; charset=utf-8")
+openapi_doc: CachedBody | None = None
+
+@app.on_event("startup")
+def _render_openapi():
+    global openapi_doc
+    openapi_doc = CachedBody(json.dumps(app.openapi(), ensure_ascii=False).encode("utf-8"), "application/json")
+
+@app.get(OPENAPI_URL, include_in_schema=False)
+async def openapi_json(request: Request):
+    if openapi_doc is None:  # app used without lifespan events
+        _render_openapi()
+    return openapi_doc.response(request)
+
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui_html():
     return get_swagger_ui_html(
-        openapi_url=app.openapi_url,
+        openapi_url=OPENAPI_URL,
         title=app.title + " - Docs",
         swagger_css_url="/static/custom-swagger.css?v=2",
     )
@@ -163,6 +202,151 @@ def apple_touch_icon2():
 def health():
     return {"status": "ok"}
 
+@app.get("/cache/stats", tags=["health"], summary="Çıkarım önbelleği isabet/ıska sayaçları")
+def cache_stats():
+    return extraction_cache.stats()
+
+@REGISTRY.collector
+def _runtime_metrics() -> list[str]:
+    out = [
+        "# TYPE cv_extraction_backend_calls_total counter",
+        *(f'cv_extraction_backend_calls_total{{backend="{name}",outcome="{o}"}} {st[o]}'
+          for name, st in BACKEND_STATS.snapshot().items() for o in ("ok", "rejected", "error")),
+        "# TYPE cv_extraction_backend_seconds_total counter",
+        *(f'cv_extraction_backend_seconds_total{{backend="{name}"}} {st["total_ms"] / 1000:.6f}'
+          for name, st in BACKEND_STATS.snapshot().items()),
+    ]
+    cs = extraction_cache.stats()
+    out += [
+        "# TYPE cv_cache_lookups_total counter",
+        f'cv_cache_lookups_total{{result="hit_memory"}} {cs["hits"]["memory"]}',
+        f'cv_cache_lookups_total{{result="hit_shared"}} {cs["hits"]["shared"]}',
+        f'cv_cache_lookups_total{{result="hit_disk"}} {cs["hits"]["disk"]}',
+        f'cv_cache_lookups_total{{result="miss"}} {cs["misses"]}',
+        "# TYPE cv_cache_entries gauge",
+        f"cv_cache_entries {cs['entries']}",
+        "# TYPE cv_extraction_inflight gauge",
+        f"cv_extraction_inflight {extraction_pool.inflight}",
+        "# TYPE cv_admission_queue_delay_ms gauge",
+        f"cv_admission_queue_delay_ms {admission.queue.standing_ms():.1f}",
+    ]
+    return out
+
+@app.get("/metrics", tags=["health"], summary="Prometheus metrikleri", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/admission/stats", tags=["health"], summary="İstemci başına hız sınırı, öncelik hatları ve yük atma durumu")
+def admission_stats():
+    return admission.stats()
+
+@app.get("/extraction/stats", tags=["health"], summary="PDF arka uçlarına göre çağrı/başarı/süre sayaçları")
+def extraction_stats():
+    return {
+        "backends": BACKEND_STATS.snapshot(),
+        "pool": {"workers": extraction_pool.workers, "capacity": extraction_pool.capacity,
+                 "inflight": extraction_pool.inflight},
+    }
+
+async def _process_upload(filename: str, upload, timings, lane: str = "interactive",
+                          ticket=None) -> tuple[str, str, dict]:
+    """Cache lookup, extraction and parsing for a spooled upload -> (key, text, parsed).
+
+    Shared by /upload and the /jobs workers; errors surface as HTTPException.
+    `ticket` (the request's admission) is settled with the real page count.
+    """
+    fname = (filename or "").lower()
+    key = upload.sha256
+    t0 = time.perf_counter()
+    cached = await extraction_cache.aget(key)
+    timings.add("cache", (time.perf_counter() - t0) * 1000, "miss" if cached is None else "hit")
+    if cached is not None:
+        admission.settle(ticket, admission.upload_cost(upload.size, 0))
+        return key, cached["text"], cached["parsed"]
+
+    content, parsed = "", None
+    if fname.endswith(".pdf"):
+        try:
+            t0 = time.perf_counter()
+            result = await extraction_pool.run(
+                extract_pdf, upload.source, upload_limits.max_pages, upload_limits.max_chars,
+                keep_free=admission.reserve(lane),
+            )
+            total_ms = (time.perf_counter() - t0) * 1000
+            BACKEND_STATS.record(result.attempts)
+            BACKEND_STATS.record_pages(result.backend, result.page_ms)
+            PAGES.inc(result.backend, amount=result.pages)
+            admission.settle(ticket, admission.upload_cost(upload.size, result.pages))
+            for name, ms, outcome in result.attempts:
+                timings.add(f"extract-{name}", ms, outcome)
+            queue_ms = max(0.0, total_ms - sum(a[1] for a in result.attempts))
+            admission.queue.observe(queue_ms)
+            timings.add("queue", queue_ms)
+            timings.add("extract", total_ms, result.backend)
+            content = result.text or ""
+            parsed = result.parsed
+        except QueueFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Sunucu yoğun, lütfen biraz sonra tekrar deneyin.",
+                headers={"Retry-After": str(extraction_pool.retry_after_s)},
+            )
+        except ExtractionTimeout:
+            raise HTTPException(status_code=504, detail="upload/parse error: PDF extraction timed out")
+        except ExtractionFailed as e:
+            BACKEND_STATS.record(e.attempts)
+            raise HTTPException(status_code=400, detail=f"upload/parse error: {e}")
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"upload/parse error: {e}")
+    else:
+        admission.settle(ticket, admission.upload_cost(upload.size, 0))
+        raw = upload.read_all()
+        try:
+            content = extract_text_from_bytes_or_txt(filename, raw) or ""
+        except Exception as e3:
+            try:
+                content = raw.decode("utf-8", errors="ignore")
+            except Exception:
+                raise HTTPException(status_code=400, detail=f"upload/parse error: {e3}")
+        if upload_limits.max_chars:
+            content = content[:upload_limits.max_chars]
+
+    if parsed is None:  # layout backends return the sections with the text
+        with timings.stage("parse"):
+            parsed = simple_parse_cv(content)
+    await extraction_cache.aput(key, {"text": content, "parsed": parsed})
+    return key, content, parsed
+
+def _upload_response(key: str, filename: str, content: str, parsed: dict, timings,
+                     duplicate_of: dict | None = None) -> dict:
+    with timings.stage("preview"):
+        preview = (content or "").replace("\r\n", "\n").replace("\r", "\n")
+        preview = "\n".join(line.strip() for line in preview.splitlines())
+        preview = preview[:1200]
+    out = {"id": key, "filename": filename, "chars": len(content), "preview": preview, "parsed": parsed}
+    if duplicate_of is not None:
+        out["duplicate_of"] = duplicate_of
+    return out
+
+async def _spool_checked(file: UploadFile, timings):
+    """Validate the extension and spool the body; 400 / 413 as HTTPException."""
+    fname = (file.filename or "").lower()
+    if not (fname.endswith(".pdf") or fname.endswith(".txt")):
+        raise HTTPException(
+            status_code=400,
+            detail="Sadece .pdf veya .txt dosyaları kabul edilir.",
+        )
+    try:
+        with timings.stage("read"):
+            upload = await spool_upload(file, upload_limits.max_bytes, upload_limits.mem_limit)
+        BYTES.inc("pdf" if fname.endswith(".pdf") else "txt", amount=upload.size)
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Dosya çok büyük (en fazla {upload_limits.max_bytes / (1 << 20):g} MB).",
+        )
+    return upload
+
 @app.post(
     "/upload",
     tags=["upload"],
@@ -173,6 +357,7 @@ def health():
             "content": {
                 "application/json": {
                     "example": {
+                        "id": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
                         "filename": "ozgecmis.pdf",
                         "chars": 12345,
                         "preview": "Ali Veli\nYazılım Mühendisi\n...",
@@ -189,122 +374,191 @@ def health():
             },
         },
         400: {"description": "Hatalı dosya veya desteklenmeyen format"},
+        413: {"description": "Dosya boyutu sınırı aşıldı"},
+        503: {"description": "Çıkarım kuyruğu dolu; Retry-After sonrası tekrar deneyin"},
+        504: {"description": "PDF çıkarımı zaman aşımına uğradı"},
     },
 )
-async def upload(file: UploadFile = File(...)):
+async def upload(request: Request, file: UploadFile = File(...)):
+    timings = timings_of(request)
     try:
-        fname = (file.filename or "").lower()
-        if not (fname.endswith(".pdf") or fname.endswith(".txt")):
-            raise HTTPException(
-                status_code=400,
-                detail="Sadece .pdf veya .txt dosyaları kabul edilir.",
+        upload = await _spool_checked(file, timings)
+        ticket = ticket_of(request)
+        try:
+            key, content, parsed = await _process_upload(
+                file.filename, upload, timings, ticket.lane if ticket else "interactive", ticket
             )
+        finally:
+            upload.cleanup()
+        duplicate = await asyncio.to_thread(_remember_candidate, key, content, parsed, timings)
+        return _upload_response(key, file.filename, content, parsed, timings, duplicate)
 
-        raw = await file.read()
-        content = ""
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"upload/parse error: {e}")
 
-        if fname.endswith(".pdf"):
-            try:
-                content = extract_text_from_pdf_fileobj(io.BytesIO(raw)) or ""
-            except Exception as e1:
-                try:
-                    from PyPDF2 import PdfReader  # type: ignore
-                    reader = PdfReader(io.BytesIO(raw))
-                    buf = []
-                    for page in reader.pages:
-                        try:
-                            buf.append(page.extract_text() or "")
-                        except Exception:
-                            continue
-                    content = "\n".join(buf)
-                    if not content.strip():
-                        raise RuntimeError("PyPDF2 fallback produced empty text")
-                except Exception as e2:
-                    raise HTTPException(status_code=400, detail=f"upload/parse error: {e1} | {e2}")
-        else:
-            try:
-                content = extract_text_from_bytes_or_txt(file.filename, raw) or ""
-            except Exception as e3:
-                try:
-                    content = raw.decode("utf-8", errors="ignore")
-                except Exception:
-                    raise HTTPException(status_code=400, detail=f"upload/parse error: {e3}")
+async def _run_upload_job(filename: str, upload) -> dict:
+    timings = Timings()
+    try:
+        key, content, parsed = await _process_upload(filename, upload, timings, "bulk")
+    except HTTPException as e:
+        if e.status_code == 503:
+            raise RetryLater(extraction_pool.retry_after_s)
+        raise
+    duplicate = await asyncio.to_thread(_remember_candidate, key, content, parsed, timings)
+    return _upload_response(key, filename, content, parsed, timings, duplicate)
 
-        preview = (content or "").replace("\r\n", "\n").replace("\r", "\n")
-        preview = "\n".join(line.strip() for line in preview.splitlines())
-        preview = preview[:1200]
+# POST /jobs queues uploads here; workers share the extraction pool with /upload
+job_runner = JobRunner.from_config(_run_upload_job)
 
-        parsed = simple_parse_cv(content)
+@app.on_event("startup")
+async def _start_job_runner():
+    job_runner.start()
 
-        return {"filename": file.filename, "chars": len(content), "preview": preview, "parsed": parsed}
+@app.on_event("shutdown")
+async def _stop_job_runner():
+    await job_runner.stop()
 
-    except HTTPException:
-        raise
+@app.post(
+    "/jobs",
+    tags=["upload"],
+    summary="CV yüklemesini kuyruğa al; sonuç GET /jobs/{job_id} ile alınır",
+    status_code=202,
+    responses={
+        400: {"description": "Hatalı dosya, format veya callback_url"},
+        413: {"description": "Dosya boyutu sınırı aşıldı"},
+        503: {"description": "İş kuyruğu dolu; Retry-After sonrası tekrar deneyin"},
+    },
+)
+async def jobs_submit(request: Request, file: UploadFile = File(...), callback_url: str | None = Form(None)):
+    timings = timings_of(request)
+    upload = await _spool_checked(file, timings)
+    try:
+        job = await job_runner.submit(file.filename, upload, callback_url or None)
+    except JobQueueFull:
+        upload.cleanup()
+        raise HTTPException(
+            status_code=503,
+            detail="İş kuyruğu dolu, lütfen biraz sonra tekrar deneyin.",
+            headers={"Retry-After": str(extraction_pool.retry_after_s)},
+        )
+    except ValueError as e:
+        upload.cleanup()
+        raise HTTPException(status_code=400, detail=f"job error: {e}")
+    return JSONResponse(job, status_code=202, headers={"Location": f"/jobs/{job['job_id']}"})
+
+@app.get("/jobs/stats", tags=["upload"], summary="İş kuyruğu doluluğu (hat başına bekleyen/çalışan)")
+def jobs_stats():
+    return job_runner.stats()
+
+@app.get("/jobs/{job_id}", tags=["upload"], summary="İş durumu ve bittiyse /upload ile aynı sonuç")
+def jobs_status(job_id: str):
+    job = job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+@app.post(
+    "/evaluate",
+    tags=["upload"],
+    summary="Yükle + ayrıştır + puanla tek istekte (dosya ya da önceki id ile)",
+    responses={
+        400: {"description": "Hatalı dosya, format veya ağırlık"},
+        404: {"description": "id önbellekte yok"},
+        413: {"description": "Dosya boyutu sınırı aşıldı"},
+        503: {"description": "Çıkarım kuyruğu dolu; Retry-After sonrası tekrar deneyin"},
+        504: {"description": "PDF çıkarımı zaman aşımına uğradı"},
+    },
+)
+async def evaluate(
+    request: Request,
+    file: UploadFile | None = File(None),
+    id: str | None = Form(None),
+    job_title: str = Form(""),
+    weights: str | None = Form(None),
+    trace: str | None = Form(None),
+):
+    """Dosya verilirse /upload yanıtı + `score` döner. Yalnızca `id` (önceki yanıttaki) verilirse
+    dosya yeniden gönderilmez; saklı özelliklerle yalnızca `{id, score}` döner.
+
+    Multipart yerine ham gövde de kabul edilir (ör. Content-Type: application/pdf):
+    dosya adı ve diğer alanlar o zaman sorgu parametresidir
+    (`?filename=cv.pdf&job_title=...&weights=...`); multipart ayrıştırma maliyeti olmaz.
+
+    `trace=1` ile `score.trace` puanın dayanaklarını (eşleşen anahtar kelimeler, sayılan
+    tarih aralıkları, eğitim düzeyini belirleyen kelime; karakter konumlarıyla) içerir."""
+    timings = timings_of(request)
+    ctype = request.headers.get("content-type", "")
+    raw_body = not ctype.startswith(("multipart/form-data", "application/x-www-form-urlencoded"))
+    if raw_body:
+        q = request.query_params
+        id, job_title, weights, trace = q.get("id"), q.get("job_title", ""), q.get("weights"), q.get("trace")
+        filename = q.get("filename") or ""
+    try:
+        w = _parse_weights(weights)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"upload/parse error: {e}")
+        raise HTTPException(status_code=400, detail=f"score error: {e}")
 
-def edu_level_from_text(education_lines: List[str]) -> str:
-    # Join and normalize
-    text = " \n".join(education_lines).lower()
-    # Common keywords (add Turkish variants)
-    has_phd = any(k in text for k in [
-        "phd", "ph.d", "doctorate", "doctoral", "dphil", "doktor", "doktora"
-    ])
-    has_master = any(k in text for k in [
-        "master", "msc", "m.sc", "m.s", "ms ", "yüksek lisans", "yuksek lisans", "tezli", "tezsiz"
-    ])
-    has_bachelor_kw = any(k in text for k in [
-        "bachelor", "bsc", "b.sc", "b.s ", "bs ", "licence", "license", "lisans", "undergraduate"
-    ])
-    has_university = any(k in text for k in [
-        "university", "üniversite", "universitesi", "faculty", "fakülte", "fakulte"
-    ])
-    has_high_school = any(k in text for k in [
-        "high school", "lise"
-    ])
-
-    # Decision: pick the highest available level
-    if has_phd:
-        return "phd"
-    if has_master:
-        return "master"
-    if has_bachelor_kw or has_university:
-        # If any hint of university exists, treat as bachelor minimum
-        return "bachelor"
-    if has_high_school:
-        return "high_school"
-    return "unknown"
-
-_months = {m.lower(): i for i,m in enumerate([
-    "", "Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"
-])}
-
-_date_pat = re.compile(r"(?P<mon>[A-Za-z]{3})\s*(?P<y>20\d{2}|19\d{2})", re.I)
-_year_pat = re.compile(r"(20\d{2}|19\d{2})")
-
-def exp_years_from_lines(exper_lines: List[str]) -> float:
-    """Very rough heuristic: parse date ranges like 'Jul 2024 - Sep 2024' or '2022-2024'."""
-    text = " \n".join(exper_lines)
-    total_months = 0
-    # pattern A: 'Jul 2024 - Sep 2024'
-    range_pat = re.compile(r"([A-Za-z]{3})\s*(20\d{2}|19\d{2})\s*[-–]\s*([A-Za-z]{3})\s*(20\d{2}|19\d{2})")
-    for m1,y1,m2,y2 in range_pat.findall(text):
-        m1i = _months.get(m1.lower(), 1)
-        m2i = _months.get(m2.lower(), 1)
-        months = (int(y2)-int(y1))*12 + (m2i-m1i)
-        if months > 0:
-            total_months += months
-    # pattern B: '2022 - 2024'
-    yr_range = re.compile(r"(20\d{2}|19\d{2})\s*[-–]\s*(20\d{2}|19\d{2})")
-    for y1,y2 in yr_range.findall(text):
-        months = (int(y2)-int(y1))*12
-        if months>0:
-            total_months += months
-    # Fallback: if nothing parsed but there are experience bullets, assume 0.2y per bullet
-    if total_months == 0 and exper_lines:
-        total_months = max(0, len([l for l in exper_lines if l])) * 2  # ~2 months each
-    return round(total_months/12.0, 1)
+    upload = None
+    if file is not None:
+        filename = file.filename
+        upload = await _spool_checked(file, timings)
+    elif raw_body and not id and filename:
+        fname = filename.lower()
+        if not (fname.endswith(".pdf") or fname.endswith(".txt")):
+            raise HTTPException(status_code=400, detail="Sadece .pdf veya .txt dosyaları kabul edilir.")
+        try:
+            with timings.stage("read"):
+                upload = await spool_stream(request.stream(), upload_limits.max_bytes, upload_limits.mem_limit)
+            BYTES.inc("pdf" if fname.endswith(".pdf") else "txt", amount=upload.size)
+        except UploadTooLarge:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Dosya çok büyük (en fazla {upload_limits.max_bytes / (1 << 20):g} MB).",
+            )
+
+    ticket = ticket_of(request)
+    if upload is not None:
+        try:
+            try:
+                key, content, parsed = await _process_upload(
+                    filename, upload, timings, ticket.lane if ticket else "interactive", ticket
+                )
+            finally:
+                upload.cleanup()
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"upload/parse error: {e}")
+        duplicate = await asyncio.to_thread(_remember_candidate, key, content, parsed, timings)
+        out = _upload_response(key, filename, content, parsed, timings, duplicate)
+        record = candidate_store.view(key)
+    elif id:
+        admission.settle(ticket, admission.costs["request"])  # nothing uploaded after all
+        key, out, parsed = id, {"id": id}, None
+        record = candidate_store.view(id)
+        if record is None:
+            cached = await extraction_cache.aget(id)
+            if cached is None:
+                raise HTTPException(status_code=404, detail="cv id not found")
+            parsed = cached["parsed"]
+    else:
+        raise HTTPException(status_code=400, detail="evaluate error: file or id is required")
 
+    try:
+        with timings.stage("features"):
+            cv_data = record if record is not None else features_from_parsed(parsed)
+        with timings.stage("score"):
+            out["score"] = score_features(cv_data, job_title, w)
+        evidence = await _trace(out["score"], cv_data, job_title, "/evaluate", requested(trace), timings, parsed, key)
+        if evidence is not None:
+            out["score"]["trace"] = evidence
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"score error: {e}")
+    # plain str/int/list payload: serialize directly, skipping jsonable_encoder's walk
+    with timings.stage("serialize"):
+        return ORJSONResponse(out)
 
 @app.post(
     "/score",
@@ -312,266 +566,310 @@ def exp_years_from_lines(exper_lines: List[str]) -> float:
     summary="Yapılandırılmış CV üzerinden otomatik puanlama",
     response_model=dict,
 )
-async def score(payload: dict = Body(...)):
+async def score(request: Request, payload: dict = Body(...)):
+    """`"trace": true` (ya da `?trace=1`) ile yanıtın `trace` alanı puanın dayanaklarını içerir:
+    eşleşen anahtar kelimeler, sayılan tarih aralıkları ve eğitim düzeyini belirleyen kelime
+    (karakter konumlarıyla). trace.sample_rate > 0 ise örneklenen istekler GET /score/traces'e düşer."""
+    timings = timings_of(request)
     try:
         # --- normalize input ---
-        if all(k in payload for k in ("skills", "experience_years", "education_level")):
-            cv_data = payload
-            job_title = payload.get("job_title") or ""
-            weights = payload.get("weights") or {"skills":0.5,"experience":0.3,"education":0.2}
-        else:
-            job_title = payload.get("job_title") or ""
-            weights = payload.get("weights") or {"skills":0.5,"experience":0.3,"education":0.2}
-            cv = payload.get("cv", {}) or {}
-            cv_data = {
-                "skills": cv.get("skills", []) or [],
-                "experience_years": exp_years_from_lines(cv.get("experience", []) or []),
-                "education_level": edu_level_from_text(cv.get("education", []) or []),
-            }
+        job_title = payload.get("job_title") or ""
+        weights = payload.get("weights") or default_weights()
+        with timings.stage("features"):
+            if has_features(payload):
+                cv, cv_data = {}, payload
+            else:
+                cv = payload.get("cv", {}) or {}
+                cv_data = features_from_parsed(cv)
+        with timings.stage("score"):
+            out = score_features(cv_data, job_title, weights)
+        evidence = await _trace(out, cv_data, job_title, "/score",
+                          requested(payload.get("trace") or request.query_params.get("trace")), timings, cv)
+        if evidence is not None:
+            out["trace"] = evidence
+        return out
 
-        ROLE_SKILLS = {
-            "data scientist": {
-                "must": {"python","pandas","numpy","sql"},
-                "nice": {"scikit-learn","ml","machine learning","statistics","probability","tensorflow","pytorch","power bi","tableau"},
-            },
-            "backend engineer": {
-                "must": {"python","java","go","node","sql","rest","api"},
-                "nice": {"django","fastapi","spring","microservices","docker","kubernetes","redis","rabbitmq"},
-            },
-            "business analyst": {
-                "must": {"excel","sql","report","analyst","analysis"},
-                "nice": {"power bi","tableau","requirements","documentation","stakeholder","process"},
-            },
-        }
-
-        user_skills = [s.strip().lower() for s in (cv_data.get("skills") or []) if isinstance(s, str)]
-        all_skill_text = " | ".join(user_skills)
-
-        profile = ROLE_SKILLS.get((job_title or "").lower(), ROLE_SKILLS["data scientist"])  # default
-
-        must_hits = sum(1 for k in profile["must"] if k in all_skill_text)
-        nice_hits = sum(1 for k in profile["nice"] if k in all_skill_text)
-        must_ratio = must_hits / max(1, len(profile["must"]))
-        sp = round(min(5, 3*must_ratio + min(2, 0.4*nice_hits)))
-        skills_reason = {
-            "must_required": sorted(list(profile["must"])),
-            "must_hits": must_hits,
-            "nice_hits": nice_hits,
-        }
-
-        years = float(cv_data.get("experience_years") or 0)
-        thresholds = [0, 0.5, 1, 2, 3, 4]
-        xp = next((i for i,t in enumerate(thresholds) if years < t), 5)
-        exp_reason = {"years_inferred": years, "thresholds": thresholds}
-
-        level = (cv_data.get("education_level") or "unknown").lower()
-        edu_map = {"high_school":1, "bachelor":3, "master":4, "phd":5, "unknown":2}
-        ep = edu_map.get(level, 2)
-        edu_reason = {"level": level, "map": edu_map}
-
-        total_15 = int(sp + xp + ep)
-        weighted_100 = round(100*(sp/5*weights["skills"] + xp/5*weights["experience"] + ep/5*weights["education"]))
-
-        return {
-            "job_title": job_title or "(unspecified)",
-            "scale": {"per_dimension": 5, "total": 15, "weighted_total": 100, "weights": weights},
-            "points": {
-                "skills_points": sp,
-                "experience_points": xp,
-                "education_points": ep,
-                "total": total_15,
-                "weighted": weighted_100,
-            },
-            "reasons": {
-                "skills": skills_reason,
-                "experience": exp_reason,
-                "education": edu_reason,
-            },
-        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"score error: {e}")
+
+@app.get("/score/traces", tags=["score"], summary="Örneklenen puanlama izleri (en yeni önce) ve sayaçlar")
+def score_traces(limit: int = 20):
+    return {"stats": tracer.stats(), "traces": tracer.recent(limit)}
 
+@app.post(
+    "/score/roles",
+    tags=["score"],
+    summary="Tek CV'yi tüm (ya da seçili) rollere karşı puanla; role uygunluk sıralaması",
+    response_model=dict,
+)
+async def score_roles_endpoint(request: Request, payload: dict = Body(..., examples=[{
+    "weights": {"skills": 0.5, "experience": 0.3, "education": 0.2},
+    "roles": ["data scientist", "backend engineer"],
+    "cv": {"skills": ["Python", "SQL", "Docker"], "experience": ["Jan 2022 - Jan 2024"], "education": ["MSc"]},
+}])):
+    timings = timings_of(request)
+    try:
+        weights = payload.get("weights") or default_weights()
+        with timings.stage("features"):
+            cv_data = payload if has_features(payload) else features_from_parsed(payload.get("cv", {}) or {})
+        with timings.stage("score"):
+            return score_roles(cv_data, weights, payload.get("roles"))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"score error: {e}")
 
-@app.get("/ui", response_class=HTMLResponse, tags=["upload"], summary="Custom UI for CV upload")
-async def ui():
-    html_content = """
-<!DOCTYPE html>
-<html lang="tr">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1" />
-  <title>CV Upload - CV Evaluation Engine</title>
-  <style>
-    :root{ --bg1:#6a11cb; --bg2:#2575fc; --ink:#0f172a; --paper:#ffffff; --accent:#00c2ff; --accent2:#ff6ec7; }
-    html,body{height:100%}
-    body{ margin:0; font-family:-apple-system,BlinkMacSystemFont,"Segoe UI",Roboto,Helvetica,Arial; background:linear-gradient(135deg,var(--bg1),var(--bg2)); color:var(--ink);} 
-    .container{ max-width:820px; margin:48px auto; padding:0 20px; }
-    h1{ color:#fff; text-align:center; }
-    .card{ background:rgba(255,255,255,.96); border-radius:16px; padding:28px; box-shadow:0 12px 30px rgba(2,6,23,.18);} 
-    .row{ display:flex; gap:12px; align-items:center; flex-wrap:wrap; }
-    input[type=file]{ display:block; padding:10px; background:#f8fafc; border:1px solid rgba(15,23,42,.15); border-radius:10px; }
-    button{ appearance:none; border:none; background:linear-gradient(135deg,var(--accent),var(--accent2)); color:#fff; padding:12px 18px; border-radius:999px; font-weight:600; box-shadow:0 8px 20px rgba(0,0,0,.2); cursor:pointer; }
-    button:hover{ transform:translateY(-1px); }
-    .result{ margin-top:20px; background:#0b1220; color:#e5e7eb; border-radius:12px; padding:16px; overflow:auto; max-height:50vh; }
-    #scorebox{ margin-top:20px; background:#0b1220; color:#e5e7eb; border-radius:12px; padding:16px; overflow:auto; max-height:50vh; }
-    pre{ white-space:pre-wrap; word-break:break-word; margin:0; }
-    .button-group{ display:flex; gap:12px; align-items:center; }
-    #file-name{ margin-left:6px; }
-    #change-file-btn{ appearance:none; border:none; background:#e2e8f0; color:#0f172a; padding:10px 14px; border-radius:999px; font-weight:600; cursor:pointer; }
-    #change-file-btn:hover{ filter:brightness(0.98); }
-  </style>
-</head>
-<body>
-  <div class="container">
-    <h1>CV Evaluation Engine</h1>
-    <div class="card">
-      <form id="upload-form" class="row" action="/upload" method="post" enctype="multipart/form-data" target="upload_result">
-        <input id="file" name="file" type="file" accept=".pdf,.txt" required />
-        <span id="file-name" style="color:#334155; font-size:14px;"></span>
-        <button id="change-file-btn" type="button" style="display:none;">Dosyayı Değiştir</button>
-        <button id="upload-btn" type="submit">Yükle ve Önizle</button>
-      </form>
-      <div class="row" style="margin-top:12px; align-items:center;">
-        <label for="job" style="color:#0f172a; font-weight:600;">İş Pozisyonu:</label>
-        <select id="job" name="job" style="flex-grow:1; padding:8px; border-radius:8px; border:1px solid #ccc;">
-          <option value="Data Scientist">Data Scientist</option>
-          <option value="Backend Engineer">Backend Engineer</option>
-          <option value="Business Analyst">Business Analyst</option>
-        </select>
-        <button id="score-btn" type="button">Skorla</button>
-      </div>
-      <div id="out" class="result" style="display:none;">
-        <pre id="json"></pre>
-      </div>
-      <div id="scorebox" style="display:block;">
-        <pre id="scorejson">Skor burada görünecek. Önce "Yükle ve Önizle" yapın, sonra "Skorla" butonuna basın.</pre>
-      </div>
-      <!-- No-JS fallback output area -->
-      <div style="margin-top:16px;">
-        <iframe name="upload_result" id="upload_result" style="width:100%;height:280px;border:1px solid #0b1220;border-radius:12px;background:#0b1220;color:#e5e7eb;"></iframe>
-      </div>
-    </div>
-  </div>
-  <script>
-    // --- Grab elements (script is at end of body, DOM is ready) ---
-    const form = document.getElementById('upload-form');
-    const fileInput = document.getElementById('file');
-    const out = document.getElementById('out');
-    const pre = document.getElementById('json');
-    const scoreBtn = document.getElementById('score-btn');
-    const jobSelect = document.getElementById('job');
-    const scoreBox = document.getElementById('scorebox');
-    const scorePre = document.getElementById('scorejson');
-    const fileNameLbl = document.getElementById('file-name');
-    const changeFileBtn = document.getElementById('change-file-btn');
-    const uploadBtn = document.getElementById('upload-btn');
-
-    scoreBox.style.display = 'block';
-
-    document.getElementById('upload_result').style.display = 'none';
-
-    let lastUploadResult = null;
-
-    function showErrorInline(msg){
-      out.style.display = 'block';
-      pre.textContent = String(msg || 'Bilinmeyen hata');
-    }
+def _ndjson_line(obj) -> bytes:
+    return orjson.dumps(obj) + b"\n"
 
-    function lockFileInput(file){
-      if(!file) return;
-      fileInput.disabled = true;
-      changeFileBtn.style.display = 'inline-block';
-      fileNameLbl.textContent = 'Seçilen: ' + file.name;
-    }
-    function unlockFileInput(){
-      fileInput.disabled = false;
-      changeFileBtn.style.display = 'none';
-      fileInput.value = '';
-      fileNameLbl.textContent = '';
-    }
-    changeFileBtn.addEventListener('click', function(){
-      unlockFileInput();
-      out.style.display = 'none';
-      scoreBox.style.display = 'none';
-    });
-
-    async function performUpload(){
-      try{
-        const f = fileInput.files[0];
-        out.style.display = 'block';
-        if(!f){ pre.textContent='Lütfen dosya seçin.'; return; }
-        pre.textContent = 'Yükleniyor...';
-        const fd = new FormData();
-        fd.append('file', f);
-        const resp = await fetch('/upload', { method: 'POST', body: fd });
-        const text = await resp.text();
-        let j; try { j = JSON.parse(text); } catch(err) { j = {detail:text}; }
-        if(!resp.ok){ pre.textContent = j.detail || text; lastUploadResult=null; return; }
-        lastUploadResult = j; lockFileInput(f);
-        if(j && j.parsed){
-          const p = j.parsed;
-          const sample = ((j && j.preview) ? String(j.preview) : '').slice(0,200).split('\\n').join(' ');
-          pre.textContent = (
-            'Dosya: ' + j.filename + ' | Karakter: ' + j.chars + '\\n' +
-            'İsim: ' + (p.name||'-') + ' | Email: ' + (p.email||'-') + ' | Tel: ' + (p.phone||'-') + '\\n' +
-            'Skills: ' + ((p.skills||[]).slice(0,8).join(', ')) + ((p.skills||[]).length>8?' ...':'') + '\\n' +
-            'Experience entries: ' + ((p.experience||[]).length) + ' | Education entries: ' + ((p.education||[]).length) + '\\n' +
-            'Önizleme: ' + sample + (((j.preview||'').length>200)?' ...':'')
-          );
-        } else {
-          pre.textContent = JSON.stringify(j,null,2);
-        }
-      }catch(e){ showErrorInline(e && e.message ? e.message : e); }
+@app.post(
+    "/score/batch",
+    tags=["score"],
+    summary="Çok sayıda CV'yi tek iş pozisyonu için puanla ve sırala (NDJSON)",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Ağırlıklı puana göre azalan sırada, satır başına bir aday",
+            "content": {"application/x-ndjson": {"example":
+                '{"rank":1,"index":3,"id":"9f86d0...","name":"Ali Veli","points":{"skills_points":4,"experience_points":5,"education_points":4,"total":13,"weighted":86}}\n'
+            }},
+        },
+        400: {"description": "Hatalı istek veya bilinmeyen CV id"},
+    },
+)
+async def score_batch_endpoint(request: Request, payload: dict = Body(..., examples=[{
+    "job_title": "Data Scientist",
+    "weights": {"skills": 0.5, "experience": 0.3, "education": 0.2},
+    "top_k": 50,
+    "cvs": [{"id": "aday-1", "cv": {"skills": ["Python", "SQL"], "experience": ["Jan 2022 - Jan 2024"], "education": ["MSc"]}}],
+    "ids": ["<POST /upload yanıtındaki id>"],
+}])):
+    timings = timings_of(request)
+    try:
+        job_title = payload.get("job_title") or ""
+        weights = payload.get("weights") or default_weights()
+        top_k = payload.get("top_k")
+        top_k = int(top_k) if top_k is not None else None
+
+        t0 = time.perf_counter()
+        ids, names, feats = [], [], []
+        for item in payload.get("cvs") or []:
+            cv = item.get("cv") if "cv" in item else item
+            ids.append(item.get("id"))
+            names.append((cv or {}).get("name"))
+            feats.append(cv or {})
+        missing = []
+        for cid in payload.get("ids") or []:
+            cached = await extraction_cache.aget(cid)
+            if cached is None:
+                missing.append(cid)
+                continue
+            ids.append(cid)
+            names.append(cached["parsed"].get("name"))
+            feats.append(cached["parsed"])
+        if missing:
+            raise ValueError(f"unknown cv ids: {', '.join(missing)}")
+        admission.settle(ticket_of(request), admission.items_cost(len(feats)))
+        cvs, feats = feats, features_batch(feats)
+        timings.add("features", (time.perf_counter() - t0) * 1000, f"{len(feats)} cvs")
+
+        with timings.stage("score"):
+            cols = score_batch(feats, job_title, weights)
+        with timings.stage("rank"):
+            order = rank_order(cols["weighted"], top_k)
+        wanted = requested(payload.get("trace"))
+        picked = () if wanted else tracer.sample_many(len(feats))
+        if len(picked):
+            with timings.stage("trace", f"{len(picked)} sampled"):
+                for i in picked.tolist():
+                    _batch_trace(i, cvs, feats, cols, job_title, True)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"score error: {e}")
+
+    def lines():
+        for rank, i in enumerate(order, 1):
+            line = {
+                "rank": rank,
+                "index": int(i),
+                "id": ids[i],
+                "name": names[i],
+                "points": _batch_points(cols, i),
+            }
+            if wanted:
+                line["trace"] = _batch_trace(i, cvs, feats, cols, job_title, False)
+            yield _ndjson_line(line)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+_POINT_KEYS = ("skills_points", "experience_points", "education_points", "total", "weighted")
+
+def _batch_points(cols: dict, i: int) -> dict:
+    return {k: int(cols[k][i]) for k in _POINT_KEYS}
+
+def _batch_trace(i: int, cvs: list, feats: list, cols: dict, job_title: str, sampled: bool) -> dict:
+    cv = {} if has_features(cvs[i]) else cvs[i]
+    record = tracer.record({**explain(cv, feats[i], job_title), "points": _batch_points(cols, i)},
+                           "/score/batch", sampled)
+    TRACES.inc("sampled" if sampled else "requested")
+    return record
+
+def _parse_weights(raw: str | None) -> dict:
+    """`skills:0.5,experience:0.3,education:0.2` or a JSON object; missing keys use defaults."""
+    weights = default_weights()
+    if not raw:
+        return weights
+    if raw.lstrip().startswith("{"):
+        given = json.loads(raw)
+    else:
+        given = {}
+        for part in raw.split(","):
+            k, _, v = part.partition(":")
+            given[k.strip()] = v
+    for k, v in given.items():
+        if k not in weights:
+            raise ValueError(f"unknown weight: {k}")
+        weights[k] = float(v)
+    return weights
+
+@app.post(
+    "/candidates",
+    tags=["candidates"],
+    summary="Ayrıştırılmış CV'yi aday havuzuna ekle (özellikler bir kez hesaplanır)",
+    responses={400: {"description": "Hatalı istek veya bilinmeyen upload id"}},
+)
+def candidates_add(payload: dict = Body(..., examples=[{
+    "id": "aday-1",
+    "cv": {"name": "Ali Veli", "skills": ["Python", "SQL"], "experience": ["Jan 2022 - Jan 2024"], "education": ["MSc"]},
+}])):
+    cid = payload.get("id")
+    cv = payload.get("cv")
+    fp = None
+    if cv is None and cid:
+        cached = extraction_cache.get(cid)
+        if cached is None:
+            raise HTTPException(status_code=400, detail=f"candidate error: unknown cv id: {cid}")
+        cv = cached["parsed"]
+        fp = fingerprint(cached["text"])  # the text is known: later uploads can be matched to it
+    if not cid or not isinstance(cv, dict):
+        raise HTTPException(status_code=400, detail="candidate error: id and cv are required")
+    return candidate_store.add(str(cid), cv, fingerprint=fp)
+
+@app.get("/candidates/rank", tags=["candidates"], summary="Tüm havuzu iş pozisyonu ve ağırlıklara göre sırala")
+def candidates_rank(request: Request, job_title: str = "", weights: str | None = None, top_k: int | None = 50):
+    timings = timings_of(request)
+    try:
+        w = _parse_weights(weights)
+        with timings.stage("rank", f"{len(candidate_store)} candidates"):
+            results = candidate_store.rank(job_title, w, top_k)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"rank error: {e}")
+    return {"job_title": job_title or "(unspecified)", "weights": w, "pool": len(candidate_store), "results": results}
+
+def _csv_param(raw: str | None) -> list[str]:
+    return [p.strip() for p in (raw or "").split(",") if p.strip()]
+
+@app.get("/candidates/search", tags=["candidates"], summary="Beceri / deneyim / eğitim filtresiyle aday ara ve sırala")
+def candidates_search(
+    request: Request,
+    skills: str | None = None,
+    any_skills: str | None = None,
+    min_years: float | None = None,
+    min_education: str | None = None,
+    job_title: str = "",
+    weights: str | None = None,
+    top_k: int | None = 50,
+):
+    """`skills=python,sql` hepsini, `any_skills=spark,hadoop` en az birini ister;
+    `min_education=master` master ve üstünü kabul eder. Eşleşenler job_title için sıralanır."""
+    timings = timings_of(request)
+    try:
+        w = _parse_weights(weights)
+        with timings.stage("search"):
+            ids = candidate_store.search(_csv_param(skills), _csv_param(any_skills), min_years,
+                                         (min_education or "").lower() or None)
+        with timings.stage("rank", f"{len(ids)} matches"):
+            results = candidate_store.rank(job_title, w, top_k, ids=ids)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"search error: {e}")
+    return {"job_title": job_title or "(unspecified)", "weights": w, "pool": len(candidate_store),
+            "matches": len(ids), "results": results}
+
+@app.get("/candidates/rescore", tags=["candidates"], summary="Yapılandırma değişikliği sonrası yeniden puanlama durumu")
+def candidates_rescore():
+    table = candidate_store.table()
+    return {
+        "config_version": profiles.current().version,
+        "table_version": table.version,
+        "table_digest": table.digest,
+        "pool": len(candidate_store),
+        "rescore": candidate_store.rescorer.status(),
     }
 
-    async function performScore(){
-      try{
-        out.style.display = 'block';
-        if(!lastUploadResult || !lastUploadResult.parsed){
-          scorePre.textContent = 'Lütfen önce bir CV yükleyin ve önizleyin.';
-          scoreBox.style.display = 'block';
-          return;
-        }
-        const payload = {
-          job_title: jobSelect.value,
-          weights: {skills:0.5, experience:0.3, education:0.2},
-          cv: lastUploadResult.parsed
-        };
-        scorePre.textContent = 'Skorlama yapılıyor...';
-        scoreBox.style.display = 'block';
-        const resp = await fetch('/score', { method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(payload)});
-        const text = await resp.text();
-        let data; try{ data = JSON.parse(text); }catch(err){ data = {detail:text}; }
-        if(!resp.ok){ scorePre.textContent = (data.detail||text); return; }
-        var p = data.points||{}, sc=data.scale||{}, reasons=data.reasons||{};
-        var skillsHits = (reasons.skills && reasons.skills.must_hits) ? reasons.skills.must_hits : 0;
-        var niceHits = (reasons.skills && reasons.skills.nice_hits) ? reasons.skills.nice_hits : 0;
-        var yearsInf = (reasons.experience && reasons.experience.years_inferred!=null) ? reasons.experience.years_inferred : '-';
-        var eduLevel = (reasons.education && reasons.education.level) ? reasons.education.level : '-';
-        scorePre.textContent = (
-          'Job: ' + (data.job_title||'') + '\\n' +
-          'Total: ' + (p.total||0) + '/' + (sc.total||15) + '  (Weighted: ' + (p.weighted||0) + '/' + (sc.weighted_total||100) + ')\\n' +
-          'Skills: ' + (p.skills_points||0) + '/' + (sc.per_dimension||5) + '  | must_hits=' + skillsHits + ' nice_hits=' + niceHits + '\\n' +
-          'Experience: ' + (p.experience_points||0) + '/' + (sc.per_dimension||5) + '  | years~' + yearsInf + '\\n' +
-          'Education: ' + (p.education_points||0) + '/' + (sc.per_dimension||5) + '  | level=' + eduLevel
-        );
-      }catch(e){ showErrorInline(e && e.message ? e.message : e); }
+@app.get("/candidates/{cid}", tags=["candidates"], summary="Adayın saklanan özellikleri")
+def candidates_get(cid: str):
+    record = candidate_store.view(cid)
+    if record is None:
+        raise HTTPException(status_code=404, detail="candidate not found")
+    return record
+
+@app.delete("/candidates/{cid}", tags=["candidates"], summary="Adayı havuzdan çıkar")
+def candidates_delete(cid: str):
+    if not candidate_store.remove(cid):
+        raise HTTPException(status_code=404, detail="candidate not found")
+    return {"deleted": cid}
+
+@app.post(
+    "/ingest",
+    tags=["ingest"],
+    summary="Sunucudaki klasör/ZIP için toplu işleme başlat",
+    status_code=202,
+    responses={
+        400: {"description": "Geçersiz kaynak"},
+        403: {"description": "Yol ingest.allowed_roots dışında"},
+    },
+)
+def ingest_start(payload: dict = Body(..., examples=[{
+    "source": "data/samples",
+    "output": "data/ingest/results.jsonl",
+    "workers": 0,
+    "retry_errors": False,
+}])):
+    source = payload.get("source") or ""
+    output = payload.get("output") or ""
+    if not source or not output:
+        raise HTTPException(status_code=400, detail="ingest error: source and output are required")
+    try:
+        job = ingest.start_job(source, output, payload.get("workers"), bool(payload.get("retry_errors")))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=f"ingest error: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"ingest error: {e}")
+    return job.snapshot()
+
+@app.get("/ingest/{job_id}", tags=["ingest"], summary="Toplu işleme ilerlemesi")
+def ingest_status(job_id: str):
+    job = ingest.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="ingest job not found")
+    return job.snapshot()
+
+@app.get("/admin/config", tags=["admin"], summary="Aktif puanlama yapılandırması")
+def admin_config():
+    cfg = profiles.current()
+    return {
+        "version": cfg.version,
+        "digest": cfg.digest,
+        "default_role": cfg.default_role,
+        "roles": {name: {"must": sorted(p.must), "nice": sorted(p.nice)} for name, p in cfg.roles.items()},
+        "keywords": cfg.matcher.size,
     }
 
-    // Ensure form submit uses AJAX and never reloads the page
-    form.addEventListener('submit', function(e){
-      console.log('submit trigger');
-      e.preventDefault();
-      performUpload();
-    });
-
-    // Primary bindings
-    if(scoreBtn) scoreBtn.addEventListener('click', performScore);
-
-    // Show any JS error on the page
-    window.addEventListener('error', function(evt){ try{ showErrorInline('JS Hatası: ' + evt.message); }catch(err){} });
-  </script>
-</body>
-</html>
-"""
-    return HTMLResponse(content=html_content, status_code=200)
\ No newline at end of file
+@app.post("/admin/reload", tags=["admin"], summary="config.yaml'ı yeniden yükle (yeniden başlatmadan)")
+def admin_reload():
+    try:
+        cfg = profiles.reload()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"config error: {e}")
+    return {"version": cfg.version, "digest": cfg.digest, "roles": sorted(cfg.roles)}
+
+@app.get("/ui", response_class=HTMLResponse, tags=["upload"], summary="Custom UI for CV upload")
+async def ui(request: Request):
+    return ui_page.response(request)
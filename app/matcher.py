@@ -0,0 +1,78 @@
+from collections import deque
+from typing import Iterable, Iterator
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton over lowercase keyword surface forms.
+
+    Built once from (surface, canonical) pairs; `find` walks the text a single
+    time and reports every occurrence whose both ends fall on a word boundary,
+    so "go" does not fire inside "google" nor "api" inside "rapid". Cost per
+    call is linear in the text length plus the number of matches, independent
+    of how many keywords the automaton holds.
+    """
+
+    __slots__ = ("_goto", "_fail", "_out", "size")
+
+    def __init__(self, patterns: Iterable[tuple[str, str]]):
+        goto: list[dict[str, int]] = [{}]
+        out: list[tuple[tuple[int, str], ...]] = [()]
+        seen = set()
+        for surface, canonical in patterns:
+            surface = (surface or "").strip().lower()
+            if not surface or (surface, canonical) in seen:
+                continue
+            seen.add((surface, canonical))
+            node = 0
+            for ch in surface:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                node = nxt
+            out[node] = out[node] + ((len(surface), canonical),)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            r = queue.popleft()
+            for ch, s in goto[r].items():
+                queue.append(s)
+                f = fail[r]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[s] = goto[f].get(ch, 0)
+                out[s] = out[s] + out[fail[s]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        self.size = len(seen)
+
+    def find(self, text: str) -> Iterator[tuple[int, int, str]]:
+        """Yield (start, end, canonical) for word-bounded matches in lowercase `text`."""
+        goto, fail, out = self._goto, self._fail, self._out
+        n = len(text)
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            right_ok = i + 1 == n or not _is_word(text[i + 1])
+            if not right_ok:
+                continue
+            for length, canonical in out[node]:
+                start = i - length + 1
+                if start == 0 or not _is_word(text[start - 1]):
+                    yield start, i + 1, canonical
+
+    def matches(self, text: str) -> set[str]:
+        return {c for _, _, c in self.find(text)}
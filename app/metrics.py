@@ -0,0 +1,179 @@
+"""Minimal Prometheus text-format metrics plus per-request stage timings.
+
+No client library: counters and histograms are plain dicts keyed by label
+tuples under one lock, rendered on scrape. `MetricsMiddleware` is a raw ASGI
+middleware that times every request, labels it by route template and emits
+the stages an endpoint recorded as a `Server-Timing` header.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_: str, labels: tuple = ()):
+        self.name, self.help, self.labelnames = name, help_, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, v in sorted(self._values.items()):
+                out.append(f"{self.name}{_labels(self.labelnames, labels)} {v:g}")
+        return out
+
+
+class Histogram:
+    def __init__(self, name: str, help_: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help_, labels
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for labels, row in sorted(self._values.items()):
+                acc = 0
+                for b, c in zip(self.buckets, row):
+                    acc += c
+                    out.append(f"{self.name}_bucket{_labels(names, labels + (f'{b:g}',))} {acc}")
+                out.append(f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {row[-1]}")
+                out.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {row[-2]:.6f}")
+                out.append(f"{self.name}_count{_labels(self.labelnames, labels)} {row[-1]}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list = []  # callables returning exposition lines at scrape time
+
+    def counter(self, name, help_, labels=()) -> Counter:
+        m = Counter(name, help_, labels)
+        self._metrics.append(m)
+        return m
+
+    def histogram(self, name, help_, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        m = Histogram(name, help_, labels, buckets)
+        self._metrics.append(m)
+        return m
+
+    def collector(self, fn):
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for m in self._metrics:
+            lines += m.render()
+        for fn in self._collectors:
+            lines += fn()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+REQUESTS = REGISTRY.counter("cv_http_requests_total", "HTTP requests", ("route", "method", "status"))
+LATENCY = REGISTRY.histogram("cv_http_request_duration_seconds", "HTTP request latency", ("route", "method"))
+STAGES = REGISTRY.histogram("cv_stage_duration_seconds", "Per-stage latency inside a request", ("route", "stage"))
+PAGES = REGISTRY.counter("cv_pdf_pages_total", "PDF pages extracted", ("backend",))
+BYTES = REGISTRY.counter("cv_upload_bytes_total", "Upload bytes received", ("kind",))
+DUPLICATES = REGISTRY.counter("cv_duplicate_uploads_total", "Uploads found to near-duplicate a pooled CV", ("action",))
+ADMISSION = REGISTRY.counter("cv_admission_total", "Metered requests by lane and admission outcome", ("lane", "outcome"))
+TRACES = REGISTRY.counter("cv_score_traces_total", "Scoring evidence traces built", ("kind",))
+
+
+class Timings:
+    """Stages recorded by an endpoint; rendered as Server-Timing by the middleware."""
+
+    __slots__ = ("stages",)
+
+    def __init__(self):
+        self.stages: list[tuple[str, float, str | None]] = []
+
+    def add(self, name: str, ms: float, desc: str | None = None) -> None:
+        self.stages.append((name, ms, desc))
+
+    @contextmanager
+    def stage(self, name: str, desc: str | None = None):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - t0) * 1000, desc)
+
+    def header(self, total_ms: float) -> str:
+        parts = []
+        for name, ms, desc in self.stages:
+            parts.append(f'{name};dur={ms:.2f}' + (f';desc="{desc}"' if desc else ""))
+        parts.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(parts)
+
+
+def timings_of(request) -> Timings:
+    """Timings for the current request (a throwaway one outside the middleware)."""
+    t = getattr(request.state, "timings", None)
+    return t if t is not None else Timings()
+
+
+class MetricsMiddleware:
+    def __init__(self, app, registry: Registry = REGISTRY):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timings = Timings()
+        scope.setdefault("state", {})["timings"] = timings
+        t0 = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header((time.perf_counter() - t0) * 1000).encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            elapsed = time.perf_counter() - t0
+            REQUESTS.inc(route, scope["method"], status)
+            LATENCY.observe(elapsed, route, scope["method"])
+            for name, ms, _ in timings.stages:
+                STAGES.observe(ms / 1000, route, name)
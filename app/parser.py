@@ -0,0 +1,85 @@
+import re
+
+EMAIL_RE = re.compile(r"[\w\.-]+@[\w\.-]+\.[A-Za-z]{2,}", re.I)
+PHONE_RE = re.compile(r"(\+?\d[\d\s\-()]{7,}\d)")
+LETTER_RE = re.compile(r"[A-Za-zğüşöçıİĞÜŞÖÇ]")
+# one named group per section; the matching group name is the section key. Lines
+# are matched as written, case-insensitively, so Turkish upper case ("SKİLLS") is a
+# header too; lowercasing first would turn İ into i + combining dot and miss it
+HEADER_RE = re.compile(
+    r"^(?:(?P<skills>skills?)"
+    r"|(?P<education>education)"
+    r"|(?P<experience>experiences?|work\s+experience)"
+    r"|(?P<projects>projects)"
+    r"|(?P<certificates>certificates?)"
+    r"|(?P<languages>languages)"
+    r"|(?P<other>summary|objective))\b[\s:]*$",
+    re.I,
+)
+_HEADER_FIRST = frozenset("sepcwloSEPCWLO")  # cheap pre-check before HEADER_RE
+SKILL_SPLIT_RE = re.compile(r"[,;•·\u2022\u25CF]")
+HEADER_WORDS = frozenset({
+    "summary","objective","skills","skill","education","experience","experiences",
+    "work experience","projects","certificates","languages",
+})
+_BLOCK_SECTIONS = ("education", "experience")
+
+
+def simple_parse_cv(text: str) -> dict:
+    """Single pass over the lines: contact fields, name and sections together.
+
+    Email and phone are taken from the first line that contains them, the name
+    is the first line with letters that is neither contact info nor a header.
+    Education/experience lines are folded into paragraphs at blank lines.
+    """
+    email = phone = name = ""
+    need_email = need_phone = need_name = pending = True
+    current = None
+    block = None  # open paragraph of the current education/experience section
+    skills: list[str] = []
+    blocks: dict[str, list[str]] = {k: [] for k in _BLOCK_SECTIONS}
+    open_block: dict[str, list[str]] = {k: [] for k in _BLOCK_SECTIONS}
+
+    for ln in text.splitlines():
+        ln = ln.strip()
+        if pending:
+            if need_email:
+                m = EMAIL_RE.search(ln)
+                if m:
+                    email, need_email = m.group(0), False
+            if need_phone:
+                m = PHONE_RE.search(ln)
+                if m:
+                    phone, need_phone = m.group(0), False
+            if need_name and ln:
+                if not ((email and email in ln) or (phone and phone in ln)) \
+                        and ln.lower().strip(':') not in HEADER_WORDS and LETTER_RE.search(ln):
+                    name, need_name = ln, False
+            pending = need_email or need_phone or need_name
+
+        h = HEADER_RE.match(ln) if ln[:1] in _HEADER_FIRST else None
+        if h:
+            current = h.lastgroup if h.lastgroup != "other" else ln.lower().strip(':')
+            block = open_block.get(current)
+            continue
+        if block is not None:
+            if ln:
+                block.append(ln)
+            elif block:
+                blocks[current].append(" ".join(block))
+                block.clear()
+        elif current == "skills":
+            skills.extend(s.strip() for s in SKILL_SPLIT_RE.split(ln) if len(s.strip()) > 1)
+
+    for key, rest in open_block.items():
+        if rest:
+            blocks[key].append(" ".join(rest))
+
+    return {
+        "name": name,
+        "email": email,
+        "phone": phone,
+        "skills": skills,
+        "education": blocks["education"],
+        "experience": blocks["experience"],
+    }
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.settings import config_section
+
+DEFAULTS = {"workers": 2, "max_queue": 8, "timeout_s": 30, "retry_after_s": 5, "prestart": True}
+
+log = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when running + queued jobs already reach the pool's capacity."""
+
+
+class ExtractionTimeout(Exception):
+    """Raised when a job does not finish within `timeout_s`."""
+
+
+def _init_worker(pids, initializer) -> None:
+    """Runs first in every worker: report the pid (so a hung worker can be
+    killed without reaching into the executor), then the user initializer."""
+    pids.put(os.getpid())
+    if initializer is not None:
+        initializer()
+
+
+class ExtractionPool:
+    """Bounded process pool for CPU-heavy extraction, awaited from the event loop.
+
+    Capacity is `workers + max_queue` jobs. A job still waiting in the
+    executor when `timeout_s` runs out is cancelled. One already handed to a
+    worker (a PDF that hangs a library) cannot be interrupted there, so the
+    worker processes are killed and the pool is rebuilt; the other jobs that
+    were pending on the killed pool run again on the new one, within what is
+    left of their own timeout, if the pool still has room for them.
+
+    Workers report their pid from the initializer; those are the processes
+    killed on a recycle.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 8, timeout_s: float = 30,
+                 retry_after_s: int = 5, prestart: bool = True, initializer=None):
+        self.workers = int(workers) or (os.cpu_count() or 1)
+        self.max_queue = max(0, int(max_queue))
+        self.timeout_s = float(timeout_s)
+        self.retry_after_s = int(retry_after_s)
+        self.prestart = bool(prestart)
+        self.initializer = initializer
+        self._executor: ProcessPoolExecutor | None = None
+        self._inflight = 0
+        self._recycled = weakref.WeakSet()  # executors killed after a timeout
+        self._pids = weakref.WeakKeyDictionary()  # executor -> SimpleQueue of its worker pids
+
+    @classmethod
+    def from_config(cls, initializer=None) -> "ExtractionPool":
+        cfg = config_section("extraction", DEFAULTS)
+        return cls(cfg["workers"], cfg["max_queue"], cfg["timeout_s"], cfg["retry_after_s"],
+                   cfg["prestart"], initializer)
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def start(self) -> None:
+        if self._executor is None:
+            ctx = multiprocessing.get_context("spawn")
+            pids = ctx.SimpleQueue()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(pids, self.initializer),
+            )
+            self._pids[self._executor] = pids
+            if self.prestart:
+                # workers are spawned on demand; one no-op per worker boots them
+                # (and runs the initializer) now instead of inside the first
+                # uploads. Spawning blocks, so it happens off the event loop;
+                # the no-ops are not counted against capacity.
+                threading.Thread(target=self._boot_workers, args=(self._executor,),
+                                 name="extraction-prestart", daemon=True).start()
+
+    def _boot_workers(self, executor: ProcessPoolExecutor) -> None:
+        try:
+            for _ in range(self.workers):
+                executor.submit(os.getpid)
+        except RuntimeError:  # shut down meanwhile
+            pass
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _release(self) -> None:
+        self._inflight -= 1
+
+    def _recycle(self, executor: ProcessPoolExecutor) -> None:
+        """Kill the workers of `executor` (a job in it overran its timeout) and
+        let the next submit start a fresh pool. Every job still pending in it,
+        running or queued, fails with BrokenProcessPool, and the done
+        callbacks release their slots."""
+        if executor is self._executor:
+            self._executor = None
+        self._recycled.add(executor)
+        procs = self._workers_of(executor)
+        if not procs:
+            log.warning("no worker of the timed-out extraction pool reported its pid; "
+                        "a hung worker may keep running")
+        for proc in procs:
+            try:
+                proc.kill()
+            except (OSError, ValueError):  # already gone
+                pass
+        executor.shutdown(wait=False)
+
+    def _workers_of(self, executor: ProcessPoolExecutor) -> list:
+        """Live worker processes of `executor`, from the pids its initializer reported.
+
+        Matched against our own live children, so a pid the OS has already
+        reused for an unrelated process is never killed."""
+        queue = self._pids.pop(executor, None)
+        pids = set()
+        while queue is not None and not queue.empty():
+            pids.add(queue.get())
+        return [p for p in multiprocessing.active_children() if p.pid in pids]
+
+    def _submit(self, fn, args, loop: asyncio.AbstractEventLoop):
+        self.start()
+        executor = self._executor
+        try:
+            cfut = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # a worker died (e.g. OOM on a hostile PDF); rebuild and retry once
+            self.shutdown()
+            self.start()
+            executor = self._executor
+            cfut = executor.submit(fn, *args)
+        self._inflight += 1
+
+        def _done(_):
+            try:
+                loop.call_soon_threadsafe(self._release)
+            except RuntimeError:  # loop already closed during shutdown
+                pass
+
+        cfut.add_done_callback(_done)
+        return executor, cfut
+
+    async def run(self, fn, *args, keep_free: int = 0):
+        """Run `fn(*args)` in a worker; `keep_free` slots of the capacity are left
+        to other callers (lower-priority work passes the interactive reserve)."""
+        if self._inflight >= self.capacity - keep_free:
+            raise QueueFull()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout_s
+        executor, cfut = self._submit(fn, args, loop)
+        while True:
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(cfut), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                if not cfut.cancel():  # already running: only killing its worker stops it
+                    self._recycle(executor)
+                raise ExtractionTimeout()
+            except BrokenProcessPool:
+                if executor not in self._recycled:
+                    raise
+                # killed because another job on the same pool overran: run again
+                # on the new pool, within what is left of this job's timeout. Its
+                # old slot is already released (the done callback was queued on
+                # the loop before this task's wakeup), so admit it like a new job.
+                if self._inflight >= self.capacity - keep_free:
+                    raise QueueFull()
+                executor, cfut = self._submit(fn, args, loop)
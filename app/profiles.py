@@ -0,0 +1,250 @@
+"""Scoring configuration loaded from config.yaml into immutable, precompiled form.
+
+`current()` is the only read path: it returns the active ScoringConfig, a
+single reference that `reload()` replaces atomically. Request handlers grab it
+once and use that snapshot throughout, so they never take a lock and never
+see half of an old and half of a new profile set.
+
+With several worker processes, a reload also publishes the config source
+and its version through app.shared; every other worker notices the newer
+version on its next `current()` (one read of a mapped counter) and compiles
+the same source, so /admin/reload reaches all of them and they agree on the
+version number.
+"""
+import hashlib
+import logging
+import os
+import threading
+from types import MappingProxyType
+from typing import NamedTuple
+
+import numpy as np
+
+from app import shared
+from app.matcher import SkillMatcher
+from app.settings import CONFIG_PATH, parse_yaml
+
+log = logging.getLogger(__name__)
+
+
+EXPERIENCE_LEVELS = 6  # scoring.experience_thresholds entries
+
+
+class RoleProfile(NamedTuple):
+    must: frozenset
+    nice: frozenset
+    must_required: tuple  # sorted, echoed in reasons
+
+
+class ScoringConfig(NamedTuple):
+    version: int
+    digest: str
+    default_role: str
+    weights: MappingProxyType
+    thresholds: tuple
+    thresholds_arr: np.ndarray
+    edu_points: MappingProxyType
+    roles: MappingProxyType  # name -> RoleProfile
+    aliases: MappingProxyType  # keyword -> tuple of surface forms
+    matcher: SkillMatcher
+    skill_whitelist: frozenset
+    education_map: MappingProxyType
+    skill_per_item: int
+    experience_per_year: float
+    reload_interval_s: float
+
+    def profile(self, job_title: str) -> RoleProfile:
+        return self.roles.get((job_title or "").lower(), self.roles[self.default_role])
+
+
+def _words(items) -> frozenset:
+    return frozenset(str(x).strip().lower() for x in (items or []) if str(x).strip())
+
+
+def compile_config(raw: dict, version: int = 1, digest: str = "") -> ScoringConfig:
+    """Validate the `scoring` block of a parsed config.yaml and precompute everything."""
+    sc = raw.get("scoring") or {}
+    roles_raw = sc.get("roles") or {}
+    if not roles_raw:
+        raise ValueError("scoring.roles is empty")
+    roles = {}
+    for name, p in roles_raw.items():
+        must, nice = _words((p or {}).get("must")), _words((p or {}).get("nice"))
+        roles[str(name).strip().lower()] = RoleProfile(must, nice, tuple(sorted(must)))
+    default_role = str(sc.get("default_role") or next(iter(roles))).lower()
+    if default_role not in roles:
+        raise ValueError(f"scoring.default_role '{default_role}' is not a configured role")
+
+    weights = {k: float(v) for k, v in (sc.get("weights") or {}).items()}
+    missing = {"skills", "experience", "education"} - set(weights)
+    if missing:
+        raise ValueError(f"scoring.weights missing: {', '.join(sorted(missing))}")
+
+    # experience points are the number of thresholds at or below the years, capped
+    # at 5 in score_features and points_from_columns alike; the count is fixed so
+    # an edited list cannot quietly change the scale
+    thresholds = tuple(sc.get("experience_thresholds") or ())
+    thresholds_arr = np.asarray(thresholds, dtype=np.float64)
+    if len(thresholds) != EXPERIENCE_LEVELS or (np.diff(thresholds_arr) < 0).any():
+        raise ValueError(f"scoring.experience_thresholds must be {EXPERIENCE_LEVELS} ascending numbers")
+    thresholds_arr.setflags(write=False)
+
+    aliases = {str(k).lower(): tuple(sorted(_words(v))) for k, v in (sc.get("aliases") or {}).items()}
+    keywords = set().union(*(p.must | p.nice for p in roles.values()))
+    pairs = [(k, k) for k in keywords]
+    pairs += [(a, k) for k in keywords for a in aliases.get(k, ())]
+
+    legacy = raw.get("thresholds") or {}
+    return ScoringConfig(
+        version=version,
+        digest=digest,
+        default_role=default_role,
+        weights=MappingProxyType(weights),
+        thresholds=thresholds,
+        thresholds_arr=thresholds_arr,
+        edu_points=MappingProxyType({str(k).lower(): int(v) for k, v in (sc.get("education_points") or {}).items()}),
+        roles=MappingProxyType(roles),
+        aliases=MappingProxyType(aliases),
+        matcher=SkillMatcher(pairs),
+        skill_whitelist=_words(sc.get("skill_whitelist")),
+        education_map=MappingProxyType({str(k).lower(): int(v) for k, v in (sc.get("education_map") or {}).items()}),
+        skill_per_item=int(legacy.get("skill_per_item", 5)),
+        experience_per_year=float(legacy.get("experience_per_year", 3)),
+        reload_interval_s=float(sc.get("reload_interval_s") or 0),
+    )
+
+
+_current: ScoringConfig | None = None
+_reload_lock = threading.Lock()
+_config_path = CONFIG_PATH
+_listeners: list = []
+_doc: shared.SharedDoc | None = None  # set up by the first reload()
+_doc_ready = False
+_skip = 0  # shared version that could not be adopted
+
+
+def subscribe(fn) -> None:
+    """Call `fn(cfg)` after every config swap (from the reloading thread)."""
+    _listeners.append(fn)
+
+
+def _load(path: str) -> tuple[bytes, str]:
+    with open(path, "rb") as fh:
+        data = fh.read()
+    return data, hashlib.sha256(data).hexdigest()[:12]
+
+
+def _read(path: str) -> tuple[dict, str]:
+    data, digest = _load(path)
+    return parse_yaml(data), digest
+
+
+def _shared_doc() -> shared.SharedDoc | None:
+    global _doc, _doc_ready
+    if not _doc_ready:
+        _doc_ready = True
+        try:
+            _doc = shared.SharedDoc.from_config("profiles")
+        except (OSError, ValueError):
+            log.warning("shared config version unavailable; this worker reloads on its own", exc_info=True)
+    return _doc
+
+
+def detach() -> None:
+    """Stop following configs published by other workers (benchmarks that swap `_current` by hand)."""
+    global _doc, _doc_ready
+    _doc, _doc_ready = None, True
+
+
+def _notify(cfg: ScoringConfig) -> None:
+    for fn in _listeners:
+        try:
+            fn(cfg)
+        except Exception:
+            log.exception("scoring config listener failed")
+
+
+def reload(path: str | None = None) -> ScoringConfig:
+    """Recompile from disk and swap in. On error the active config stays in place."""
+    global _current, _config_path
+    with _reload_lock:
+        path = path or _config_path
+        data, digest = _load(path)
+        if _current is not None and digest == _current.digest and path == _config_path:
+            return _current
+        cfg = compile_config(parse_yaml(data), (_current.version + 1) if _current else 1, digest)
+        doc = _shared_doc()
+        if doc is not None:
+            try:
+                cfg = cfg._replace(version=doc.publish(data, digest, cfg.version))
+            except OSError:
+                log.warning("could not publish scoring config to other workers", exc_info=True)
+        _config_path = path
+        _current = cfg
+        log.info("scoring config v%s loaded (%s, %d roles)", cfg.version, digest, len(cfg.roles))
+    _notify(cfg)
+    return cfg
+
+
+def _adopt(seen: ScoringConfig) -> ScoringConfig:
+    """Switch to the config another worker published."""
+    global _current, _skip
+    with _reload_lock:
+        if _current is not seen:
+            return _current
+        published = _doc.read()
+        try:
+            if published is None:
+                raise ValueError("published config missing")
+            version, digest, data = published
+            cfg = seen._replace(version=version) if digest == seen.digest else compile_config(parse_yaml(data), version, digest)
+        except ValueError:
+            _skip = _doc.version()
+            log.exception("could not adopt shared scoring config v%s; keeping v%s", _skip, seen.version)
+            return seen
+        _current = cfg
+        log.info("scoring config v%s adopted from another worker (%s)", cfg.version, cfg.digest)
+    if cfg.digest != seen.digest:
+        _notify(cfg)
+    return cfg
+
+
+def current() -> ScoringConfig:
+    cfg = _current
+    if cfg is None:
+        return reload()
+    if _doc is not None and _doc.version() not in (cfg.version, _skip):
+        return _adopt(cfg)
+    return cfg
+
+
+class ConfigWatcher:
+    """Polls the config file's mtime and reloads on change."""
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.interval_s <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        last = None
+        while not self._stop.wait(self.interval_s):
+            try:
+                mtime = os.stat(_config_path).st_mtime_ns
+            except OSError:
+                continue
+            if last is not None and mtime != last:
+                try:
+                    reload()
+                except Exception:
+                    log.exception("scoring config reload failed; keeping v%s", current().version)
+            last = mtime
@@ -0,0 +1,201 @@
+"""Incremental re-scoring of the candidate pool after a scoring-config change.
+
+A config change touches stored candidates in one of two ways:
+
+- points only (experience thresholds, education points, default weights):
+  no candidate's keyword hits change; the score table is re-labelled with the
+  new config and points follow from the same columns;
+- keywords (a role's must/nice list, aliases, roles added or removed): only
+  candidates whose skills contain one of the changed keywords can get
+  different hits. `config_delta` separates keywords that start or stop
+  matching at all (those candidates are re-matched from their skills) from
+  keywords that only moved between roles (the stored matched set is reused
+  and just the role hits are recounted). `affected_ids` resolves both through
+  the skill index (posting lists of the old matched keywords, plus the pool's
+  distinct skill strings run through a matcher of just the new forms) instead
+  of scanning every record.
+
+`Rescorer` re-matches the affected candidates on a background thread in
+chunks, then writes just those and swaps in a new ScoreTable under the store
+lock. The other records are left as they are: the store marks their config
+digest as still holding (CandidateStore.moved_to), with the roles added or
+removed by the change resolved when they are read. Until the swap,
+rank/search keep reading the previous table and the config it was built
+with, so a request never mixes two versions.
+"""
+import logging
+import threading
+import time
+from typing import NamedTuple
+
+from app.index import union
+from app.matcher import SkillMatcher
+from app.profiles import ScoringConfig, current
+from app.scorer import matched_keywords, role_hits
+
+log = logging.getLogger(__name__)
+
+
+class ConfigDelta(NamedTuple):
+    keywords: frozenset       # canonical keywords losing a surface form (matched sets may shrink)
+    surfaces: tuple           # (surface, canonical) pairs the new matcher has and the old lacks
+    members: frozenset        # keywords matched as before whose role membership changed
+    roles_added: tuple
+    roles_removed: tuple
+
+    @property
+    def points_only(self) -> bool:
+        return not (self.keywords or self.surfaces or self.members or self.roles_added or self.roles_removed)
+
+
+def _pairs(cfg: ScoringConfig) -> set[tuple[str, str]]:
+    keywords = set().union(*(p.must | p.nice for p in cfg.roles.values()))
+    return {(k, k) for k in keywords} | {(a, k) for k in keywords for a in cfg.aliases.get(k, ())}
+
+
+def config_delta(old: ScoringConfig, new: ScoringConfig) -> ConfigDelta:
+    old_pairs, new_pairs = _pairs(old), _pairs(new)
+    members = set()
+    for role, b in new.roles.items():
+        a = old.roles.get(role)
+        members |= (b.must | b.nice) if a is None else (a.must ^ b.must) | (a.nice ^ b.nice)
+    # a removed role's hits are simply dropped; its keywords matter only if they leave the config
+    return ConfigDelta(
+        frozenset(k for _, k in old_pairs - new_pairs),
+        tuple(sorted(new_pairs - old_pairs)),
+        frozenset(members),
+        tuple(sorted(set(new.roles) - set(old.roles))),
+        tuple(sorted(set(old.roles) - set(new.roles))),
+    )
+
+
+def affected_ids(index, keywords=(), surfaces=()) -> list[str]:
+    """Live candidates that matched one of `keywords` under the old config or
+    have a skill containing one of the (surface, canonical) `surfaces`.
+
+    `index` must describe the pool under the old config (its `matched` terms).
+    """
+    terms = {f"skill:{k}" for k in keywords}
+    if surfaces:
+        matcher = SkillMatcher(surfaces)
+        terms.update(t for t in index.terms("skill:") if matcher.matches(t[6:]))
+    docs = union([index.postings(t) for t in terms])
+    return [cid for cid in index.candidate_ids(docs) if index.docs.get(cid) is not None]
+
+
+class Rescorer:
+    """Background, chunked move of a CandidateStore to the active config."""
+
+    def __init__(self, store, chunk_size: int = 2000):
+        self.store = store
+        self.chunk_size = max(1, int(chunk_size))
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pending = False
+        self._status = {"state": "idle", "runs": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def schedule(self) -> bool:
+        """Start a run towards current() unless one is going; a run in progress
+        re-checks the config when it finishes. Returns True if a thread started."""
+        with self._lock:
+            if self._thread is not None:
+                self._pending = True
+                return False
+            self._thread = threading.Thread(target=self._loop, name="rescore", daemon=True)
+            self._thread.start()
+            return True
+
+    def status(self) -> dict:
+        with self._lock:
+            return {**self._status, "pending": self._pending}
+
+    def _set(self, **kw) -> None:
+        with self._lock:
+            self._status.update(kw)
+
+    def _loop(self) -> None:
+        try:
+            while True:
+                try:
+                    self.run(current())
+                except Exception:
+                    log.exception("candidate re-scoring failed")
+                    self._set(state="failed")
+                with self._lock:
+                    if not self._pending:
+                        self._thread = None
+                        return
+                    self._pending = False
+        except BaseException:
+            with self._lock:
+                self._thread = None
+            raise
+
+    def run(self, cfg: ScoringConfig) -> None:
+        """Bring the store's records, index and score table to `cfg` (blocking)."""
+        store = self.store
+        table = store._table
+        if table is None or table.digest == cfg.digest:
+            return
+        t0 = time.perf_counter()
+        old = table.cfg
+        delta = config_delta(old, cfg)
+        if store.index.digest == old.digest:
+            rematch = set(affected_ids(store.index, delta.keywords, delta.surfaces))
+            ids = list(rematch.union(affected_ids(store.index, delta.members)))
+        else:  # index does not describe the old matches: no way to narrow down
+            ids = list(store._records)
+            rematch = set(ids)
+        self._set(state="matching", from_version=old.version, to_version=cfg.version,
+                  affected=len(ids), rematch=len(rematch), done=0, pool=len(store),
+                  started_at=time.time(), points_only=delta.points_only)
+
+        # 1) re-match affected candidates from their stored skills (or only
+        #    recount role hits from their matched set), lock-free
+        staged: dict[str, tuple[dict, list, dict]] = {}
+        for start in range(0, len(ids), self.chunk_size):
+            for cid in ids[start:start + self.chunk_size]:
+                record = store._records.get(cid)
+                if record is None:
+                    continue
+                if cid in rematch:
+                    matched = matched_keywords(record["skills"], cfg)
+                else:
+                    matched = set(record["matched"])
+                hits = {role: list(h) for role, h in role_hits(matched, cfg).items()}
+                staged[cid] = (record, sorted(matched), hits)
+            self._set(done=min(len(ids), start + self.chunk_size))
+            time.sleep(0)  # let request threads in between chunks
+
+        # 2) swap: affected records, index and table move together; the rest
+        #    keep their digest, which the store now trusts under cfg
+        self._set(state="swapping")
+        with store._lock:
+            changed, reindex = {}, []
+            for cid, (record, matched, hits) in staged.items():
+                if store._records.get(cid) is not record:
+                    continue  # replaced or removed meanwhile; that write already used cfg
+                if matched != record["matched"]:
+                    reindex.append(record)
+                record["matched"], record["role_hits"], record["digest"] = matched, hits, cfg.digest
+                changed[cid] = record
+            store._persist(list(changed.values()))
+            store.moved_to(old, cfg)
+            if store.index.digest == old.digest:
+                for record in reindex:
+                    store.index.add(record)
+                store.index.digest = cfg.digest
+            else:
+                store.index = store._rebuild_index(cfg)
+            store._table = store._table_for(cfg, changed)
+        elapsed = (time.perf_counter() - t0) * 1000
+        log.info("candidates re-scored v%s -> v%s: %d of %d updated in %.0f ms",
+                 old.version, cfg.version, len(changed), len(store), elapsed)
+        with self._lock:
+            self._status.update(state="idle", updated=len(changed), duration_ms=round(elapsed, 1),
+                                finished_at=time.time(), version=cfg.version)
+            self._status["runs"] += 1
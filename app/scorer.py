@@ -1,18 +1,17 @@
-from app.models import CVParsed, ScoreBreakdown
+from bisect import bisect_right
 
-SKILL_WHITELIST = {
-    "python","sql","pandas","numpy","scikit-learn",
-    "pytorch","tensorflow","fastapi","flask","django",
-    "docker","kubernetes","aws","gcp","azure",
-}
+import numpy as np
 
-EDUCATION_MAP = {"phd":20, "msc":16, "bsc":12, "bootcamp":8, "other":5}
+from app.features import edu_level_from_text, exp_months_batch, exp_years_from_lines
+from app.models import CVParsed, ScoreBreakdown
+from app.profiles import RoleProfile, ScoringConfig, current
 
 def score_cv(parsed: CVParsed) -> ScoreBreakdown:
-    found = [s for s in parsed.skills if s.lower() in SKILL_WHITELIST]
-    skills_points = min(len(found), 10) * 5
-    exp_points    = min(int(round(parsed.experience_years * 3)), 30)
-    edu_points    = EDUCATION_MAP.get((parsed.education_level or "other").lower(), 5)
+    cfg = current()
+    found = [s for s in parsed.skills if s.lower() in cfg.skill_whitelist]
+    skills_points = min(len(found), 10) * cfg.skill_per_item
+    exp_points    = min(int(round(parsed.experience_years * cfg.experience_per_year)), 30)
+    edu_points    = cfg.education_map.get((parsed.education_level or "other").lower(), 5)
     total = skills_points + exp_points + edu_points
     return ScoreBreakdown(
         skills_points=skills_points,
@@ -20,3 +19,225 @@ def score_cv(parsed: CVParsed) -> ScoreBreakdown:
         education_points=edu_points,
         total=total,
     )
+
+
+# --- role-based scoring used by /score and /score/batch ---------------------
+
+def get_profile(job_title: str) -> RoleProfile:
+    return current().profile(job_title)
+
+
+def default_weights() -> dict:
+    return dict(current().weights)
+
+
+FEATURE_KEYS = ("skills", "experience_years", "education_level")
+
+
+def has_features(cv: dict) -> bool:
+    return all(k in cv for k in FEATURE_KEYS)
+
+
+def features_from_parsed(cv: dict) -> dict:
+    return {
+        "skills": cv.get("skills", []) or [],
+        "experience_years": exp_years_from_lines(cv.get("experience", []) or []),
+        "education_level": edu_level_from_text(cv.get("education", []) or []),
+    }
+
+
+def cv_features(cv: dict) -> dict:
+    """Accept either precomputed features or a parsed CV (as returned by /upload)."""
+    return cv if has_features(cv) else features_from_parsed(cv)
+
+
+def features_batch(cvs: list[dict]) -> list[dict]:
+    """cv_features for many CVs; experience months of parsed ones in one batch."""
+    out = list(cvs)
+    todo = [i for i, cv in enumerate(cvs) if not has_features(cv)]
+    months = exp_months_batch([cvs[i].get("experience", []) or [] for i in todo])
+    for i, m in zip(todo, months.tolist()):
+        cv = cvs[i]
+        out[i] = {
+            "skills": cv.get("skills", []) or [],
+            "experience_years": round(m/12.0, 1),
+            "education_level": edu_level_from_text(cv.get("education", []) or []),
+        }
+    return out
+
+
+def skill_text(skills: list) -> str:
+    user_skills = [s.strip().lower() for s in (skills or []) if isinstance(s, str)]
+    return " | ".join(user_skills)
+
+
+def matched_keywords(skills: list, cfg: ScoringConfig | None = None) -> set[str]:
+    """Canonical role keywords present in `skills` (one pass, word-bounded)."""
+    return (cfg or current()).matcher.matches(skill_text(skills))
+
+
+def role_hits(matched: set[str], cfg: ScoringConfig | None = None) -> dict[str, tuple[int, int]]:
+    """(must_hits, nice_hits) for every role from one matched-keyword set."""
+    return {name: (len(matched & p.must), len(matched & p.nice)) for name, p in (cfg or current()).roles.items()}
+
+
+def score_features(cv_data: dict, job_title: str, weights: dict) -> dict:
+    cfg = current()
+    profile = cfg.profile(job_title)
+
+    matched = matched_keywords(cv_data.get("skills"), cfg)
+    must_matched = sorted(matched & profile.must)
+    nice_matched = sorted(matched & profile.nice)
+    must_hits, nice_hits = len(must_matched), len(nice_matched)
+    must_ratio = must_hits / max(1, len(profile.must))
+    sp = round(min(5, 3*must_ratio + min(2, 0.4*nice_hits)))
+    skills_reason = {
+        "must_required": profile.must_required,
+        "must_hits": must_hits,
+        "nice_hits": nice_hits,
+        "must_matched": must_matched,
+        "nice_matched": nice_matched,
+    }
+
+    years = float(cv_data.get("experience_years") or 0)
+    xp = min(bisect_right(cfg.thresholds, years), 5)  # same as points_from_columns
+    exp_reason = {"years_inferred": years, "thresholds": cfg.thresholds}
+
+    level = (cv_data.get("education_level") or "unknown").lower()
+    ep = cfg.edu_points.get(level, 2)
+    edu_reason = {"level": level, "map": dict(cfg.edu_points)}
+
+    total_15 = int(sp + xp + ep)
+    weighted_100 = round(100*(sp/5*weights["skills"] + xp/5*weights["experience"] + ep/5*weights["education"]))
+
+    return {
+        "job_title": job_title or "(unspecified)",
+        "scale": {"per_dimension": 5, "total": 15, "weighted_total": 100, "weights": weights},
+        "points": {
+            "skills_points": sp,
+            "experience_points": xp,
+            "education_points": ep,
+            "total": total_15,
+            "weighted": weighted_100,
+        },
+        "reasons": {
+            "skills": skills_reason,
+            "experience": exp_reason,
+            "education": edu_reason,
+        },
+    }
+
+
+def score_batch(cvs: list, job_title: str, weights: dict) -> dict:
+    """Vectorized counterpart of score_features over many CVs for one role.
+
+    Returns column arrays (skills/experience/education/total/weighted points,
+    must/nice hits) aligned with `cvs`; values match score_features exactly.
+    """
+    cfg = current()
+    profile = cfg.profile(job_title)
+    n = len(cvs)
+    must = np.empty(n, dtype=np.int64)
+    nice = np.empty(n, dtype=np.int64)
+    years = np.empty(n, dtype=np.float64)
+    ep = np.empty(n, dtype=np.int64)
+    for i, cv_data in enumerate(cvs):
+        matched = matched_keywords(cv_data.get("skills"), cfg)
+        must[i], nice[i] = len(matched & profile.must), len(matched & profile.nice)
+        years[i] = float(cv_data.get("experience_years") or 0)
+        ep[i] = cfg.edu_points.get((cv_data.get("education_level") or "unknown").lower(), 2)
+
+    return points_from_columns(must, nice, years, ep, len(profile.must), cfg, weights)
+
+
+def points_from_columns(must: np.ndarray, nice: np.ndarray, years: np.ndarray, ep: np.ndarray,
+                        must_total, cfg: ScoringConfig, weights: dict) -> dict:
+    """Points for precomputed columns (must/nice hits, years, education points).
+
+    `must_total` is the role's must-list size, or an array of sizes aligned with
+    the columns when each row is scored against a different role.
+    """
+    must_ratio = must / np.maximum(1, must_total)
+    sp = np.rint(np.minimum(5, 3*must_ratio + np.minimum(2, 0.4*nice))).astype(np.int64)
+    xp = np.minimum(np.searchsorted(cfg.thresholds_arr, years, side="right"), 5)
+    weighted = np.rint(100*(sp/5*weights["skills"] + xp/5*weights["experience"] + ep/5*weights["education"])).astype(np.int64)
+    return {
+        "skills_points": sp,
+        "experience_points": xp,
+        "education_points": ep,
+        "total": sp + xp + ep,
+        "weighted": weighted,
+        "must_hits": must,
+        "nice_hits": nice,
+        "years": years,
+    }
+
+
+def score_roles(cv_data: dict, weights: dict, roles: list[str] | None = None) -> dict:
+    """Score one CV against every configured role (or `roles`) from one feature pass.
+
+    Keywords are matched once; each role only contributes its must/nice
+    intersection. Points per role equal score_features for that job_title.
+    """
+    cfg = current()
+    names = [r.strip().lower() for r in roles] if roles else list(cfg.roles)
+    unknown = [r for r in names if r not in cfg.roles]
+    if unknown:
+        raise ValueError(f"unknown roles: {', '.join(unknown)}")
+    if not names:
+        raise ValueError("no roles to score")
+
+    matched = matched_keywords(cv_data.get("skills"), cfg)
+    years = float(cv_data.get("experience_years") or 0)
+    level = (cv_data.get("education_level") or "unknown").lower()
+    n = len(names)
+    profiles = [cfg.roles[r] for r in names]
+    must_matched = [sorted(matched & p.must) for p in profiles]
+    nice_matched = [sorted(matched & p.nice) for p in profiles]
+    points = points_from_columns(
+        np.fromiter(map(len, must_matched), dtype=np.int64, count=n),
+        np.fromiter(map(len, nice_matched), dtype=np.int64, count=n),
+        np.full(n, years),
+        np.full(n, cfg.edu_points.get(level, 2), dtype=np.int64),
+        np.fromiter((len(p.must) for p in profiles), dtype=np.int64, count=n),
+        cfg, weights,
+    )
+    keys = ("skills_points", "experience_points", "education_points", "total", "weighted")
+    results = [
+        {
+            "rank": rank,
+            "role": names[i],
+            "points": {k: int(points[k][i]) for k in keys},
+            "skills": {
+                "must_required": profiles[i].must_required,
+                "must_hits": len(must_matched[i]),
+                "nice_hits": len(nice_matched[i]),
+                "must_matched": must_matched[i],
+                "nice_matched": nice_matched[i],
+            },
+        }
+        for rank, i in enumerate(rank_order(points["weighted"]), 1)
+    ]
+    return {
+        "scale": {"per_dimension": 5, "total": 15, "weighted_total": 100, "weights": weights},
+        "best_role": results[0]["role"],
+        "roles": results,
+        "reasons": {
+            "experience": {"years_inferred": years, "thresholds": cfg.thresholds},
+            "education": {"level": level, "map": dict(cfg.edu_points)},
+            "matched_keywords": sorted(matched),
+        },
+    }
+
+
+def rank_order(weighted: np.ndarray, top_k: int | None = None) -> np.ndarray:
+    """Indices by descending weighted score; ties keep input order."""
+    n = len(weighted)
+    if top_k is not None and 0 < top_k < n:
+        cut = np.argpartition(-weighted, top_k - 1)[:top_k]
+        # argpartition is unstable; widen to every index tied with the k-th score
+        kth = weighted[cut].min()
+        cand = np.flatnonzero(weighted >= kth)
+        order = cand[np.argsort(-weighted[cand], kind="stable")]
+        return order[:top_k]
+    return np.argsort(-weighted, kind="stable")
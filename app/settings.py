@@ -0,0 +1,37 @@
+import os
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml: ~10x faster than the pure-Python loader
+except ImportError:
+    from yaml import SafeLoader
+
+CONFIG_PATH = os.environ.get(
+    "CV_EVAL_CONFIG", os.path.join(os.path.dirname(__file__), "config.yaml")
+)
+
+# every module reads its section at import time; parse the file once per version
+_parsed: dict[str, tuple[tuple, dict]] = {}
+
+def parse_yaml(data) -> dict:
+    return yaml.load(data, Loader=SafeLoader) or {}
+
+def load_config(path: str = CONFIG_PATH) -> dict:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    stamp = (st.st_mtime_ns, st.st_size)
+    hit = _parsed.get(path)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    with open(path, encoding="utf-8") as fh:
+        raw = parse_yaml(fh)
+    _parsed[path] = (stamp, raw)
+    return raw
+
+def config_section(name: str, defaults: dict, path: str = CONFIG_PATH) -> dict:
+    """Return `defaults` overlaid with the `name` block of config.yaml."""
+    out = dict(defaults)
+    out.update(load_config(path).get(name) or {})
+    return out
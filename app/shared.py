@@ -0,0 +1,417 @@
+"""Host-wide state shared by the worker processes of one deployment.
+
+With `uvicorn --workers N` every process would otherwise keep its own
+extraction cache, role config and candidate pool: N copies in memory, a cache
+that only hits when the same worker happens to see the same CV again, and an
+/admin/reload that reaches one worker out of N. The pieces below live as
+files in one directory (tmpfs under /dev/shm by default) that every worker
+maps at startup:
+
+- SharedCache: fixed-size hash table over a ring buffer of byte values.
+  Writers serialize on flock; readers take no lock at all. Every entry
+  carries its key, position and CRC, and a reader re-checks the ring head
+  after copying, so an entry being overwritten concurrently reads as a miss,
+  never as wrong data. Old entries are evicted in write order (FIFO).
+- Board: named uint64 counters; a worker notices a newer shared version
+  with one memory read.
+- SharedDoc: a small versioned document (the scoring config source) that
+  workers converge on through the board.
+- RecordSnapshot: read-only (id, JSON payload) rows plus fixed-width
+  columns, looked up by a sorted id-hash array, so a large candidate pool is
+  mapped once per host instead of decoded into every worker.
+
+Plain files and mmap rather than multiprocessing.shared_memory: segments
+must outlive the worker that created them and be found by name by workers
+started later, and shared_memory's resource tracker unlinks a segment when
+its creating process exits.
+"""
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+
+from app.settings import CONFIG_PATH, config_section
+
+DEFAULTS = {"enabled": True, "dir": None, "cache_mb": 64, "candidates": True}
+
+_U64 = struct.Struct("<Q")
+
+
+def default_dir() -> str:
+    """/dev/shm/cv-eval-<tag> (temp dir without /dev/shm); the tag keeps
+    deployments with different config files apart."""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    tag = hashlib.sha1(os.path.abspath(CONFIG_PATH).encode()).hexdigest()[:8]
+    return os.path.join(base, f"cv-eval-{tag}")
+
+
+def shared_dir() -> str | None:
+    """The configured shared directory (created), or None when sharing is off."""
+    cfg = config_section("shared", DEFAULTS)
+    if not cfg["enabled"]:
+        return None
+    path = cfg["dir"] or default_dir()
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@contextmanager
+def locked(path: str):
+    """Exclusive flock on `path` (created if missing), across processes and threads."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # releases the lock
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+def _map(path: str, size: int) -> tuple[int, mmap.mmap, bool]:
+    """Open (creating at `size` bytes) and map a file; True if it was new.
+
+    Files are never resized once created: another process may have them
+    mapped, and shrinking under its mapping would fault it. Sizes are part of
+    the file names instead.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        fresh = os.fstat(fd).st_size == 0
+        if fresh:
+            os.ftruncate(fd, size)
+        elif os.fstat(fd).st_size != size:
+            raise ValueError(f"{path}: unexpected size (remove the file to recreate it)")
+        return fd, mmap.mmap(fd, size), fresh
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+# --- cache ---------------------------------------------------------------------
+
+_CACHE_MAGIC = b"CVSHC01\0"
+_HEADER = 64                            # magic | slots | capacity | head | writes | pad
+_HEAD_AT, _WRITES_AT = 24, 32
+_SLOT = struct.Struct("<16sQI4x")      # key prefix, absolute position, entry length
+_SLOT_DTYPE = np.dtype([("prefix", "V16"), ("pos", "<u8"), ("length", "<u4"), ("pad", "V4")])
+_ENTRY = struct.Struct("<32sQII")      # key, absolute position, payload length, crc32
+_PROBES = 8
+
+
+class SharedCache:
+    """Bytes values keyed by 32-byte keys in one mapped file.
+
+    The data region is a ring addressed by ever-growing absolute positions;
+    an entry at position p is intact while p + capacity >= head. A writer
+    first moves head past the bytes it is about to overwrite, then writes the
+    entry, then points a slot at it; slots are only hints, the entry itself
+    is verified on every read.
+    """
+
+    def __init__(self, path: str, size_mb: float = 64):
+        self.path = path
+        self.capacity = int(size_mb * (1 << 20))
+        if self.capacity < 1 << 16:
+            raise ValueError("shared cache_mb too small")
+        self.slots = 1 << (self.capacity // 8192).bit_length()  # about one slot per 4-8 KB of values
+        self._mask = self.slots - 1
+        self._data = _HEADER + self.slots * _SLOT.size
+        self._fd, self._mm, fresh = _map(path, self._data + self.capacity)
+        self._lock = threading.Lock()
+        with self._writing():
+            if fresh or self._mm[:8] != _CACHE_MAGIC:
+                struct.pack_into("<8sQQQQ", self._mm, 0, _CACHE_MAGIC, self.slots, self.capacity, 0, 0)
+
+    @classmethod
+    def from_config(cls, name: str = "extraction") -> "SharedCache | None":
+        directory = shared_dir()
+        mb = config_section("shared", DEFAULTS)["cache_mb"]
+        if directory is None or not mb:
+            return None
+        return cls(os.path.join(directory, f"{name}-{mb}m.cache"), mb)
+
+    @contextmanager
+    def _writing(self):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _slot(self, key: bytes, i: int) -> int:
+        return _HEADER + ((int.from_bytes(key[:8], "little") + i) & self._mask) * _SLOT.size
+
+    def get(self, key: bytes) -> bytes | None:
+        mm, prefix = self._mm, key[:16]
+        for i in range(_PROBES):
+            at = self._slot(key, i)
+            if mm[at:at + 16] != prefix:
+                continue
+            _, pos, length = _SLOT.unpack_from(mm, at)
+            if length < _ENTRY.size or pos + self.capacity < _U64.unpack_from(mm, _HEAD_AT)[0]:
+                return None
+            start = self._data + pos % self.capacity
+            raw = mm[start:start + length]
+            if pos + self.capacity < _U64.unpack_from(mm, _HEAD_AT)[0]:
+                return None  # overwritten while copying
+            ekey, epos, size, crc = _ENTRY.unpack_from(raw)
+            value = raw[_ENTRY.size:]
+            if ekey == key and epos == pos and size == len(value) and zlib.crc32(value) == crc:
+                return value
+            return None
+        return None
+
+    def put(self, key: bytes, value: bytes) -> bool:
+        """Store `value`; False if it is too large for the ring (> 1/4 of it)."""
+        length = _ENTRY.size + len(value)
+        if length > self.capacity // 4:
+            return False
+        mm, prefix = self._mm, key[:16]
+        with self._writing():
+            head = _U64.unpack_from(mm, _HEAD_AT)[0]
+            offset = head % self.capacity
+            if offset + length > self.capacity:  # entries never wrap: start the next lap
+                head += self.capacity - offset
+                offset = 0
+            pos = head
+            _U64.pack_into(mm, _HEAD_AT, pos + length)
+            start = self._data + offset
+            mm[start:start + length] = _ENTRY.pack(key, pos, len(value), zlib.crc32(value)) + value
+            target = oldest = None
+            oldest_pos = None
+            for i in range(_PROBES):
+                at = self._slot(key, i)
+                kp, spos, slen = _SLOT.unpack_from(mm, at)
+                if kp == prefix or slen == 0 or spos + self.capacity < pos + length:
+                    target = at  # same key, empty, or pointing at overwritten data
+                    break
+                if oldest_pos is None or spos < oldest_pos:
+                    oldest, oldest_pos = at, spos
+            _SLOT.pack_into(mm, target if target is not None else oldest, prefix, pos, length)
+            _U64.pack_into(mm, _WRITES_AT, _U64.unpack_from(mm, _WRITES_AT)[0] + 1)
+        return True
+
+    def clear(self) -> None:
+        with self._writing():
+            self._mm[_HEADER:self._data] = bytes(self._data - _HEADER)
+            head = _U64.unpack_from(self._mm, _HEAD_AT)[0]
+            _U64.pack_into(self._mm, _HEAD_AT, head + self.capacity)
+
+    def stats(self) -> dict:
+        mm = self._mm
+        head = _U64.unpack_from(mm, _HEAD_AT)[0]
+        slots = np.frombuffer(mm, dtype=_SLOT_DTYPE, count=self.slots, offset=_HEADER)
+        live = int(((slots["length"] > 0) & (slots["pos"] + self.capacity >= head)).sum())
+        return {"path": self.path, "capacity_mb": self.capacity / (1 << 20), "slots": self.slots,
+                "entries": live, "writes": _U64.unpack_from(mm, _WRITES_AT)[0]}
+
+
+# --- board and documents ---------------------------------------------------------
+
+class Board:
+    """Named uint64 counters in a one-page mapped file."""
+
+    NAMES = ("profiles",)
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd, self._mm, _ = _map(path, mmap.PAGESIZE)
+
+    def _at(self, name: str) -> int:
+        return 8 * self.NAMES.index(name)
+
+    def get(self, name: str) -> int:
+        return _U64.unpack_from(self._mm, self._at(name))[0]
+
+    def set(self, name: str, value: int) -> None:
+        _U64.pack_into(self._mm, self._at(name), value)
+
+
+_board: Board | None = None
+_board_lock = threading.Lock()
+
+
+def board() -> Board | None:
+    global _board
+    directory = shared_dir()
+    if directory is None:
+        return None
+    with _board_lock:
+        if _board is None:
+            _board = Board(os.path.join(directory, "board"))
+    return _board
+
+
+class SharedDoc:
+    """Versioned bytes every worker converges on; the version is a board counter."""
+
+    def __init__(self, directory: str, name: str, board: Board):
+        self.name = name
+        self.board = board
+        self._base = os.path.join(directory, name)
+
+    @classmethod
+    def from_config(cls, name: str) -> "SharedDoc | None":
+        b = board()
+        return cls(shared_dir(), name, b) if b is not None else None
+
+    def version(self) -> int:
+        return self.board.get(self.name)
+
+    def read(self) -> tuple[int, str, bytes] | None:
+        """(version, digest, data) of the published document, if any."""
+        try:
+            with open(self._base + ".json", "rb") as fh:
+                meta = json.loads(fh.read())
+            with open(f"{self._base}-{meta['digest']}", "rb") as fh:
+                return meta["version"], meta["digest"], fh.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def publish(self, data: bytes, digest: str, version: int) -> int:
+        """Publish `data` unless it is already the shared document; returns the
+        version everyone should use for it."""
+        with locked(self._base + ".lock"):
+            current = self.read()
+            if current is not None and current[1] == digest:
+                version = current[0]
+            else:
+                version = max(version, self.board.get(self.name) + 1)
+                write_atomic(f"{self._base}-{digest}", data)
+                write_atomic(self._base + ".json", json.dumps({"version": version, "digest": digest}).encode())
+            self.board.set(self.name, version)
+            return version
+
+
+# --- record snapshots -----------------------------------------------------------
+
+_SNAP_MAGIC = b"CVSNAP01"
+
+
+def id_hash(cid: str) -> int:
+    return int.from_bytes(hashlib.blake2b(cid.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class RecordSnapshot:
+    """Read-only rows of (id, payload bytes) plus named fixed-width columns.
+
+    Layout: magic | header length | JSON header | sorted id hashes (uint64) |
+    their rows (uint32) | id and payload end offsets (uint64) | id and payload
+    bytes | columns. Everything is a view into one read-only mapping.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        if mm[:8] != _SNAP_MAGIC:
+            raise ValueError(f"not a record snapshot: {path}")
+        size = _U64.unpack_from(mm, 8)[0]
+        header = json.loads(mm[16:16 + size])
+        self.meta = header["meta"]
+        n = self.count = header["count"]
+        at = 16 + size
+
+        def take(dtype, count, shape=None):
+            nonlocal at
+            arr = np.frombuffer(mm, dtype=dtype, count=count, offset=at)
+            at += arr.nbytes
+            return arr.reshape(shape) if shape else arr
+
+        self._hashes = take(np.uint64, n)
+        self._rows = take(np.uint64, n)
+        self._id_ends = take(np.uint64, n)
+        self._pay_ends = take(np.uint64, n)
+        self._ids_at = at
+        at += header["ids_bytes"]
+        self._pay_at = at
+        at += header["payload_bytes"]
+        self.columns = {}
+        for name, dtype, shape in header["columns"]:
+            at += -at % 8
+            self.columns[name] = take(np.dtype(dtype), int(np.prod(shape)), tuple(shape))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @staticmethod
+    def write(path: str, rows, meta: dict, columns: dict | None = None) -> None:
+        """Write (id, payload bytes) rows and `columns` (arrays with one row per record) atomically."""
+        ids, pays, hashes, id_ends, pay_ends = bytearray(), bytearray(), [], [], []
+        for cid, payload in rows:
+            ids += cid.encode("utf-8")
+            pays += payload
+            hashes.append(id_hash(cid))
+            id_ends.append(len(ids))
+            pay_ends.append(len(pays))
+        n = len(hashes)
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        order = np.argsort(hashes, kind="stable")
+        columns = {k: np.ascontiguousarray(v) for k, v in (columns or {}).items()}
+        header = json.dumps({
+            "meta": meta, "count": n, "ids_bytes": len(ids), "payload_bytes": len(pays),
+            "columns": [[k, v.dtype.str, list(v.shape)] for k, v in columns.items()],
+        }).encode("utf-8")
+        header += b" " * (-len(header) % 8)
+        parts = [_SNAP_MAGIC, _U64.pack(len(header)), header, hashes[order].tobytes(),
+                 order.astype(np.uint64).tobytes(), np.asarray(id_ends, dtype=np.uint64).tobytes(),
+                 np.asarray(pay_ends, dtype=np.uint64).tobytes(), bytes(ids), bytes(pays)]
+        size = sum(len(p) for p in parts)
+        for arr in columns.values():
+            if len(arr) != n:
+                raise ValueError("snapshot columns need one row per record")
+            parts.append(b"\0" * (-size % 8))
+            size += len(parts[-1])
+            parts.append(arr.tobytes())
+            size += arr.nbytes
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            for p in parts:
+                fh.write(p)
+        os.replace(tmp, path)
+
+    def _span(self, ends: np.ndarray, row: int) -> tuple[int, int]:
+        return (int(ends[row - 1]) if row else 0), int(ends[row])
+
+    def id(self, row: int) -> str:
+        a, b = self._span(self._id_ends, row)
+        return self._mm[self._ids_at + a:self._ids_at + b].decode("utf-8")
+
+    def ids(self) -> list[str]:
+        """Every id in row order (one decode of the id bytes)."""
+        blob = self._mm[self._ids_at:self._ids_at + (int(self._id_ends[-1]) if self.count else 0)].decode("utf-8")
+        ends = self._id_ends
+        if self.count and len(blob) == int(ends[-1]):  # ASCII ids: char offsets are byte offsets
+            ends = ends.tolist()
+            return [blob[a:b] for a, b in zip([0, *ends[:-1]], ends)]
+        return [self.id(i) for i in range(self.count)]
+
+    def payload(self, row: int) -> bytes:
+        a, b = self._span(self._pay_ends, row)
+        return self._mm[self._pay_at + a:self._pay_at + b]
+
+    def find(self, cid: str) -> int | None:
+        h = np.uint64(id_hash(cid))
+        i = int(np.searchsorted(self._hashes, h))
+        while i < self.count and self._hashes[i] == h:
+            row = int(self._rows[i])
+            if self.id(row) == cid:
+                return row
+            i += 1
+        return None
@@ -0,0 +1,236 @@
+"""Columnar, append-only table of parsed CVs for large in-memory pools.
+
+A parsed CV as a dict of lists of str costs a few KB: every str object carries
+~50 bytes of header, every list its pointer array, every dict its hash table.
+CandidateTable stores the same information as a handful of typed buffers:
+
+- skills are interned once per distinct surface form; each CV keeps int32
+  skill ids in one flat array, sliced by a row offset array (CSR layout);
+- education/experience lines and name/email/phone are UTF-8 bytes in one
+  buffer per field, again sliced by offsets, with None kept as a bit;
+- derived scoring features (experience months, education level code) are
+  plain int32/uint8 columns, so numpy can read them without touching rows.
+
+`CandidateTable.view(i)` returns a __slots__ view that decodes lazily, and
+`to_dict()` gives back exactly what `simple_parse_cv` produced.
+
+This is a storage format for code that holds many full parsed CVs (lines,
+contact fields), e.g. a bulk in-memory scoring run; bench.bench_memory sizes
+it. The candidate pool (app.candidates) does not hold parsed CVs: it keeps
+feature records, shared between workers as a mapped RecordSnapshot.
+"""
+from array import array
+
+import numpy as np
+
+from app.features import edu_level_from_text, exp_months_from_lines
+from app.index import EDU_ORDER
+
+FIELDS = ("name", "email", "phone", "skills", "education", "experience")
+
+
+class StringPool:
+    """Interned strings: id <-> str, ids dense from 0."""
+
+    __slots__ = ("strings", "_ids")
+
+    def __init__(self):
+        self.strings: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def intern(self, s: str) -> int:
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def id_of(self, s: str) -> int | None:
+        return self._ids.get(s)
+
+
+class _TextColumn:
+    """Optional str per row: UTF-8 bytes in one buffer, end offsets, null bits."""
+
+    __slots__ = ("data", "ends", "nulls")
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array("q")
+        self.nulls = bytearray()
+
+    def append(self, value: str | None) -> None:
+        if value is not None:
+            self.data += value.encode("utf-8")
+        self.ends.append(len(self.data))
+        self.nulls.append(value is None)
+
+    def get(self, i: int) -> str | None:
+        if self.nulls[i]:
+            return None
+        start = self.ends[i - 1] if i else 0
+        return self.data[start:self.ends[i]].decode("utf-8")
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.ends.itemsize * len(self.ends) + len(self.nulls)
+
+
+class _ListColumn:
+    """list[str] per row as a _TextColumn of items plus per-row item offsets."""
+
+    __slots__ = ("items", "ends")
+
+    def __init__(self):
+        self.items = _TextColumn()
+        self.ends = array("q")
+
+    def append(self, values: list[str]) -> None:
+        for v in values:
+            self.items.append(v)
+        self.ends.append(len(self.items.ends))
+
+    def get(self, i: int) -> list[str]:
+        start = self.ends[i - 1] if i else 0
+        return [self.items.get(j) for j in range(start, self.ends[i])]
+
+    def nbytes(self) -> int:
+        return self.items.nbytes() + self.ends.itemsize * len(self.ends)
+
+
+class CandidateView:
+    """One row of a CandidateTable; fields are decoded on access."""
+
+    __slots__ = ("_table", "row")
+
+    def __init__(self, table: "CandidateTable", row: int):
+        self._table = table
+        self.row = row
+
+    @property
+    def name(self) -> str | None:
+        return self._table._name.get(self.row)
+
+    @property
+    def email(self) -> str | None:
+        return self._table._email.get(self.row)
+
+    @property
+    def phone(self) -> str | None:
+        return self._table._phone.get(self.row)
+
+    @property
+    def skills(self) -> list[str]:
+        return self._table.skills_of(self.row)
+
+    @property
+    def education(self) -> list[str]:
+        return self._table._education.get(self.row)
+
+    @property
+    def experience(self) -> list[str]:
+        return self._table._experience.get(self.row)
+
+    @property
+    def experience_months(self) -> int:
+        return self._table.exp_months[self.row]
+
+    @property
+    def experience_years(self) -> float:
+        return round(self.experience_months / 12.0, 1)
+
+    @property
+    def education_level(self) -> str:
+        return EDU_ORDER[self._table.edu_codes[self.row]]
+
+    def to_dict(self) -> dict:
+        return {f: getattr(self, f) for f in FIELDS}
+
+    def features(self) -> dict:
+        """Precomputed-feature form accepted by /score and score_batch."""
+        return {"skills": self.skills, "experience_years": self.experience_years,
+                "education_level": self.education_level}
+
+    def __repr__(self) -> str:
+        return f"CandidateView(row={self.row}, name={self.name!r})"
+
+
+class CandidateTable:
+    """Append-only columnar store of simple_parse_cv dicts."""
+
+    def __init__(self):
+        self.skill_pool = StringPool()
+        self._skill_ids = array("i")
+        self._skill_ends = array("q")
+        self._name = _TextColumn()
+        self._email = _TextColumn()
+        self._phone = _TextColumn()
+        self._education = _ListColumn()
+        self._experience = _ListColumn()
+        self.exp_months = array("i")
+        self.edu_codes = array("B")
+
+    def __len__(self) -> int:
+        return len(self._skill_ends)
+
+    def __getitem__(self, i: int) -> CandidateView:
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        return CandidateView(self, i % len(self))
+
+    def __iter__(self):
+        return (CandidateView(self, i) for i in range(len(self)))
+
+    @classmethod
+    def from_dicts(cls, parsed_cvs) -> "CandidateTable":
+        table = cls()
+        for cv in parsed_cvs:
+            table.append(cv)
+        return table
+
+    def append(self, cv: dict) -> int:
+        """Add one parsed CV (the /upload `parsed` payload); returns its row."""
+        unknown = set(cv) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"unsupported CV fields: {', '.join(sorted(unknown))}")
+        skills = cv.get("skills") or []
+        education = cv.get("education") or []
+        experience = cv.get("experience") or []
+        for s in skills:
+            self._skill_ids.append(self.skill_pool.intern(s))
+        self._skill_ends.append(len(self._skill_ids))
+        self._name.append(cv.get("name"))
+        self._email.append(cv.get("email"))
+        self._phone.append(cv.get("phone"))
+        self._education.append(education)
+        self._experience.append(experience)
+        self.exp_months.append(exp_months_from_lines(experience))
+        self.edu_codes.append(EDU_ORDER.index(edu_level_from_text(education)))
+        return len(self) - 1
+
+    def view(self, i: int) -> CandidateView:
+        return self[i]
+
+    def skills_of(self, i: int) -> list[str]:
+        start = self._skill_ends[i - 1] if i else 0
+        strings = self.skill_pool.strings
+        return [strings[j] for j in self._skill_ids[start:self._skill_ends[i]]]
+
+    def to_dicts(self) -> list[dict]:
+        return [v.to_dict() for v in self]
+
+    # numpy views over the feature columns (zero-copy; invalid after further appends)
+
+    def years(self) -> np.ndarray:
+        return np.round(np.frombuffer(self.exp_months, dtype=np.int32) / 12.0, 1)
+
+    def edu_levels(self) -> np.ndarray:
+        return np.frombuffer(self.edu_codes, dtype=np.uint8)
+
+    def nbytes(self) -> int:
+        """Payload bytes of all buffers (excludes the skill pool's str objects)."""
+        arrays = (self._skill_ids, self._skill_ends, self.exp_months, self.edu_codes)
+        cols = (self._name, self._email, self._phone, self._education, self._experience)
+        return sum(a.itemsize * len(a) for a in arrays) + sum(c.nbytes() for c in cols)
@@ -0,0 +1,207 @@
+"""Date-range extraction and overlap-merged tenure for experience sections.
+
+One compiled pattern finds every "<date> - <date|present>" range, where a
+date is "Jul 2022", "July 2022", "Temmuz 2022", "07/2022", "07.2022" or a bare
+year, and "present" covers English and Turkish forms ("Present", "Halen",
+"Günümüz", "Devam ediyor", ...). Dates become month indices (year*12 + month-1)
+and a range is the half-open interval [start, end), so "Jul 2024 - Sep 2024"
+is 2 months and "2022 - 2024" is 24, as before.
+
+A CV stored once (the candidate pool) keeps growing while a range is open:
+`open_offset` summarizes its open-ended ranges in one integer and
+`resolve_years` brings stored years up to the current month from it.
+
+Overlapping jobs are merged instead of summed. `months_batch` does the merge
+for many CVs at once with NumPy: intervals of CV i are shifted by i * _SPAN so
+one sort and one running maximum handle every CV without interacting.
+"""
+import re
+from datetime import date
+from typing import Iterable
+
+import numpy as np
+
+_MONTH_NAMES = {
+    1: ("jan", "january", "ocak", "oca"),
+    2: ("feb", "february", "şubat", "subat", "şub", "sub"),
+    3: ("mar", "march", "mart"),
+    4: ("apr", "april", "nisan", "nis"),
+    5: ("may", "mayıs", "mayis"),
+    6: ("jun", "june", "haziran", "haz"),
+    7: ("jul", "july", "temmuz", "tem"),
+    8: ("aug", "august", "ağustos", "agustos", "ağu", "agu"),
+    9: ("sep", "sept", "september", "eylül", "eylul", "eyl"),
+    10: ("oct", "october", "ekim", "eki"),
+    11: ("nov", "november", "kasım", "kasim", "kas"),
+    12: ("dec", "december", "aralık", "aralik", "ara"),
+}
+MONTHS = {name: num for num, names in _MONTH_NAMES.items() for name in names}
+
+_PRESENT = (
+    "present", "current", "currently", "now", "today", "ongoing",
+    "halen", "hâlen", "günümüz", "gunumuz", "devam ediyor", "devam", "şu an", "su an", "şimdi", "simdi",
+)
+
+_YEAR = r"(?:19|20)\d{2}"
+
+
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Alternation of `words` factored by common prefix ("a(?:pr(?:il)?|...)").
+
+    The regex engine then tries one branch per first letter instead of every
+    month name at every word start, which keeps month names as cheap as a
+    plain letter class. Optional suffixes are greedy, so "march" wins over "mar".
+    """
+    tree: dict = {}
+    for word in words:
+        node = tree
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def render(node: dict) -> str:
+        branches = [re.escape(ch) + render(child) for ch, child in node.items() if ch]
+        if not branches:
+            return ""
+        if "" in node:
+            return f"(?:{'|'.join(branches)})?"
+        return branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+
+    return render(tree)
+
+
+_MONTH_WORD = _trie_pattern(MONTHS)
+
+
+def _date(i: int) -> str:
+    # only month names count as a month: "Since 2019" or "Until 2020" is not
+    # January of that year (the bare-year branch may still take the year). A
+    # date never spans lines: "Present" ending one line is not the month of a
+    # year starting the next
+    return (
+        rf"(?:(?P<mon{i}>{_MONTH_WORD})\.?,?[^\S\n]*(?P<my{i}>{_YEAR})"
+        rf"|(?P<num{i}>0?[1-9]|1[0-2])[^\S\n]*[/.][^\S\n]*(?P<ny{i}>{_YEAR})"
+        rf"|(?P<y{i}>{_YEAR}))"
+    )
+
+
+RANGE_RE = re.compile(
+    rf"(?<![\w/.]){_date(1)}(?!\d)\s*(?:[-–—]+|\bto\b|\buntil\b)\s*"
+    rf"(?:(?P<present>{'|'.join(map(re.escape, _PRESENT))})\b|{_date(2)}(?!\d))",
+    re.IGNORECASE,
+)
+
+_SPAN = 10_000 * 12  # > any month index; keeps CVs apart in months_batch
+NO_OPEN = -(1 << 31)  # open offset of a section without open-ended ranges (fits int32)
+
+
+def month_index(year: int, month: int = 1) -> int:
+    return year * 12 + (month - 1)
+
+
+def today_index(today: date | None = None) -> int:
+    today = today or date.today()
+    return month_index(today.year, today.month)
+
+
+def _endpoint(m: re.Match, i: int) -> int:
+    mon = m.group(f"mon{i}")
+    if mon is not None:
+        # case-insensitive matching also accepts a few odd foldings ("ſep"): January
+        return month_index(int(m.group(f"my{i}")), MONTHS.get(mon.lower(), 1))
+    num = m.group(f"num{i}")
+    if num is not None:
+        return month_index(int(m.group(f"ny{i}")), int(num))
+    return month_index(int(m.group(f"y{i}")))
+
+
+def interval(m: re.Match, now: int | None = None) -> tuple[int, int]:
+    """[start, end) month indices of one RANGE_RE match; "present" ends at `now` (default: this month)."""
+    start = _endpoint(m, 1)
+    if m.group("present") is not None:
+        return start, now if now is not None else today_index()
+    return start, _endpoint(m, 2)
+
+
+def extract_intervals(text: str, now: int | None = None) -> list[tuple[int, int]]:
+    """All [start, end) month intervals in `text`; empty or reversed ranges are dropped."""
+    out = []
+    for m in RANGE_RE.finditer(text):
+        start, end = interval(m, now)
+        if end > start:
+            out.append((start, end))
+    return out
+
+
+def merged_months(intervals: Iterable[tuple[int, int]]) -> int:
+    """Length of the union of [start, end) intervals."""
+    total, cur_end = 0, None
+    for start, end in sorted(intervals):
+        if cur_end is None or start >= cur_end:
+            total += end - start
+            cur_end = end
+        elif end > cur_end:
+            total += end - cur_end
+            cur_end = end
+    return total
+
+
+def months_from_lines(lines: list[str], now: int | None = None) -> int:
+    return merged_months(extract_intervals(" \n".join(lines), now))
+
+
+def open_offset(lines: list[str]) -> int | None:
+    """Offset A of a section with open-ended ranges ("2020 - Present"), else None.
+
+    From the earliest open start s0 on every month counts, so at month t the
+    merged months are max(months when parsed, A + t) with A = (closed months
+    before s0) - s0. Exact unless a closed range ends after the month the
+    section was parsed; until that end passes it is a lower bound.
+    """
+    closed, starts = [], []
+    for m in RANGE_RE.finditer(" \n".join(lines)):
+        start = _endpoint(m, 1)
+        if m.group("present") is not None:
+            starts.append(start)
+        elif (end := _endpoint(m, 2)) > start:
+            closed.append((start, end))
+    if not starts:
+        return None
+    s0 = min(starts)
+    return merged_months((s, min(e, s0)) for s, e in closed if s < s0) - s0
+
+
+def resolve_years(years: np.ndarray, offsets: np.ndarray, now: int | None = None) -> np.ndarray:
+    """Stored experience years brought up to `now` (default: this month) by
+    their open offsets (NO_OPEN: unchanged)."""
+    now = now if now is not None else today_index()
+    grown = np.round((np.asarray(offsets, dtype=np.int64) + now) / 12.0, 1)
+    return np.maximum(years, grown.astype(years.dtype))
+
+
+def months_batch(line_lists: list[list[str]], now: int | None = None) -> np.ndarray:
+    """Merged months per CV for many experience sections at once (int64 array)."""
+    now = now if now is not None else today_index()
+    owners, starts, ends = [], [], []
+    for i, lines in enumerate(line_lists):
+        for s, e in extract_intervals(" \n".join(lines), now):
+            owners.append(i)
+            starts.append(s)
+            ends.append(e)
+    n = len(line_lists)
+    if not owners:
+        return np.zeros(n, dtype=np.int64)
+    owner = np.asarray(owners, dtype=np.int64)
+    s = np.asarray(starts, dtype=np.int64) + owner * _SPAN
+    e = np.asarray(ends, dtype=np.int64) + owner * _SPAN
+    order = np.argsort(s, kind="stable")
+    owner, s, e = owner[order], s[order], e[order]
+    # furthest end covered by any earlier interval (of the same CV, thanks to the shift)
+    reach = np.maximum.accumulate(e)
+    prev = np.empty_like(reach)
+    prev[0] = s[0]
+    prev[1:] = reach[:-1]
+    covered = np.clip(e - np.maximum(s, prev), 0, None)
+    return np.bincount(owner, weights=covered, minlength=n).astype(np.int64)
@@ -0,0 +1,220 @@
+"""Opt-in evidence trace for role scoring.
+
+score_features reports hit counts and the names of the matched keywords;
+when a ranking looks wrong the question is where they came from. A trace
+records the evidence behind each dimension with character offsets into the
+CV as it was sent:
+
+- skills: every keyword occurrence in the skills list (skill index, offsets,
+  surface text, canonical keyword, must/nice for the role) and the must
+  keywords that were not found;
+- experience: every date range tenure.RANGE_RE found in the experience lines
+  (line, offsets, months, months left after overlaps are merged), the
+  per-bullet fallback when no range parsed, and the resulting years;
+- education: every features.EDU_KEYWORDS occurrence in the education lines
+  and the one that decided the level.
+
+The text is searched exactly as the scorer searches it (skills joined with
+" | ", lines with " \\n", lowercased) and offsets are mapped back to the
+original strings, also when lowercasing changes the length ("İ" -> "i̇").
+
+A trace is built only when asked for: per request (`trace: true`) or for a
+`sample_rate` share of scored CVs, whose traces go to a ring buffer instead
+of the response. With sampling off the scoring path pays one comparison.
+"""
+import itertools
+import random
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+
+import numpy as np
+
+from app.features import EDU_KEYWORDS, FALLBACK_MONTHS_PER_LINE
+from app.profiles import ScoringConfig, current
+from app.settings import config_section
+from app.tenure import RANGE_RE, interval, merged_months, today_index
+
+DEFAULTS = {"sample_rate": 0.0, "max_traces": 200}
+
+_SKILL_SEP = " | "
+_LINE_SEP = " \n"
+
+
+class _Joined:
+    """`sep`.join(parts), optionally stripped/lowercased per part, with a way
+    back from an offset in the joined text to (part, start, end) in the
+    original strings."""
+
+    def __init__(self, parts: list[str], sep: str, lower: bool = True, strip: bool = False):
+        pieces, self._starts, self._parts = [], [], []
+        pos = 0
+        for raw in parts:
+            body = raw.strip() if strip else raw
+            lead = len(raw) - len(raw.lstrip()) if strip else 0
+            low = body.lower() if lower else body
+            origin = None
+            if len(low) != len(body):
+                origin = [lead + i for i, ch in enumerate(body) for _ in ch.lower()]
+                origin.append(lead + len(body))
+            self._starts.append(pos)
+            self._parts.append((lead, len(low), origin))
+            pieces.append(low)
+            pos += len(low) + len(sep)
+        self.text = sep.join(pieces)
+
+    def locate(self, start: int, end: int) -> tuple[int, int, int]:
+        k = bisect_right(self._starts, start) - 1
+        lead, n, origin = self._parts[k]
+        s, e = start - self._starts[k], min(end - self._starts[k], n)  # a match may run into the separator
+        if origin is None:
+            return k, lead + s, lead + e
+        return k, origin[s], origin[e]
+
+
+def _month(i: int) -> str:
+    return f"{i // 12}-{i % 12 + 1:02d}"
+
+
+def skill_evidence(skills: list, profile, cfg: ScoringConfig) -> dict:
+    index = [i for i, s in enumerate(skills or []) if isinstance(s, str)]
+    joined = _Joined([skills[i] for i in index], _SKILL_SEP, strip=True)
+    hits, matched = [], set()
+    for start, end, keyword in cfg.matcher.find(joined.text):
+        k, s, e = joined.locate(start, end)
+        item = skills[index[k]]
+        hits.append({
+            "keyword": keyword,
+            "list": "must" if keyword in profile.must else "nice" if keyword in profile.nice else None,
+            "skill": index[k], "start": s, "end": e, "text": item[s:e],
+        })
+        matched.add(keyword)
+    return {"matches": hits, "must_missing": sorted(profile.must - matched)}
+
+
+def experience_evidence(lines: list, now: int | None = None) -> dict:
+    lines = [ln for ln in lines or [] if isinstance(ln, str)]
+    now = now if now is not None else today_index()
+    joined = _Joined(lines, _LINE_SEP, lower=False)
+    ranges, spans = [], []
+    for m in RANGE_RE.finditer(joined.text):
+        start, end = interval(m, now)
+        k, s, e = joined.locate(m.start(), m.end())
+        ranges.append({
+            "line": k, "start": s, "end": e, "text": lines[k][s:e],
+            "from": _month(start), "to": "present" if m.group("present") is not None else _month(end),
+            "months": max(0, end - start), "counted": end > start, "added_months": 0,
+        })
+        if end > start:
+            spans.append((start, end, ranges[-1]))
+    # months each range adds to the union, walking them by start as merged_months does
+    reach = None
+    for start, end, r in sorted(spans, key=lambda x: x[:2]):
+        r["added_months"] = max(0, end - (start if reach is None else max(start, reach)))
+        reach = end if reach is None else max(reach, end)
+    total = merged_months((start, end) for start, end, _ in spans)
+    fallback = 0
+    if total == 0 and lines:
+        fallback = sum(1 for ln in lines if ln) * FALLBACK_MONTHS_PER_LINE
+    months = total or fallback
+    return {"source": "lines", "ranges": ranges, "merged_months": total,
+            "fallback_months": fallback, "years": round(months / 12.0, 1)}
+
+
+def education_evidence(lines: list) -> dict:
+    lines = [ln for ln in lines or [] if isinstance(ln, str)]
+    joined = _Joined(lines, _LINE_SEP)
+    hits, decided = [], None
+    for level, keywords in EDU_KEYWORDS:
+        for keyword in keywords:
+            at = joined.text.find(keyword)
+            while at >= 0:
+                k, s, e = joined.locate(at, at + len(keyword))
+                hits.append({"level": level, "keyword": keyword, "line": k, "start": s, "end": e,
+                             "text": lines[k][s:e]})
+                if decided is None:
+                    decided = hits[-1]
+                at = joined.text.find(keyword, at + 1)
+    return {"source": "lines", "level": decided["level"] if decided else "unknown",
+            "decided_by": decided, "matches": hits}
+
+
+def explain(cv: dict, features: dict, job_title: str, cfg: ScoringConfig | None = None) -> dict:
+    """Evidence behind score_features(features, job_title) for the CV `features` came from.
+
+    `cv` is the parsed CV (skills/experience/education lines); when only
+    precomputed features were sent, experience and education are reported as
+    given.
+    """
+    cfg = cfg or current()
+    profile = cfg.profile(job_title)
+    out = {
+        "job_title": job_title or "(unspecified)",
+        "config_version": cfg.version,
+        "skills": skill_evidence(features.get("skills") or [], profile, cfg),
+    }
+    if "experience" in cv:
+        out["experience"] = experience_evidence(cv.get("experience"))
+    else:
+        out["experience"] = {"source": "given", "years": float(features.get("experience_years") or 0)}
+    if "education" in cv:
+        out["education"] = education_evidence(cv.get("education"))
+    else:
+        out["education"] = {"source": "given", "level": (features.get("education_level") or "unknown").lower()}
+    return out
+
+
+def requested(flag) -> bool:
+    """`trace` field or query parameter: true, 1, "true", "yes" or "on"."""
+    if isinstance(flag, str):
+        return flag.strip().lower() in ("1", "true", "yes", "on")
+    return bool(flag)
+
+
+class Tracer:
+    """Sampling decision and a ring buffer of the sampled traces."""
+
+    def __init__(self, sample_rate: float = 0.0, max_traces: int = 200):
+        self.sample_rate = float(sample_rate)
+        if not 0 <= self.sample_rate <= 1:
+            raise ValueError("trace sample_rate must be in [0, 1]")
+        self._traces: deque = deque(maxlen=max(1, int(max_traces)))
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.sampled = 0
+        self.requested = 0
+
+    @classmethod
+    def from_config(cls) -> "Tracer":
+        cfg = config_section("trace", DEFAULTS)
+        return cls(cfg["sample_rate"], cfg["max_traces"])
+
+    def sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def sample_many(self, n: int) -> np.ndarray:
+        """Indices of the CVs to trace out of `n` scored together."""
+        if self.sample_rate <= 0 or not n:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(np.random.random(n) < self.sample_rate)
+
+    def record(self, trace: dict, endpoint: str, sampled: bool) -> dict:
+        """Stamp `trace` and, when it was sampled, keep it for GET /score/traces."""
+        with self._lock:
+            trace = {"id": next(self._ids), "at": time.time(), "endpoint": endpoint, "sampled": sampled, **trace}
+            if sampled:
+                self.sampled += 1
+                self._traces.append(trace)
+            else:
+                self.requested += 1
+        return trace
+
+    def recent(self, limit: int = 20) -> list[dict]:
+        with self._lock:
+            items = list(self._traces)
+        return items[::-1][:max(0, limit)]
+
+    def stats(self) -> dict:
+        return {"sample_rate": self.sample_rate, "sampled": self.sampled, "requested": self.requested,
+                "kept": len(self._traces), "max_traces": self._traces.maxlen}
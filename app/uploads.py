@@ -0,0 +1,123 @@
+import hashlib
+import os
+import tempfile
+from typing import NamedTuple
+
+from app.settings import config_section
+
+CHUNK = 1 << 20
+DEFAULTS = {"max_pages": 50, "max_chars": 200_000, "max_upload_mb": 10, "spool_mem_mb": 1}
+
+
+class UploadLimits(NamedTuple):
+    max_pages: int | None
+    max_chars: int | None
+    max_bytes: int
+    mem_limit: int
+
+    @classmethod
+    def from_config(cls) -> "UploadLimits":
+        cfg = config_section("extraction", DEFAULTS)
+        return cls(
+            int(cfg["max_pages"]) or None,
+            int(cfg["max_chars"]) or None,
+            int(float(cfg["max_upload_mb"]) * (1 << 20)),
+            int(float(cfg["spool_mem_mb"]) * (1 << 20)),
+        )
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class SpooledUpload:
+    """Upload body read in chunks: hashed on the fly, kept in memory up to
+    `mem_limit` bytes and written to a temp file beyond that.
+
+    `source` is what extraction workers receive: the bytes, or the temp path.
+    """
+
+    def __init__(self, mem_limit: int):
+        self.mem_limit = mem_limit
+        self.size = 0
+        self._sha = hashlib.sha256()
+        self._buf = bytearray()
+        self._fh = None
+        self.path: str | None = None
+
+    @property
+    def sha256(self) -> str:
+        return self._sha.hexdigest()
+
+    @property
+    def source(self):
+        return self.path if self.path is not None else bytes(self._buf)
+
+    def write(self, chunk: bytes) -> None:
+        self._sha.update(chunk)
+        self.size += len(chunk)
+        if self._fh is None and self.size > self.mem_limit:
+            self._fh = tempfile.NamedTemporaryFile(prefix="cv-upload-", delete=False)
+            self.path = self._fh.name
+            self._fh.write(self._buf)
+            self._buf = bytearray()
+        if self._fh is not None:
+            self._fh.write(chunk)
+        else:
+            self._buf += chunk
+
+    def finish(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+
+    def read_all(self) -> bytes:
+        if self.path is None:
+            return bytes(self._buf)
+        with open(self.path, "rb") as fh:
+            return fh.read()
+
+    def cleanup(self) -> None:
+        if self._fh is not None and not self._fh.closed:
+            self._fh.close()
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+async def spool_upload(file, max_bytes: int, mem_limit: int) -> SpooledUpload:
+    """Drain a starlette UploadFile without materializing it; raises UploadTooLarge."""
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge()
+    up = SpooledUpload(mem_limit)
+    try:
+        while True:
+            chunk = await file.read(CHUNK)
+            if not chunk:
+                break
+            up.write(chunk)
+            if up.size > max_bytes:
+                raise UploadTooLarge()
+        up.finish()
+    except BaseException:
+        up.cleanup()
+        raise
+    return up
+
+
+async def spool_stream(chunks, max_bytes: int, mem_limit: int) -> SpooledUpload:
+    """Same as spool_upload for a raw request body (an async iterator of bytes)."""
+    up = SpooledUpload(mem_limit)
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            up.write(chunk)
+            if up.size > max_bytes:
+                raise UploadTooLarge()
+        up.finish()
+    except BaseException:
+        up.cleanup()
+        raise
+    return up
@@ -0,0 +1,73 @@
+"""Throughput and text-equivalence of each PDF backend over data/samples.
+
+    python -m bench.bench_extract [--repeat 5] [--glob 'data/samples/*.pdf']
+
+pdfplumber is the reference: for every other backend the table shows whether
+the whitespace-normalized text and the simple_parse_cv result match it. The
+"auto" row is the registry's probe-driven choice (extract_pdf).
+"""
+import argparse
+import glob
+import sys
+import time
+
+from app.extract import BACKENDS, extract_pdf
+from app.parser import simple_parse_cv
+
+
+def _norm(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _time(fn, repeat: int) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--glob", default="data/samples/*.pdf")
+    args = ap.parse_args(argv)
+
+    files = sorted(glob.glob(args.glob))
+    if not files:
+        print(f"no files match {args.glob}", file=sys.stderr)
+        return 1
+    blobs = {f: open(f, "rb").read() for f in files}
+    totals = {name: 0.0 for name in [*BACKENDS, "auto"]}
+
+    print(f"{'file':<40} {'backend':<16} {'ms':>9} {'text==':>7} {'parse==':>8}")
+    for f, raw in blobs.items():
+        ref = None
+        for name in ["pdfplumber", *[b for b in BACKENDS if b != "pdfplumber"], "auto"]:
+            if name == "auto":
+                fn = lambda: (lambda r: (r.text, r.backend))(extract_pdf(raw))
+            else:
+                fn = lambda: (BACKENDS[name](raw)[0], name)
+            try:
+                dt, (text, used) = _time(fn, args.repeat)
+            except Exception as e:
+                print(f"{f[-40:]:<40} {name:<16} {'error':>9}  {type(e).__name__}")
+                continue
+            totals[name] += dt
+            if ref is None:
+                ref = (_norm(text), simple_parse_cv(text))
+            label = name if name != "auto" else f"auto:{used}"
+            print(f"{f[-40:]:<40} {label:<16} {dt * 1e3:9.2f} {str(_norm(text) == ref[0]):>7} "
+                  f"{str(simple_parse_cv(text) == ref[1]):>8}")
+
+    print()
+    mb = sum(len(b) for b in blobs.values()) / (1 << 20)
+    for name, t in totals.items():
+        if t:
+            print(f"{name:<11} {len(files) / t:8.1f} files/s  {mb / t:7.2f} MB/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Single-pass layout extraction vs the two-stage text + regex path.
+
+    python -m bench.bench_layout [--synthetic 20] [--repeat 3]
+
+Files: data/samples/*.pdf plus `synthetic` one-page sidebar CVs whose two
+columns are written row by row (bench.synthetic.two_column_pdf). Modes:
+
+  two-stage          extract_pdf with the default backend order, then simple_parse_cv
+  layout             extract_pdf(order=("layout",)): pdfium character boxes
+  layout_pdfplumber  extract_pdf(order=("layout_pdfplumber",)): pdfplumber words
+
+Reported per mode: files/s, pages/s, per-file and per-page latency. On the
+synthetic set the parsed skills are compared with the ones written into the
+PDF (precision/recall) and the experience months with the real total; on
+the samples each field is compared with the two-stage result.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+from app.extract import extract_pdf
+from app.features import exp_months_from_lines
+from app.parser import simple_parse_cv
+from bench.synthetic import two_column_pdf
+
+MODES = {
+    "two-stage": None,
+    "layout": ("layout",),
+    "layout_pdfplumber": ("layout_pdfplumber",),
+}
+FIELDS = ("name", "email", "phone", "skills", "education", "experience")
+
+
+def _run(raw: bytes, order) -> tuple[dict, int, float, tuple]:
+    t0 = time.perf_counter()
+    result = extract_pdf(raw, order=order) if order else extract_pdf(raw)
+    parsed = result.parsed if result.parsed is not None else simple_parse_cv(result.text)
+    return parsed, result.pages, (time.perf_counter() - t0) * 1000, result.page_ms
+
+
+def _skill_scores(parsed: dict, truth: dict) -> tuple[float, float]:
+    got = {s.lower() for s in parsed.get("skills", [])}
+    want = {s.lower() for s in truth["skills"]}
+    hit = len(got & want)
+    return hit / len(got) if got else 0.0, hit / len(want)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--synthetic", type=int, default=20, help="two-column synthetic CVs")
+    ap.add_argument("--repeat", type=int, default=3, help="timed passes per file (best is kept)")
+    args = ap.parse_args(argv)
+
+    root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "samples")
+    samples = [(os.path.basename(p), open(p, "rb").read(), None) for p in sorted(glob.glob(os.path.join(root, "*.pdf")))]
+    synthetic = [(f"two_column_{i}", *two_column_pdf(jobs=2 + i % 3, seed=i)) for i in range(args.synthetic)]
+    files = samples + synthetic
+    print(f"{len(samples)} sample PDFs, {len(synthetic)} synthetic two-column PDFs")
+
+    results: dict[str, dict[str, dict]] = {}
+    print(f"{'mode':<19}{'files/s':>9}{'pages/s':>9}{'file p50 ms':>13}{'file max ms':>13}{'page p50 ms':>13}{'page max ms':>13}")
+    for mode, order in MODES.items():
+        results[mode] = {}
+        file_ms, page_ms, pages = [], [], 0
+        for name, raw, _ in files:
+            best = None
+            for _ in range(args.repeat):
+                parsed, n, ms, per_page = _run(raw, order)
+                if best is None or ms < best[2]:
+                    best = (parsed, n, ms, per_page)
+            results[mode][name] = best[0]
+            file_ms.append(best[2])
+            page_ms.extend(best[3] or [best[2] / max(1, best[1])] * best[1])
+            pages += best[1]
+        total_s = sum(file_ms) / 1000
+        print(f"{mode:<19}{len(files) / total_s:>9.1f}{pages / total_s:>9.1f}"
+              f"{np.percentile(file_ms, 50):>13.1f}{max(file_ms):>13.1f}"
+              f"{np.percentile(page_ms, 50):>13.1f}{max(page_ms):>13.1f}")
+    print("two-stage page ms is file ms / pages (no per-page timing)")
+
+    ok = True
+    if synthetic:
+        print(f"\nsynthetic two-column ({len(synthetic)} files)")
+        print(f"{'mode':<19}{'skill prec':>11}{'skill rec':>10}{'exp months ok':>15}{'name ok':>9}")
+        for mode in MODES:
+            prec, rec, months, names = [], [], 0, 0
+            for name, _, truth in synthetic:
+                parsed = results[mode][name]
+                p, r = _skill_scores(parsed, truth)
+                prec.append(p)
+                rec.append(r)
+                months += exp_months_from_lines(parsed.get("experience", [])) == truth["experience_months"]
+                names += parsed.get("name") == truth["name"]
+            print(f"{mode:<19}{np.mean(prec):>11.2f}{np.mean(rec):>10.2f}"
+                  f"{f'{months}/{len(synthetic)}':>15}{f'{names}/{len(synthetic)}':>9}")
+            if mode != "two-stage":
+                ok &= min(rec) == 1.0 and months == len(synthetic)
+
+    if samples:
+        print("\nsamples: fields equal to two-stage")
+        print(f"{'file':<28}" + "".join(f"{m:>19}" for m in MODES if m != "two-stage"))
+        for name, _, _ in samples:
+            ref = results["two-stage"][name]
+            cells = []
+            for mode in MODES:
+                if mode == "two-stage":
+                    continue
+                same = [f for f in FIELDS if results[mode][name].get(f) == ref.get(f)]
+                cells.append(f"{len(same)}/{len(FIELDS)}")
+            print(f"{name[:27]:<28}" + "".join(f"{c:>19}" for c in cells))
+    print("ok" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Bytes per candidate: parsed-CV dicts vs the columnar CandidateTable.
+
+    python -m bench.bench_memory [--n 50000] [--jobs 3]
+
+Both pools hold the same `simple_parse_cv` output for `n` synthetic CVs; the
+table is then converted back and compared with the dicts for losslessness.
+Sizes are tracemalloc deltas, so they include every str/list/dict object.
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from app.parser import simple_parse_cv
+from app.table import CandidateTable
+from bench.synthetic import synthetic_cv
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return obj, size, elapsed
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=50000)
+    ap.add_argument("--jobs", type=int, default=3, help="experience entries per synthetic CV")
+    ap.add_argument("--distinct", type=int, default=2000, help="distinct CV texts to cycle through")
+    args = ap.parse_args(argv)
+
+    texts = [synthetic_cv(jobs=args.jobs, seed=i) for i in range(args.distinct)]
+    # parse inside the measured build so every dict owns fresh str objects, as in a real pool
+    dicts, dict_bytes, dict_s = _measure(lambda: [simple_parse_cv(texts[i % len(texts)]) for i in range(args.n)])
+    table, table_bytes, table_s = _measure(lambda: CandidateTable.from_dicts(dicts))
+
+    print(f"{args.n} candidates, {len(table.skill_pool)} distinct skills")
+    print(f"{'layout':<16}{'bytes/cv':>10}{'total MB':>10}{'build s':>9}")
+    print(f"{'dict of lists':<16}{dict_bytes / args.n:>10.0f}{dict_bytes / 2**20:>10.1f}{dict_s:>9.2f}")
+    print(f"{'CandidateTable':<16}{table_bytes / args.n:>10.0f}{table_bytes / 2**20:>10.1f}{table_s:>9.2f}")
+    print(f"ratio {dict_bytes / max(1, table_bytes):.1f}x smaller")
+
+    lossless = table.to_dicts() == dicts
+    print(f"lossless round-trip: {lossless}")
+    return 0 if lossless else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
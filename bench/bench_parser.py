@@ -0,0 +1,139 @@
+"""Equivalence check and timing for simple_parse_cv against the pre-rewrite version.
+
+    python -m bench.bench_parser [--jobs 200] [--repeat 200]
+
+Exits non-zero if the outputs differ on any sample or synthetic CV.
+"""
+import argparse
+import glob
+import re
+import sys
+import timeit
+
+from app.parser import simple_parse_cv
+from bench.synthetic import synthetic_cv
+
+
+def legacy_simple_parse_cv(text: str) -> dict:
+    # verbatim copy of the multi-pass implementation replaced in app/parser.py
+    lines = [line.strip() for line in text.splitlines()]
+    norm_lines = []
+    for ln in lines:
+        if ln is None:
+            continue
+        s = ln.strip()
+        norm_lines.append(s)
+
+    email_match = re.search(r"[\w\.-]+@[\w\.-]+\.[A-Za-z]{2,}", text, re.I)
+    email = email_match.group(0) if email_match else ""
+
+    phone_match = re.search(r"(\+?\d[\d\s\-()]{7,}\d)", text)
+    phone = phone_match.group(0) if phone_match else ""
+
+    header_words = {"summary","objective","skills","skill","education","experience","experiences","work experience","projects","certificates","languages"}
+    name = ""
+    for ln in norm_lines:
+        if not ln:
+            continue
+        low = ln.lower().strip(':')
+        if (email and email in ln) or (phone and phone in ln):
+            continue
+        if low in header_words:
+            continue
+        if re.search(r"[A-Za-zğüşöçıİĞÜŞÖÇ]", ln):
+            name = ln
+            break
+
+    known_headers = [
+        r"skills?\b",
+        r"education\b",
+        r"experiences?\b|work\s+experience\b",
+        r"projects\b",
+        r"certificates?\b",
+        r"languages\b",
+        r"summary\b|objective\b",
+    ]
+    header_re = re.compile(r"^(" + r"|".join(known_headers) + r")[\s:]*$", re.I)
+
+    sections: dict[str, list[str]] = {}
+    current = None
+    for ln in norm_lines:
+        low = (ln or "").lower()
+        if header_re.match(low):
+            if re.search(r"skills?", low): key = "skills"
+            elif re.search(r"education", low): key = "education"
+            elif re.search(r"experiences?|work\s+experience", low): key = "experience"
+            elif re.search(r"projects", low): key = "projects"
+            elif re.search(r"certificates?", low): key = "certificates"
+            elif re.search(r"languages", low): key = "languages"
+            else: key = low.strip(':')
+            current = key
+            sections.setdefault(current, [])
+            continue
+        if current:
+            sections[current].append(ln)
+
+    skills: list[str] = []
+    if "skills" in sections:
+        buf = "\n".join(sections["skills"]) if sections["skills"] else ""
+        raw_sk = re.split(r"[\n,;•·\u2022\u25CF]", buf)
+        skills = [s.strip() for s in raw_sk if s and len(s.strip()) > 1]
+
+    def compact_block(lines_list: list[str]) -> list[str]:
+        out: list[str] = []
+        block: list[str] = []
+        for ln in lines_list:
+            if not ln:
+                if block:
+                    out.append(" ".join(block).strip())
+                    block = []
+                continue
+            block.append(ln)
+        if block:
+            out.append(" ".join(block).strip())
+        return [x for x in out if x]
+
+    return {
+        "name": name,
+        "email": email,
+        "phone": phone,
+        "skills": skills,
+        "education": compact_block(sections.get("education", [])),
+        "experience": compact_block(sections.get("experience", [])),
+    }
+
+
+def sample_texts() -> dict[str, str]:
+    from app.extract import extract_pdf_text
+
+    out = {}
+    for path in sorted(glob.glob("data/samples/*.pdf")):
+        with open(path, "rb") as fh:
+            out[path] = extract_pdf_text(fh.read())
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--jobs", type=int, default=200, help="experience entries in the long synthetic CV")
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args(argv)
+
+    corpus = sample_texts()
+    corpus.update({f"synthetic-{i}": synthetic_cv(jobs=5 + i, seed=i) for i in range(50)})
+    corpus["edge"] = "\n\nSKILLS:\nA, B; Go\n\nsummary :\nx\nExperience\n\nline\n\nline2\nSKILLS\nSQL\n"
+    bad = [k for k, t in corpus.items() if simple_parse_cv(t) != legacy_simple_parse_cv(t)]
+    print(f"equivalence: {len(corpus) - len(bad)}/{len(corpus)} identical")
+    for k in bad:
+        print(f"  MISMATCH {k}", file=sys.stderr)
+
+    long_cv = synthetic_cv(jobs=args.jobs, seed=1)
+    print(f"long CV: {len(long_cv.splitlines())} lines, {len(long_cv)} chars")
+    for label, fn in (("legacy", legacy_simple_parse_cv), ("single-pass", simple_parse_cv)):
+        t = min(timeit.repeat(lambda: fn(long_cv), number=args.repeat, repeat=3)) / args.repeat
+        print(f"  {label:<12} {t * 1e3:8.3f} ms/parse")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
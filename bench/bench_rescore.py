@@ -0,0 +1,134 @@
+"""Incremental re-scoring after a config change vs re-matching the whole pool.
+
+    python -m bench.bench_rescore [--n 200000] [--chunk 2000]
+
+A synthetic pool of `n` candidates is scored under the active config, then
+one config change of each kind is applied: a keyword added to a role, a
+keyword removed, a new alias, a role added, a role removed and a
+points-only change (thresholds / education points). For each, the
+Rescorer's run is timed next to a full re-match of every record plus a new
+score table, and the ranking of every role is compared with that full
+rebuild. While a background run is in progress, /candidates/rank-style reads
+are timed to show they keep answering from the previous table.
+"""
+import argparse
+import copy
+import random
+import sys
+import time
+
+import numpy as np
+
+from app import profiles
+from app.candidates import CandidateStore, ScoreTable, _apply_config
+from app.profiles import compile_config, current
+
+_EXTRA = ["Rust", "Golang", "Kotlin", "Terraform", "Airflow", "Spark", "Jira", "Scrum", "Snowflake", "dbt"]
+
+
+def _pool(n: int) -> CandidateStore:
+    from bench.synthetic import _SKILLS
+    vocab = _SKILLS + _EXTRA
+    store = CandidateStore()
+    rnd = random.Random(0)
+    for i in range(n):
+        store.add(f"c{i}", {"name": f"Candidate {i}", "skills": rnd.sample(vocab, rnd.randint(4, 10)),
+                            "experience": [f"Engineer Jan {2010 + i % 12} - Present"],
+                            "education": [rnd.choice(["BSc Computer Science", "MSc Statistics", "PhD Physics"])]})
+    store.table()
+    return store
+
+
+def _changes(raw: dict) -> list[tuple[str, dict]]:
+    out = []
+
+    def step(name, fn):
+        nxt = copy.deepcopy(out[-1][1] if out else raw)
+        fn(nxt["scoring"])
+        out.append((name, nxt))
+
+    step("keyword add", lambda s: s["roles"]["data scientist"]["nice"].append("rust"))
+    step("keyword remove", lambda s: s["roles"]["backend engineer"]["must"].remove("go"))
+    step("alias add", lambda s: s.setdefault("aliases", {}).update(rust=["golang"]))
+    step("role add", lambda s: s["roles"].update({"data engineer": {"must": ["spark", "sql"], "nice": ["airflow", "dbt"]}}))
+    step("role remove", lambda s: s["roles"].pop("business analyst"))
+    step("points only", lambda s: s.update(experience_thresholds=[0, 1, 2, 4, 6, 8]))
+    return out
+
+
+def _ranking(store: CandidateStore, cfg) -> dict:
+    return {role: [(r["id"], r["points"]["weighted"]) for r in store.rank(role, dict(cfg.weights))]
+            for role in cfg.roles}
+
+
+def _full(store: CandidateStore, cfg) -> tuple[float, dict]:
+    records = [dict(r) for r in store._records.values()]
+    t0 = time.perf_counter()
+    for r in records:
+        _apply_config(r, cfg)
+    ScoreTable(records, cfg)
+    ms = (time.perf_counter() - t0) * 1000
+    ref = CandidateStore()
+    ref._records = {r["id"]: r for r in records}
+    ref.index = ref._rebuild_index(cfg)
+    ref.table()
+    return ms, _ranking(ref, cfg)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=200_000, help="candidates in the pool")
+    ap.add_argument("--chunk", type=int, default=2000, help="Rescorer chunk size")
+    args = ap.parse_args(argv)
+
+    base = current()
+    profiles.detach()  # configs below are swapped in by hand, not published
+    raw, _ = profiles._read(profiles._config_path)
+    t0 = time.perf_counter()
+    store = _pool(args.n)
+    store.rescorer.chunk_size = args.chunk
+    print(f"pool {len(store)} candidates built in {time.perf_counter() - t0:.1f} s")
+    print(f"{'change':<16}{'updated':>11}{'incremental ms':>16}{'full ms':>10}{'same':>6}")
+    ok = True
+    version = base.version
+    for name, changed in _changes(raw):
+        version += 1
+        cfg = compile_config(changed, version, f"bench-{version}")
+        profiles._current = cfg
+        t0 = time.perf_counter()
+        store.rescorer.run(cfg)
+        inc_ms = (time.perf_counter() - t0) * 1000
+        full_ms, expected = _full(store, cfg)
+        same = _ranking(store, cfg) == expected
+        ok &= same
+        print(f"{name:<16}{store.rescorer.status()['updated']:>11}{inc_ms:>16.0f}{full_ms:>10.0f}{str(same):>6}")
+
+    # reads during a background run answer from the previous table
+    version += 1
+    changed = copy.deepcopy(raw)
+    changed["scoring"]["roles"]["data scientist"]["must"].append("docker")
+    cfg = compile_config(changed, version, f"bench-{version}")
+    prev = store.table().version
+    profiles._current = cfg
+    lat, versions = [], set()
+    store.rescorer.schedule()
+    while store.rescorer.running:
+        t0 = time.perf_counter()
+        table = store.table()
+        store.rank("data scientist", dict(table.cfg.weights), 50)
+        lat.append(time.perf_counter() - t0)
+        versions.add(table.version)
+    swapped = store.table().version == cfg.version
+    ok &= swapped and versions <= {prev, cfg.version}
+    if lat:
+        lat_ms = np.asarray(lat) * 1000
+        print(f"rank during background run: {len(lat)} reads, p50 {np.percentile(lat_ms, 50):.1f} ms, "
+              f"p99 {np.percentile(lat_ms, 99):.1f} ms, table versions seen {sorted(versions)}")
+    print(f"background run swapped to v{cfg.version}: {swapped}")
+    profiles._current = base
+    print("ok" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""Per-process vs host-shared state across N worker processes.
+
+    python -m bench.bench_shared [--workers 4] [--cvs 3000] [--requests 20000] [--pool 50000]
+
+Extraction cache: a Zipf-skewed trace of `requests` uploads over `cvs`
+distinct CVs is spread over `workers` processes at random, as a load balancer
+in front of `uvicorn --workers N` would. Each worker looks its uploads up
+and stores misses, once with only its own LRU (`--lru` entries) and once
+with the same LRU in front of a SharedCache. Reported: the overall hit rate
+and the memory of the workers (sum of USS, and PSS in which shared pages are
+split between their users).
+
+Candidate pool: `pool` records in SQLite are opened by every worker, once
+by decoding every row (per-process) and once by attaching to the shared
+snapshot; startup time, the first ranking and the memory are reported, and
+the rankings are compared.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench.synthetic import _SKILLS, synthetic_cv
+
+
+def _memory() -> dict:
+    """USS/PSS of this process in MB, from /proc/self/smaps_rollup."""
+    out = {"uss": 0.0, "pss": 0.0}
+    try:
+        with open("/proc/self/smaps_rollup") as fh:
+            for line in fh:
+                key, _, rest = line.partition(":")
+                kb = int(rest.split()[0]) if rest.split() and rest.split()[0].isdigit() else 0
+                if key in ("Private_Clean", "Private_Dirty"):
+                    out["uss"] += kb / 1024
+                elif key == "Pss":
+                    out["pss"] += kb / 1024
+    except OSError:
+        pass
+    return out
+
+
+def _cache_worker(keys, lru, shared_path, shared_mb, start, result):
+    from app.cache import ExtractionCache
+    from app.parser import simple_parse_cv
+    from app.shared import SharedCache
+
+    shared = SharedCache(shared_path, shared_mb) if shared_path else None
+    cache = ExtractionCache(lru, shared=shared)
+    base = _memory()
+    start.wait()
+    for k in keys:
+        if cache.get(f"{k:064x}") is None:
+            text = synthetic_cv(seed=k)
+            cache.put(f"{k:064x}", {"text": text, "parsed": simple_parse_cv(text)})
+    st = cache.stats()
+    result.put({"hits": sum(st["hits"].values()), "lookups": sum(st["hits"].values()) + st["misses"],
+                "base": base, "end": _memory()})
+
+
+def _pool_worker(db_path, shared_dir, roles, start, result):
+    from app import profiles
+    from app.candidates import CandidateStore
+
+    base = _memory()
+    start.wait()
+    t0 = time.perf_counter()
+    store = CandidateStore(db_path, shared_dir=shared_dir)
+    open_s = time.perf_counter() - t0
+    cfg = profiles.current()
+    t0 = time.perf_counter()
+    ranking = [[r["id"] for r in store.rank(role, dict(cfg.weights), 20)] for role in roles]
+    rank_s = time.perf_counter() - t0
+    result.put({"open_s": open_s, "rank_s": rank_s, "ranking": ranking, "base": base, "end": _memory()})
+
+
+def _run(target, per_worker, n) -> list[dict]:
+    ctx = mp.get_context("spawn")
+    start, result = ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=target, args=(*per_worker(i), start, result)) for i in range(n)]
+    for p in procs:
+        p.start()
+    time.sleep(1.0)  # let every worker import before the clock starts
+    start.set()
+    out = [result.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return out
+
+
+def _mem(rows, key) -> float:
+    return sum(r["end"][key] - r["base"][key] for r in rows)
+
+
+def _write_pool(db_path: str, n: int) -> None:
+    from app.candidates import build_record
+
+    rnd = random.Random(0)
+    db = sqlite3.connect(db_path)
+    db.execute("CREATE TABLE candidates (id TEXT PRIMARY KEY, payload TEXT NOT NULL)")
+    batch = []
+    for i in range(n):
+        record = build_record(f"c{i}", {
+            "name": f"Candidate {i}", "skills": rnd.sample(_SKILLS, rnd.randint(4, 10)),
+            "experience": [f"Engineer Jan {2010 + i % 12} - Present"],
+            "education": [rnd.choice(["BSc Computer Science", "MSc Statistics", "PhD Physics"])]})
+        batch.append((record["id"], json.dumps(record, ensure_ascii=False)))
+        if len(batch) == 5000:
+            db.executemany("INSERT INTO candidates VALUES (?, ?)", batch)
+            batch = []
+    db.executemany("INSERT INTO candidates VALUES (?, ?)", batch)
+    db.commit()
+    db.close()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--cvs", type=int, default=3000, help="distinct CVs in the upload trace")
+    ap.add_argument("--requests", type=int, default=20000, help="uploads in the trace")
+    ap.add_argument("--lru", type=int, default=256, help="per-process LRU entries")
+    ap.add_argument("--shared-mb", type=float, default=64)
+    ap.add_argument("--pool", type=int, default=50000, help="candidates in the SQLite pool")
+    args = ap.parse_args(argv)
+    tmp = tempfile.mkdtemp(prefix="bench-shared-")
+    ok = True
+    try:
+        rnd = np.random.default_rng(0)
+        trace = (rnd.zipf(1.1, args.requests * 2) - 1)
+        trace = trace[trace < args.cvs][:args.requests]
+        route = rnd.integers(0, args.workers, len(trace))
+        keys = [trace[route == w].tolist() for w in range(args.workers)]
+        print(f"extraction cache: {len(trace)} uploads of {len(set(trace.tolist()))} distinct CVs over {args.workers} workers")
+        print(f"{'mode':<14}{'hit rate':>9}{'USS MB':>9}{'PSS MB':>9}")
+        for mode in ("per-process", "shared"):
+            path = os.path.join(tmp, "extraction.cache") if mode == "shared" else None
+            rows = _run(_cache_worker, lambda w: (keys[w], args.lru, path, args.shared_mb), args.workers)
+            rate = sum(r["hits"] for r in rows) / max(1, sum(r["lookups"] for r in rows))
+            print(f"{mode:<14}{rate:>9.1%}{_mem(rows, 'uss'):>9.1f}{_mem(rows, 'pss'):>9.1f}")
+
+        db_path = os.path.join(tmp, "pool.sqlite")
+        t0 = time.perf_counter()
+        _write_pool(db_path, args.pool)
+        print(f"\ncandidate pool: {args.pool} records ({time.perf_counter() - t0:.1f} s to write)")
+        print(f"{'mode':<14}{'open s':>8}{'rank ms':>9}{'USS MB':>9}{'PSS MB':>9}")
+        from app.profiles import current
+        roles = list(current().roles)
+        rankings = {}
+        shared_dir = os.path.join(tmp, "shm")
+        os.makedirs(shared_dir)
+        for mode, directory in (("per-process", None), ("shared, new", shared_dir), ("shared", shared_dir)):
+            rows = _run(_pool_worker, lambda w: (db_path, directory, roles), args.workers)
+            rankings[mode] = [r["ranking"] for r in rows]
+            print(f"{mode:<14}{max(r['open_s'] for r in rows):>8.2f}{max(r['rank_s'] for r in rows) * 1000:>9.1f}"
+                  f"{_mem(rows, 'uss'):>9.1f}{_mem(rows, 'pss'):>9.1f}")
+        same = all(r == rankings["per-process"][0] for rs in rankings.values() for r in rs)
+        print("'shared, new' includes writing the snapshot (once per host, under a lock)")
+        print(f"same rankings: {same}")
+        ok &= same
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print("ok" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Cold start: import time, startup hooks and time to the first responses.
+
+    python -m bench.bench_startup [--runs 5] [--budget-ms 1500] [--wait 1.5]
+
+Every run is a fresh interpreter (`--child`) that imports app.main, runs the
+startup hooks, then times GET /health, GET /ui (plus its 304 revalidation)
+and, after `--wait` seconds of idle, the first PDF through POST /evaluate
+next to the same PDF once everything is warm.
+Runs alternate between pre-started extraction workers and the old
+spawn-on-first-upload behaviour so the difference shows in one table.
+
+Exits 1 when the median import exceeds `--budget-ms` or a PDF library is
+already loaded after importing app.main.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY = ("pdfplumber", "pdfminer", "PyPDF2", "pypdfium2")
+
+
+async def _child(prestart: bool, wait_s: float) -> dict:
+    t0 = time.perf_counter()
+    import app.main as m
+    import_ms = (time.perf_counter() - t0) * 1000
+    heavy = [mod for mod in HEAVY if mod in sys.modules]
+
+    from bench.load import asgi_call
+    from bench.micro import sample_pdfs
+
+    m.extraction_pool.prestart = prestart
+    t0 = time.perf_counter()
+    await m.app.router.startup()
+    startup_ms = (time.perf_counter() - t0) * 1000
+
+    async def timed(*args):
+        t = time.perf_counter()
+        status, body = await asgi_call(m.app, *args)
+        return status, (time.perf_counter() - t) * 1000
+
+    out = {"prestart": prestart, "import_ms": import_ms, "startup_ms": startup_ms, "heavy_modules": heavy}
+    _, out["health_ms"] = await timed("GET", "/health")
+    out["first_request_ms"] = import_ms + startup_ms + out["health_ms"]
+    _, out["ui_ms"] = await timed("GET", "/ui")
+    status, out["ui_304_ms"] = await timed("GET", "/ui", b"", (("if-none-match", m.ui_page.etag),))
+    out["ui_304"] = status == 304
+    _, out["openapi_ms"] = await timed("GET", "/openapi.json")
+
+    await asyncio.sleep(wait_s)  # a fresh replica usually idles a moment before traffic arrives
+    name, data = next(iter(sample_pdfs().items()))
+    path = f"/evaluate?filename={os.path.basename(name)}"
+    ctype = (("content-type", "application/pdf"),)
+    status, out["first_pdf_ms"] = await timed("POST", path, data, ctype)
+    out["first_pdf_status"] = status
+    # same document with a nonce (a cache miss): what the first request would cost warm
+    _, out["warm_pdf_ms"] = await timed("POST", path, data + b"\n%% bench-nonce\n", ctype)
+    await m.app.router.shutdown()
+    return out
+
+
+def _run_child(prestart: bool, wait_s: float) -> dict:
+    cmd = [sys.executable, "-m", "bench.bench_startup", "--child", "--wait", str(wait_s)]
+    if not prestart:
+        cmd.append("--no-prestart")
+    proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=1500, help="median import time allowed for app.main")
+    ap.add_argument("--wait", type=float, default=1.5, help="idle seconds between startup and the first PDF")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--no-prestart", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(asyncio.run(_child(not args.no_prestart, args.wait))))
+        return 0
+
+    runs = {True: [], False: []}
+    for _ in range(args.runs):
+        for prestart in (True, False):
+            runs[prestart].append(_run_child(prestart, args.wait))
+
+    keys = ("import_ms", "startup_ms", "health_ms", "first_request_ms", "ui_ms", "ui_304_ms", "openapi_ms",
+            "first_pdf_ms", "warm_pdf_ms")
+    print(f"{'median ms':<18}{'prestart':>10}{'on demand':>11}")
+    for k in keys:
+        on, off = (statistics.median(r[k] for r in runs[p]) for p in (True, False))
+        print(f"{k:<18}{on:>10.1f}{off:>11.1f}")
+
+    every = runs[True] + runs[False]
+    heavy = sorted({mod for r in every for mod in r["heavy_modules"]})
+    import_ms = statistics.median(r["import_ms"] for r in every)
+    ok = True
+    if heavy:
+        print(f"FAIL: imported by app.main: {', '.join(heavy)}")
+        ok = False
+    if import_ms > args.budget_ms:
+        print(f"FAIL: import app.main {import_ms:.0f} ms > budget {args.budget_ms:.0f} ms")
+        ok = False
+    if not all(r["ui_304"] for r in every):
+        print("FAIL: /ui did not answer If-None-Match with 304")
+        ok = False
+    if any(r["first_pdf_status"] != 200 for r in every):
+        print(f"FAIL: first PDF statuses {sorted({r['first_pdf_status'] for r in every})}")
+        ok = False
+    print("ok" if ok else "regression")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
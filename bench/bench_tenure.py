@@ -0,0 +1,77 @@
+"""Timing for the tenure engine (app.tenure).
+
+    python -m bench.bench_tenure [--n 5000] [--repeat 5]
+
+The pre-rewrite exp_years_from_lines vs the per-CV engine vs the batch path
+on synthetic experience sections, with how many CVs changed value (overlaps
+no longer summed). Correctness cases live in tests/test_tenure.py.
+"""
+import argparse
+import re
+import sys
+import time
+from typing import List
+
+from app.features import exp_months_batch, exp_months_from_lines
+from app.parser import simple_parse_cv
+from bench.synthetic import synthetic_cv
+
+
+def legacy_exp_years_from_lines(exper_lines: List[str]) -> float:
+    # verbatim copy of the implementation replaced in app/features.py
+    _months = {m.lower(): i for i,m in enumerate([
+        "", "Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"
+    ])}
+    text = " \n".join(exper_lines)
+    total_months = 0
+    # pattern A: 'Jul 2024 - Sep 2024'
+    range_pat = re.compile(r"([A-Za-z]{3})\s*(20\d{2}|19\d{2})\s*[-–]\s*([A-Za-z]{3})\s*(20\d{2}|19\d{2})")
+    for m1,y1,m2,y2 in range_pat.findall(text):
+        m1i = _months.get(m1.lower(), 1)
+        m2i = _months.get(m2.lower(), 1)
+        months = (int(y2)-int(y1))*12 + (m2i-m1i)
+        if months > 0:
+            total_months += months
+    # pattern B: '2022 - 2024'
+    yr_range = re.compile(r"(20\d{2}|19\d{2})\s*[-–]\s*(20\d{2}|19\d{2})")
+    for y1,y2 in yr_range.findall(text):
+        months = (int(y2)-int(y1))*12
+        if months>0:
+            total_months += months
+    # Fallback: if nothing parsed but there are experience bullets, assume 0.2y per bullet
+    if total_months == 0 and exper_lines:
+        total_months = max(0, len([l for l in exper_lines if l])) * 2  # ~2 months each
+    return round(total_months/12.0, 1)
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=5000, help="CVs timed")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    sections = [simple_parse_cv(synthetic_cv(jobs=i % 8, seed=i))["experience"] for i in range(args.n)]
+    legacy = _best(lambda: [legacy_exp_years_from_lines(s) for s in sections], args.repeat)
+    single = _best(lambda: [exp_months_from_lines(s) for s in sections], args.repeat)
+    batch = _best(lambda: exp_months_batch(sections), args.repeat)
+    changed = sum(legacy_exp_years_from_lines(s) != round(m / 12.0, 1)
+                  for s, m in zip(sections, exp_months_batch(sections).tolist()))
+    print(f"{args.n} synthetic experience sections")
+    print(f"  legacy exp_years_from_lines  {legacy * 1e6 / args.n:8.1f} us/cv")
+    print(f"  tenure, per CV               {single * 1e6 / args.n:8.1f} us/cv")
+    print(f"  tenure, months_batch         {batch * 1e6 / args.n:8.1f} us/cv")
+    print(f"  values changed vs legacy: {changed} (overlapping ranges now merged, more date forms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Cost of the scoring trace: off, sampled and requested, for /score and /score/batch.
+
+    python -m bench.bench_trace [--n 2000] [--repeat 7] [--budget-pct 2]
+
+`n` synthetic CVs (synthetic_cv -> simple_parse_cv) are scored the way the
+routes do it: one at a time (features_from_parsed + score_features, as
+/score) and all at once (features_batch + score_batch + rank_order, as
+/score/batch). Each variant adds what the route adds for tracing:
+
+  baseline   no trace code at all
+  off        the per-request check with trace.sample_rate = 0 (the default)
+  sampled    sample_rate 0.01 / 0.1: traces built and kept in the ring buffer
+  requested  a trace built for every CV
+
+Timings are the best of `repeat` runs, variants shuffled in every round. Run-to-run noise (a few
+percent) is larger than what "off" adds, so the off path is also timed on
+its own (the check /score runs per request, sample_many per /score/batch
+call) against the per-CV baseline. The exit code is 1 when that exceeds
+`budget-pct`, or when a trace disagrees with the score it explains (years,
+education level, matched keywords).
+"""
+import argparse
+import random
+import sys
+import time
+import timeit
+
+from app.parser import simple_parse_cv
+from app.profiles import current
+from app.scorer import features_batch, features_from_parsed, matched_keywords, rank_order, score_batch, score_features
+from app.trace import Tracer, explain, requested
+from bench.synthetic import synthetic_cv
+
+
+def _single(cvs, tracer: Tracer | None, trace_all: bool):
+    job = "data scientist"
+    weights = dict(current().weights)
+    for cv in cvs:
+        payload = {"cv": cv}
+        features = features_from_parsed(cv)
+        out = score_features(features, job, weights)
+        if tracer is None:
+            continue
+        wanted = trace_all or requested(payload.get("trace"))
+        sampled = not wanted and tracer.sample()
+        if wanted or sampled:
+            tracer.record({**explain(cv, features, job), "points": out["points"]}, "/score", sampled)
+
+
+def _batch(cvs, tracer: Tracer | None, trace_all: bool):
+    job = "data scientist"
+    weights = dict(current().weights)
+    feats = features_batch(cvs)
+    cols = score_batch(feats, job, weights)
+    rank_order(cols["weighted"], 50)
+    if tracer is None:
+        return
+    picked = range(len(feats)) if trace_all else tracer.sample_many(len(feats)).tolist()
+    for i in picked:
+        points = {k: int(cols[k][i]) for k in ("skills_points", "experience_points", "education_points", "total", "weighted")}
+        tracer.record({**explain(cvs[i], feats[i], job), "points": points}, "/score/batch", not trace_all)
+
+
+VARIANTS = {
+    "baseline": (None, False),
+    "off": (0.0, False),
+    "sampled 1%": (0.01, False),
+    "sampled 10%": (0.1, False),
+    "requested": (0.0, True),
+}
+
+
+def _check(cvs) -> int:
+    """Traces whose evidence disagrees with the features they explain."""
+    cfg = current()
+    bad = 0
+    for cv in cvs:
+        features = features_from_parsed(cv)
+        t = explain(cv, features, "data scientist", cfg)
+        keywords = {m["keyword"] for m in t["skills"]["matches"]}
+        bad += (t["experience"]["years"] != features["experience_years"]
+                or t["education"]["level"] != features["education_level"]
+                or keywords != matched_keywords(features["skills"], cfg))
+    return bad
+
+
+def _off_path_ns(n: int) -> tuple[float, float]:
+    """ns per /score request and per /score/batch call of `n` CVs spent on tracing when it is off."""
+    tracer, payload = Tracer(0.0), {"cv": {}}
+
+    def single():
+        wanted = requested(payload.get("trace"))
+        return not wanted and tracer.sample()
+
+    def batch():
+        wanted = requested(payload.get("trace"))
+        return () if wanted else tracer.sample_many(n)
+
+    loops = 200_000
+    return (min(timeit.repeat(single, number=loops, repeat=5)) / loops * 1e9,
+            min(timeit.repeat(batch, number=loops, repeat=5)) / loops * 1e9)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=2000, help="CVs scored per run")
+    ap.add_argument("--repeat", type=int, default=7, help="runs per variant (best is kept)")
+    ap.add_argument("--budget-pct", type=float, default=2.0, help="allowed cost of tracing when off")
+    args = ap.parse_args(argv)
+
+    cvs = [simple_parse_cv(synthetic_cv(jobs=1 + i % 6, seed=i)) for i in range(args.n)]
+    bad = _check(cvs)
+    print(f"{args.n} CVs; traces disagreeing with the score: {bad}")
+
+    ok = bad == 0
+    rnd = random.Random(0)
+    off_ns = dict(zip(("/score", "/score/batch"), _off_path_ns(args.n)))
+    for name, run in (("/score (one CV per call)", _single), ("/score/batch", _batch)):
+        best = {v: float("inf") for v in VARIANTS}
+        for _ in range(args.repeat):
+            for variant, (rate, trace_all) in rnd.sample(list(VARIANTS.items()), len(VARIANTS)):
+                tracer = None if rate is None else Tracer(rate, max_traces=200)
+                t0 = time.perf_counter()
+                run(cvs, tracer, trace_all)
+                best[variant] = min(best[variant], time.perf_counter() - t0)
+        base = best["baseline"]
+        print(f"\n{name}")
+        print(f"{'variant':<13}{'us/CV':>9}{'overhead':>10}")
+        for variant, secs in best.items():
+            print(f"{variant:<13}{secs / args.n * 1e6:>9.2f}{(secs / base - 1):>10.1%}")
+        per_trace = (best["requested"] - base) / args.n * 1e6
+        print(f"one trace: {per_trace:.1f} us")
+        route = name.split()[0]
+        per_cv_ns = off_ns[route] if run is _single else off_ns[route] / args.n
+        over = per_cv_ns / (base / args.n * 1e9) * 100
+        print(f"off path alone: {off_ns[route]:.0f} ns per request = {over:.3f}% of a CV's scoring "
+              f"(budget {args.budget_pct}%)")
+        ok &= over <= args.budget_pct
+    print("ok" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""In-process ASGI load generator for /upload and /score.
+
+Requests are driven straight into the ASGI app (no sockets), with a fixed
+number of concurrent clients, so numbers reflect the application itself:
+event-loop blocking, the extraction pool, parsing and serialization.
+"""
+import asyncio
+import itertools
+import time
+import urllib.parse
+import uuid
+
+import numpy as np
+
+WEIGHTS = {"skills": 0.5, "experience": 0.3, "education": 0.2}
+
+
+async def asgi_call(app, method: str, path: str, body: bytes = b"", headers=()) -> tuple[int, bytes]:
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers]
+                   + [(b"content-length", str(len(body)).encode()), (b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    done = asyncio.Event()
+    sent_body = False
+    status = 0
+    chunks: list[bytes] = []
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def multipart(filename: str, data: bytes) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def upload_request(files: list[tuple[str, bytes]], unique: bool):
+    """Factory of /upload calls cycling over `files`; `unique` defeats the extraction cache."""
+    counter = itertools.count()
+    cycle = itertools.cycle(files)
+
+    def make():
+        name, data = next(cycle)
+        if unique:
+            data = data + b"\n%% bench-nonce %d\n" % next(counter)
+        body, ctype = multipart(name, data)
+        return "POST", "/upload", body, (("content-type", ctype),)
+
+    return make
+
+
+def score_request(parsed: list[dict], job_title: str = "Data Scientist"):
+    import orjson
+
+    bodies = itertools.cycle([
+        orjson.dumps({"job_title": job_title, "weights": WEIGHTS, "cv": p}) for p in parsed
+    ])
+
+    def make():
+        return "POST", "/score", next(bodies), (("content-type", "application/json"),)
+
+    return make
+
+
+def ui_flow(files: list[tuple[str, bytes]], fused: bool, unique: bool, job_title: str = "Data Scientist"):
+    """The /ui page flow: /upload then /score with the parsed CV, or one /evaluate call."""
+    import orjson
+
+    counter = itertools.count()
+    cycle = itertools.cycle(files)
+
+    async def flow(app) -> int:
+        name, data = next(cycle)
+        if unique:
+            data = data + b"\n%% bench-nonce ui %d %d\n" % (fused, next(counter))
+        if fused:
+            # what /ui sends: the raw file, fields in the query string
+            path = f"/evaluate?filename={name}&job_title={urllib.parse.quote(job_title)}"
+            status, _ = await asgi_call(app, "POST", path, data, (("content-type", "application/pdf"),))
+            return status
+        body, ctype = multipart(name, data)
+        status, raw = await asgi_call(app, "POST", "/upload", body, (("content-type", ctype),))
+        if status >= 400:
+            return status
+        payload = orjson.dumps({"job_title": job_title, "weights": WEIGHTS, "cv": orjson.loads(raw)["parsed"]})
+        status, _ = await asgi_call(app, "POST", "/score", payload, (("content-type", "application/json"),))
+        return status
+
+    return lambda: flow
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    arr = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+    }
+
+
+async def run_scenario(app, streams: dict[str, tuple], duration_s: float) -> dict:
+    """streams: label -> (request factory, concurrency). All run together for `duration_s`.
+
+    A factory returns (method, path, body, headers), or an async `flow(app) -> status`
+    timed as one unit.
+    """
+    results = {label: ([], [0]) for label in streams}
+    deadline = time.perf_counter() + duration_s
+
+    async def client(label, make):
+        lat, errs = results[label]
+        while time.perf_counter() < deadline:
+            req = make()
+            t0 = time.perf_counter()
+            try:
+                if callable(req):
+                    status = await req(app)
+                else:
+                    status, _ = await asgi_call(app, *req)
+            except Exception:
+                status = 599
+            if status < 400:
+                lat.append(time.perf_counter() - t0)
+            else:
+                errs[0] += 1
+            # a request that never awaits real I/O would otherwise starve other clients
+            await asyncio.sleep(0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(label, make) for label, (make, conc) in streams.items() for _ in range(conc)))
+    elapsed = time.perf_counter() - t0
+    return {label: summarize(lat, errs[0], elapsed) for label, (lat, errs) in results.items()}
+
+
+async def run(duration_s: float = 5.0, concurrency: int = 8, unique_uploads: bool = True) -> dict:
+    from app.extract import extract_pdf
+    from app.main import admission, app
+    from app.parser import simple_parse_cv
+    from bench.micro import sample_pdfs
+
+    files = [(p.rsplit("/", 1)[-1], b) for p, b in sample_pdfs().items()]
+    parsed = [simple_parse_cv(extract_pdf(b).text) for _, b in files]
+    uploads = upload_request(files, unique_uploads)
+    scores = score_request(parsed)
+
+    # every request comes from one synthetic client: measure the app, not its rate limit
+    admission.enabled = False
+    await app.router.startup()
+    try:
+        await asgi_call(app, *uploads())  # warm the worker processes
+        out = {}
+        for label, streams in (
+            ("score", {"score": (scores, concurrency)}),
+            ("upload", {"upload": (uploads, concurrency)}),
+            ("mixed", {"upload": (uploads, concurrency), "score": (scores, max(1, concurrency // 2))}),
+            ("ui", {"two_step": (ui_flow(files, False, unique_uploads), concurrency)}),
+            ("ui", {"evaluate": (ui_flow(files, True, unique_uploads), concurrency)}),
+        ):
+            res = await run_scenario(app, streams, duration_s)
+            for route, summary in res.items():
+                out[f"{label}.{route}"] = summary
+        return out
+    finally:
+        await app.router.shutdown()
@@ -0,0 +1,58 @@
+"""Micro-benchmarks for the parser, feature and scorer functions and PDF backends."""
+import glob
+import statistics
+import timeit
+
+from app.extract import BACKENDS, extract_pdf
+from app.features import edu_level_from_text, exp_years_from_lines
+from app.parser import simple_parse_cv
+from app.scorer import features_from_parsed, matched_keywords, score_batch, score_features
+from bench.synthetic import synthetic_cv, synthetic_pdf
+
+WEIGHTS = {"skills": 0.5, "experience": 0.3, "education": 0.2}
+
+
+def measure(fn, min_time: float = 0.2, repeat: int = 5) -> dict:
+    """Median and best per-call time in ms; loop count auto-scaled to ~min_time per repeat."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    runs = [t / number * 1000 for t in timer.repeat(repeat=repeat, number=number)]
+    return {"unit": "ms", "better": "lower", "value": round(statistics.median(runs), 5),
+            "best": round(min(runs), 5), "loops": number}
+
+
+def sample_pdfs(pattern: str = "data/samples/*.pdf") -> dict[str, bytes]:
+    return {p: open(p, "rb").read() for p in sorted(glob.glob(pattern))}
+
+
+def run(jobs: int = 50, pages: int = 10, quick: bool = False) -> dict:
+    min_time = 0.05 if quick else 0.2
+    repeat = 3 if quick else 5
+    m = lambda fn: measure(fn, min_time, repeat)
+    out: dict[str, dict] = {}
+
+    samples = sample_pdfs()
+    texts = [extract_pdf(b).text for b in samples.values()]
+    long_cv = synthetic_cv(jobs=jobs, seed=1)
+    parsed_samples = [simple_parse_cv(t) for t in texts]
+    parsed_long = simple_parse_cv(long_cv)
+
+    out["parse.samples"] = m(lambda: [simple_parse_cv(t) for t in texts])
+    out[f"parse.synthetic_{jobs}_jobs"] = m(lambda: simple_parse_cv(long_cv))
+    out["exp_years.samples"] = m(lambda: [exp_years_from_lines(p["experience"]) for p in parsed_samples])
+    out[f"exp_years.synthetic_{jobs}_jobs"] = m(lambda: exp_years_from_lines(parsed_long["experience"]))
+    out["edu_level.samples"] = m(lambda: [edu_level_from_text(p["education"]) for p in parsed_samples])
+    out["match.samples"] = m(lambda: [matched_keywords(p["skills"]) for p in parsed_samples])
+
+    feats = [features_from_parsed(p) for p in parsed_samples]
+    out["score.single"] = m(lambda: score_features(feats[0], "data scientist", WEIGHTS))
+    pool = (feats * (1000 // len(feats) + 1))[:1000]
+    out["score.batch_1000"] = m(lambda: score_batch(pool, "data scientist", WEIGHTS))
+
+    synthetic = synthetic_pdf(synthetic_cv(jobs=pages * 6, seed=2))
+    for name, fn in BACKENDS.items():
+        out[f"extract.{name}.samples"] = m(lambda fn=fn: [fn(b) for b in samples.values()])
+        out[f"extract.{name}.synthetic"] = m(lambda fn=fn: fn(synthetic))
+    out["extract.auto.samples"] = m(lambda: [extract_pdf(b) for b in samples.values()])
+    return out
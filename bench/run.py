@@ -0,0 +1,116 @@
+"""Run the micro and load benchmarks, write JSON, optionally gate on a baseline.
+
+    python -m bench.run -o bench/results/latest.json
+    python -m bench.run --baseline bench/results/baseline.json --threshold 0.25
+
+With --baseline, every metric present in both runs is compared in its
+"better" direction; the process exits 1 if any regresses by more than
+--threshold (relative). --save-baseline copies this run to the baseline path.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return ""
+
+
+def flatten_load(load: dict) -> dict:
+    out = {}
+    for key, summary in load.items():
+        for field, better in (("throughput_rps", "higher"), ("p50_ms", "lower"),
+                              ("p95_ms", "lower"), ("p99_ms", "lower")):
+            out[f"load.{key}.{field}"] = {"unit": field.rsplit("_", 1)[-1], "better": better,
+                                          "value": summary[field]}
+        out[f"load.{key}.errors"] = {"unit": "count", "better": "lower", "value": summary["errors"]}
+    return out
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for key, cur in current.items():
+        base = baseline.get(key)
+        if not base or not base.get("value"):
+            continue
+        ratio = cur["value"] / base["value"]
+        worse = ratio > 1 + threshold if cur["better"] == "lower" else ratio < 1 - threshold
+        if worse:
+            regressions.append(f"{key}: {base['value']} -> {cur['value']} ({(ratio - 1) * 100:+.1f}%)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("-o", "--output", default="bench/results/latest.json")
+    ap.add_argument("--suite", choices=["all", "micro", "load"], default="all")
+    ap.add_argument("--jobs", type=int, default=50, help="experience entries in the synthetic CV")
+    ap.add_argument("--pages", type=int, default=10, help="pages in the synthetic PDF")
+    ap.add_argument("--duration", type=float, default=5.0, help="seconds per load scenario")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--cache-hits", action="store_true", help="reuse identical uploads (cache path)")
+    ap.add_argument("--quick", action="store_true", help="shorter micro timing loops")
+    ap.add_argument("--baseline")
+    ap.add_argument("--threshold", type=float, default=0.25)
+    ap.add_argument("--save-baseline", action="store_true")
+    args = ap.parse_args(argv)
+
+    results: dict[str, dict] = {}
+    if args.suite in ("all", "micro"):
+        from bench import micro
+
+        results.update({f"micro.{k}": v for k, v in micro.run(args.jobs, args.pages, args.quick).items()})
+    if args.suite in ("all", "load"):
+        from bench import load
+
+        results.update(flatten_load(asyncio.run(load.run(args.duration, args.concurrency, not args.cache_hits))))
+
+    doc = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(doc, fh, indent=2)
+
+    width = max(map(len, results), default=0)
+    for key, r in results.items():
+        print(f"{key:<{width}}  {r['value']:>12} {r['unit']}")
+    print(f"\nwrote {args.output}")
+
+    status = 0
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(results, json.load(fh)["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            status = 1
+        else:
+            print(f"no regressions beyond {args.threshold:.0%} vs {args.baseline}")
+    if args.save_baseline and args.baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"saved baseline {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Deterministic synthetic CV text for benchmarks."""
+import random
+
+_SKILLS = [
+    "Python", "SQL", "Pandas", "NumPy", "scikit-learn", "TensorFlow", "PyTorch", "Docker",
+    "Kubernetes", "Java", "Go", "Node.js", "REST APIs", "Django", "FastAPI", "Excel",
+    "Power BI", "Tableau", "Statistics", "Machine Learning", "Redis", "Spring",
+]
+_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+_TITLES = ["Data Analyst", "Backend Developer", "ML Engineer", "Business Analyst", "Software Engineer"]
+_DEGREES = [
+    "Bachelor of Science, Computer Engineering", "MSc Data Science",
+    "Yüksek Lisans, İstatistik", "PhD Computer Science", "Lise",
+]
+
+
+def synthetic_cv(jobs: int = 5, bullets: int = 4, seed: int = 0) -> str:
+    """CV text with `jobs` experience entries of `bullets` lines each."""
+    rnd = random.Random(seed)
+    out = [
+        "Ayşe Yılmaz",
+        "ayse.yilmaz@example.com",
+        "+90 532 123 45 67",
+        "",
+        "SUMMARY",
+        "Engineer with a focus on data platforms.",
+        "",
+        "SKILLS",
+        ", ".join(rnd.sample(_SKILLS, 8)),
+        " • ".join(rnd.sample(_SKILLS, 5)),
+        "",
+        "EDUCATION",
+    ]
+    for _ in range(2):
+        out += [f"{rnd.randint(2005, 2024)} {rnd.choice(_DEGREES)}", "Istanbul Technical University", ""]
+    out.append("WORK EXPERIENCE")
+    year = 2024
+    for _ in range(jobs):
+        y1 = year - rnd.randint(1, 3)
+        if rnd.random() < 0.5:
+            out.append(f"{rnd.choice(_MONTHS)} {y1} - {rnd.choice(_MONTHS)} {year} {rnd.choice(_TITLES)}, Acme")
+        else:
+            out.append(f"{y1} - {year} {rnd.choice(_TITLES)}, Acme")
+        out += [f"Built and maintained pipeline #{i} with {rnd.choice(_SKILLS)}" for i in range(bullets)]
+        out.append("")
+        year = y1
+    out += ["PROJECTS", "CV Evaluation Engine", "", "LANGUAGES", "English, Turkish"]
+    return "\n".join(out)
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _write_pdf(streams: list[bytes], fonts: list[str]) -> bytes:
+    """PDF with one content stream per page (A4) and WinAnsi Type1 fonts /F1.. in order."""
+    objs: list[bytes] = []
+
+    def add(body: bytes) -> int:
+        objs.append(body)
+        return len(objs)
+
+    add(b"")  # 1: catalog, filled in below
+    add(b"")  # 2: page tree
+    font_ids = [add(b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % f.encode())
+                for f in fonts]
+    resources = b" ".join(b"/F%d %d 0 R" % (i, fid) for i, fid in enumerate(font_ids, 1))
+    kids = []
+    for stream in streams:
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << %s >> >> /Contents %d 0 R >>" % (resources, content)
+        ))
+    objs[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objs[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    return bytes(out)
+
+
+def synthetic_pdf(text: str, lines_per_page: int = 50) -> bytes:
+    """Minimal single-column PDF (Helvetica, WinAnsi) with one text line per row.
+
+    Characters outside Latin-1 are replaced, which is fine for timing runs.
+    """
+    lines = text.splitlines() or [""]
+    streams = []
+    for start in range(0, len(lines), lines_per_page):
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"]
+        for ln in lines[start:start + lines_per_page]:
+            ops.append(f"({_pdf_escape(ln)}) Tj T*")
+        ops.append("ET")
+        streams.append("\n".join(ops).encode("latin-1", errors="replace"))
+    return _write_pdf(streams, ["Helvetica"])
+
+
+def two_column_pdf(jobs: int = 3, bullets: int = 3, seed: int = 0) -> tuple[bytes, dict]:
+    """One-page sidebar CV and what a parser should find in it.
+
+    Name and contact run across the page; below them a narrow left column
+    (skills, languages, interests) sits next to the main column (experience,
+    education). Both columns are written row by row, as table-based CV
+    templates do, so flat text interleaves them. Section headers are 12 pt
+    bold, body text 10 pt; INTERESTS is outside the parser's header words.
+    """
+    rnd = random.Random(seed)
+    skills = rnd.sample(_SKILLS, 8)
+    left = [("SKILLS", True)] + [(s, False) for s in skills] + [None]
+    left += [("LANGUAGES", True), ("English", False), ("Turkish", False), None]
+    left += [("INTERESTS", True), ("Chess", False), ("Hiking", False)]
+    right = [("WORK EXPERIENCE", True)]
+    year, months = 2024, 0
+    for _ in range(jobs):
+        y1 = year - rnd.randint(1, 3)
+        right.append((f"Jan {y1} - Jan {year} {rnd.choice(_TITLES)}, Acme", False))
+        right += [(f"Built and maintained pipeline #{i} for reporting", False) for i in range(bullets)]
+        right.append(None)
+        months += (year - y1) * 12
+        year = y1 - 1
+    right += [("EDUCATION", True), (f"{year} {rnd.choice(_DEGREES[:2])}", False), ("Istanbul Technical University", False)]
+
+    def placed(lines, x):
+        y, out = 720.0, []
+        for ln in lines:
+            if ln is None:
+                y -= 10
+                continue
+            text, header = ln
+            out.append((y, x, text, header))
+            y -= 16 if header else 14
+        return out
+
+    ops = ["BT /F2 20 Tf 40 790 Td (Deniz Arslan) Tj ET",
+           "BT /F1 10 Tf 40 770 Td (deniz.arslan@example.com | +90 532 765 43 21 | Istanbul) Tj ET"]
+    for y, x, text, header in sorted(placed(left, 40) + placed(right, 230), key=lambda r: (-r[0], r[1])):
+        font = "/F2 12 Tf" if header else "/F1 10 Tf"
+        ops.append(f"BT {font} {x} {y:.0f} Td ({_pdf_escape(text)}) Tj ET")
+    pdf = _write_pdf(["\n".join(ops).encode("latin-1", errors="replace")], ["Helvetica", "Helvetica-Bold"])
+    return pdf, {"name": "Deniz Arslan", "skills": skills, "experience_months": months, "jobs": jobs}
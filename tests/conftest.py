@@ -0,0 +1,29 @@
+import copy
+
+import pytest
+
+from app import profiles
+from app.settings import CONFIG_PATH, parse_yaml
+
+
+@pytest.fixture
+def raw_config() -> dict:
+    """app/config.yaml as parsed, safe to modify."""
+    with open(CONFIG_PATH, "rb") as fh:
+        return copy.deepcopy(parse_yaml(fh.read()))
+
+
+@pytest.fixture
+def use_config(monkeypatch):
+    """Install a raw config as the active scoring config (not published to other workers)."""
+    versions = iter(range(1, 1000))
+    monkeypatch.setattr(profiles, "_doc", None)
+    monkeypatch.setattr(profiles, "_doc_ready", True)
+
+    def install(raw: dict) -> profiles.ScoringConfig:
+        version = next(versions)
+        cfg = profiles.compile_config(raw, version, f"test-{version}")
+        monkeypatch.setattr(profiles, "_current", cfg)
+        return cfg
+
+    return install
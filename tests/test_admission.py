@@ -0,0 +1,83 @@
+import asyncio
+import sqlite3
+import time
+
+from app.admission import Admission, AdmissionMiddleware, SqliteBucketStore
+
+
+def test_locked_sqlite_falls_back_instead_of_waiting(tmp_path):
+    path = str(tmp_path / "buckets.sqlite")
+    store = SqliteBucketStore(path, busy_timeout_ms=20)
+    other = sqlite3.connect(path, isolation_level=None)
+    try:
+        other.execute("BEGIN IMMEDIATE")  # another worker holding the write lock
+        t0 = time.perf_counter()
+        assert store.take("ip:1", 1, 1, rate=10, burst=5) == 0.0
+        assert time.perf_counter() - t0 < 0.5
+        assert store.fallbacks == 1
+        other.execute("ROLLBACK")
+        assert store.take("ip:1", 1, 1, rate=10, burst=5) == 0.0
+        assert store.fallbacks == 1
+    finally:
+        other.close()
+        store.close()
+
+
+def test_charge_is_written_by_the_writer_thread(tmp_path):
+    path = str(tmp_path / "buckets.sqlite")
+    store = SqliteBucketStore(path)
+    store.charge("ip:1", 1000, rate=0.001, burst=5)
+    store.close()  # drains the writer
+    store = SqliteBucketStore(path)
+    try:
+        assert store.take("ip:1", 1, 1, rate=0.001, burst=5) > 0  # still in debt
+    finally:
+        store.close()
+
+
+class _SlowStore:
+    """A bucket store whose calls block like a contended SQLite write."""
+
+    blocking = True
+
+    def take(self, client, need, cost, rate, burst):
+        time.sleep(0.3)
+        return 0.0
+
+    def charge(self, client, amount, rate, burst):
+        pass
+
+    def clients(self):
+        return 0
+
+
+def test_middleware_does_not_block_the_event_loop():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def scenario():
+        mw = AdmissionMiddleware(app, Admission(store=_SlowStore()))
+        scope = {"type": "http", "method": "POST", "path": "/score", "headers": [], "client": ("1.2.3.4", 1)}
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        gaps, last = [], time.perf_counter()
+
+        async def heartbeat():
+            nonlocal last
+            while True:
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        beat = asyncio.ensure_future(heartbeat())
+        await asyncio.gather(*(mw(scope, None, send) for _ in range(4)))
+        beat.cancel()
+        assert [m["status"] for m in sent if m["type"] == "http.response.start"] == [200] * 4
+        assert max(gaps) < 0.2
+
+    asyncio.run(scenario())
@@ -0,0 +1,113 @@
+import asyncio
+import itertools
+import sqlite3
+
+import pytest
+
+from app import cache
+from app.cache import PRUNE_EVERY, ExtractionCache, extraction_version
+
+BACKENDS = ("pdfium", "pdfplumber", "pypdf2")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """time.time() as seen by app.cache: one second further on every call."""
+    ticks = itertools.count(1_700_000_000)
+    monkeypatch.setattr(cache.time, "time", lambda: float(next(ticks)))
+    return ticks
+
+
+def _rows(path) -> list[tuple[str, str]]:
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT key, version FROM extraction ORDER BY at").fetchall()
+
+
+def test_version_follows_extraction_settings():
+    base = extraction_version(BACKENDS, 50, 200_000)
+    assert base.startswith(cache.PARSER_VERSION)
+    assert len({
+        base,
+        extraction_version(BACKENDS, 10, 200_000),
+        extraction_version(BACKENDS, 50, 1000),
+        extraction_version(BACKENDS, None, 200_000),
+        extraction_version(("pdfplumber", "pdfium", "pypdf2"), 50, 200_000),
+        extraction_version(("layout", *BACKENDS), 50, 200_000),
+    }) == 6
+    assert extraction_version(BACKENDS, None, None) == extraction_version(BACKENDS, 0, 0)
+
+
+def test_entries_of_other_settings_are_misses(tmp_path):
+    path = str(tmp_path / "extraction.sqlite")
+    old = ExtractionCache(0, path, extraction_version(BACKENDS, 50, 200_000))
+    old.put("k", {"text": "full", "parsed": {}})
+    new = ExtractionCache(0, path, extraction_version(BACKENDS, 1, 200_000))
+    assert new.get("k") is None
+    assert ExtractionCache(0, path, old.version).get("k") == {"text": "full", "parsed": {}}
+
+
+def test_disk_rows_are_capped(tmp_path, clock):
+    path = str(tmp_path / "extraction.sqlite")
+    store = ExtractionCache(0, path, "v", db_max_entries=10, db_max_age_days=0)
+    for i in range(3 * PRUNE_EVERY + 5):
+        store.put(f"k{i}", {"i": i})
+        assert len(_rows(path)) <= 10 + PRUNE_EVERY
+    ExtractionCache(0, path, "v", db_max_entries=10, db_max_age_days=0)  # prunes on open
+    assert [k for k, _ in _rows(path)] == [f"k{i}" for i in range(3 * PRUNE_EVERY - 5, 3 * PRUNE_EVERY + 5)]
+
+
+def test_other_versions_are_evicted_first(tmp_path, clock):
+    path = str(tmp_path / "extraction.sqlite")
+    old = ExtractionCache(0, path, "old", db_max_entries=0, db_max_age_days=0)
+    new = ExtractionCache(0, path, "new", db_max_entries=0, db_max_age_days=0)
+    for i in range(4):
+        new.put(f"n{i}", {})
+        old.put(f"o{i}", {})  # newer than the "new" rows
+    ExtractionCache(0, path, "new", db_max_entries=5, db_max_age_days=0)
+    assert sorted(_rows(path)) == [("n0", "new"), ("n1", "new"), ("n2", "new"), ("n3", "new"), ("o3", "old")]
+
+
+def test_expired_rows_are_dropped(tmp_path, clock):
+    path = str(tmp_path / "extraction.sqlite")
+    store = ExtractionCache(0, path, "v", db_max_age_days=1)
+    store.put("stale", {})
+    next(itertools.islice(clock, 86400, None))  # a day later
+    store.put("fresh", {})
+    reopened = ExtractionCache(0, path, "v", db_max_age_days=1)
+    assert [k for k, _ in _rows(path)] == ["fresh"]
+    assert reopened.get("stale") is None
+    assert reopened.stats()["disk_pruned"] == 1
+
+
+def test_files_without_timestamps_are_upgraded(tmp_path):
+    path = str(tmp_path / "extraction.sqlite")
+    with sqlite3.connect(path) as db:
+        db.execute("CREATE TABLE extraction (key TEXT PRIMARY KEY, version TEXT NOT NULL, payload TEXT NOT NULL)")
+        db.execute("INSERT INTO extraction VALUES ('k', '3', '{}')")
+    store = ExtractionCache(0, path, "v", db_max_age_days=30)
+    assert _rows(path) == []  # undated rows count as expired
+    store.put("k", {"text": "x"})
+    assert store.get("k") == {"text": "x"}
+
+
+def test_async_calls_leave_the_loop_only_for_sqlite(tmp_path, monkeypatch):
+    path = str(tmp_path / "extraction.sqlite")
+    ExtractionCache(0, path, "v").put("disk", {"text": "d"})
+    store = ExtractionCache(4, path, "v")
+    offloaded = []
+    to_thread = asyncio.to_thread
+
+    async def spy(fn, *args):
+        offloaded.append((fn.__name__, args[0]))
+        return await to_thread(fn, *args)
+
+    monkeypatch.setattr(cache.asyncio, "to_thread", spy)
+
+    async def calls():
+        await store.aput("new", {"text": "n"})
+        return [await store.aget(key) for key in ("new", "disk", "disk", "none")]
+
+    assert asyncio.run(calls()) == [{"text": "n"}, {"text": "d"}, {"text": "d"}, None]
+    assert offloaded == [("_write", "new"), ("_stored", "disk"), ("_stored", "none")]
+    assert sorted(_rows(path)) == [("disk", "v"), ("new", "v")]
+    assert store.stats()["hits"] == {"memory": 2, "shared": 0, "disk": 1} and store.stats()["misses"] == 1
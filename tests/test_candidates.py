@@ -0,0 +1,138 @@
+import random
+
+import numpy as np
+import pytest
+
+from app import candidates, tenure
+from app.candidates import CandidateStore, ScoreTable, build_record
+from app.tenure import month_index
+
+SKILLS = ["Python", "SQL", "Pandas", "NumPy", "Docker", "Kubernetes", "Java", "Go", "Django", "Excel",
+          "Tableau", "Statistics", "Machine Learning", "Redis", "Spark", "Rust"]
+
+
+def _cv(i: int) -> dict:
+    rnd = random.Random(i)
+    return {"name": f"Candidate {i}", "skills": rnd.sample(SKILLS, rnd.randint(2, 8)),
+            "experience": [f"Engineer Jan {2010 + i % 12} - Dec 2021"],
+            "education": [rnd.choice(["BSc Computer Science", "MSc Statistics", "PhD Physics", "Lise"])]}
+
+
+def _same(table: ScoreTable, ref: ScoreTable) -> None:
+    assert table.ids == ref.ids
+    assert table.names == ref.names
+    assert table.row_map() == ref.row_map()
+    np.testing.assert_array_equal(table.years, ref.years)
+    np.testing.assert_array_equal(table.open, ref.open)
+    np.testing.assert_array_equal(table.levels, ref.levels)
+    np.testing.assert_array_equal(table.edu_points(), ref.edu_points())
+    assert table.hits.keys() == ref.hits.keys()
+    for role, (must, nice) in ref.hits.items():
+        np.testing.assert_array_equal(table.hits[role][0], must)
+        np.testing.assert_array_equal(table.hits[role][1], nice)
+
+
+@pytest.fixture
+def cfg(raw_config, use_config):
+    return use_config(raw_config)
+
+
+@pytest.fixture
+def built(monkeypatch):
+    """Records read by ScoreTable.__init__, per call."""
+    calls = []
+    init = ScoreTable.__init__
+
+    def counting(self, records, cfg, trusted=None):
+        records = list(records)
+        calls.append(len(records))
+        init(self, records, cfg, trusted)
+
+    monkeypatch.setattr(ScoreTable, "__init__", counting)
+    return calls
+
+
+def test_adds_and_removes_are_patched_into_the_table(cfg, built):
+    store = CandidateStore()
+    for i in range(200):
+        store.add(f"c{i}", _cv(i))
+    first = store.table()
+    first_ids = list(first.ids)
+    edu = first.edu_points().copy()
+    assert built == [200]
+
+    for i in range(200, 230):
+        store.add(f"c{i}", _cv(i))
+    for cid in ("c3", "c150", "c205"):
+        store.remove(cid)
+    store.add("c10", _cv(1010))  # re-added: new values, moved to the end
+    store.add("c3", _cv(3))      # removed, then back
+    table = store.table()
+
+    assert built[1:] == [31]  # only the 29 new and 2 re-added records were read
+    _same(table, ScoreTable(list(store._records.values()), cfg))
+    assert table.ids[-2:] == ["c10", "c3"] and "c150" not in table.row_map()
+    assert first.ids == first_ids  # the published table is untouched
+    np.testing.assert_array_equal(first.edu_points(), edu)
+    assert store.table() is table
+
+
+def test_patched_ranking_matches_a_fresh_pool(cfg, tmp_path):
+    path = str(tmp_path / "pool.sqlite")
+    store = CandidateStore(path)
+    for i in range(100):
+        store.add(f"c{i}", _cv(i))
+    store.table()
+    for i in range(100, 140):
+        store.add(f"c{i}", _cv(i))
+        if i % 3 == 0:
+            store.remove(f"c{i - 50}")
+        if i % 10 == 0:
+            store.table()
+    weights = dict(cfg.weights)
+    reopened = CandidateStore(path)
+    for role in cfg.roles:
+        assert store.rank(role, weights) == reopened.rank(role, weights)
+
+
+
+@pytest.fixture
+def month(monkeypatch):
+    """Set the current month seen by app.tenure and app.candidates."""
+    def set_month(year: int, mon: int) -> None:
+        now = month_index(year, mon)
+        monkeypatch.setattr(tenure, "today_index", lambda today=None: now)
+        monkeypatch.setattr(candidates, "today_index", lambda today=None: now)
+    return set_month
+
+
+def test_open_ranges_keep_growing_after_the_add(cfg, month, tmp_path):
+    cvs = {
+        "open": {"name": "O", "skills": ["Python"], "experience": ["Jan 2022 - Present"], "education": []},
+        "mixed": {"name": "M", "skills": ["Python"], "education": [],
+                  "experience": ["Jan 2015 - Jan 2017", "Jun 2016 - Jun 2018", "Mar 2023 - Halen"]},
+        "closed": {"name": "C", "skills": ["Python"], "experience": ["Jan 2018 - Jan 2024"], "education": []},
+        "future": {"name": "F", "skills": ["Python"], "experience": ["Jan 2026 - Present"], "education": []},
+    }
+    month(2024, 1)
+    path, index_path = str(tmp_path / "pool.sqlite"), str(tmp_path / "skills.idx")
+    store = CandidateStore(path, index_path)
+    for cid, cv in cvs.items():
+        store.add(cid, cv)
+    store.table()
+    store.save_index()
+    weights = dict(cfg.weights)
+
+    month(2027, 7)
+    fresh = {cid: build_record(cid, cv, cfg) for cid, cv in cvs.items()}
+    assert [fresh[c]["experience_years"] for c in cvs] == [5.5, 7.8, 6.0, 1.5]
+    reopened = CandidateStore(path, index_path)
+    assert reopened.index.digest == cfg.digest  # the saved index was loaded, not rebuilt
+    for pool in (store, reopened):
+        assert {c: pool.view(c)["experience_years"] for c in cvs} == {c: r["experience_years"] for c, r in fresh.items()}
+        ref = CandidateStore()
+        for cid, cv in cvs.items():
+            ref.add(cid, cv)
+        assert pool.rank("data scientist", weights) == ref.rank("data scientist", weights)
+        assert sorted(pool.search(min_years=5.5)) == ["closed", "mixed", "open"]
+        assert sorted(pool.search(min_years=1.5)) == sorted(cvs)
@@ -0,0 +1,91 @@
+import itertools
+
+import pytest
+
+from app import dedup
+from app.dedup import DedupIndex, DedupPolicy, decode, encode, fingerprint, shingle_hashes, similarity
+from bench.synthetic import synthetic_cv
+
+BASE = synthetic_cv(jobs=5, seed=1)
+EDITS = [
+    BASE.replace("+90 532 123 45 67", "+90 555 987 65 43"),
+    BASE.replace("WORK EXPERIENCE", "WORK EXPERIENCE\nLed the migration to Kubernetes across three teams"),
+    BASE.replace("\n", "  \n").replace("SUMMARY", "Summary"),  # a re-export: case and spacing change, words do not
+]
+OTHERS = [synthetic_cv(jobs=5, seed=s) for s in range(2, 12)] + [synthetic_cv(jobs=8, seed=40)]
+
+
+def _jaccard(a: str, b: str) -> float:
+    x, y = set(shingle_hashes(a).tolist()), set(shingle_hashes(b).tolist())
+    return len(x & y) / len(x | y)
+
+
+def test_estimate_follows_jaccard():
+    texts = [BASE, *EDITS, *OTHERS[:4]]
+    for a, b in itertools.combinations(texts, 2):
+        assert abs(similarity(fingerprint(a), fingerprint(b)) - _jaccard(a, b)) < 0.15
+    assert similarity(fingerprint(BASE), fingerprint(EDITS[2])) == 1.0
+
+
+def test_edited_copies_are_found_other_people_are_not():
+    index = DedupIndex.build([(f"o{i}", fingerprint(t)) for i, t in enumerate(OTHERS)] + [("base", fingerprint(BASE))])
+    for text in EDITS:
+        hits = index.near(fingerprint(text))
+        assert [cid for cid, _ in hits] == ["base"] and hits[0][1] >= 0.85
+    for i, text in enumerate(OTHERS):
+        assert index.near(fingerprint(text), exclude=f"o{i}") == []
+
+
+def test_threshold_is_applied_to_the_estimate():
+    fp, edited = fingerprint(BASE), fingerprint(EDITS[0])
+    sim = similarity(fp, edited)
+    for min_similarity, found in [(0.5, True), (sim, True), (sim + 0.01, False), (1.0, False)]:
+        index = DedupIndex(min_similarity)
+        index.add("base", fp)
+        assert bool(index.near(edited)) == found, min_similarity
+    assert DedupIndex(1.0).near(fp) == []
+    exact = DedupIndex(1.0)
+    exact.add("base", fp)
+    assert exact.near(fp) == [("base", 1.0)]
+
+
+def test_added_removed_and_replaced_ids(monkeypatch):
+    monkeypatch.setattr(dedup, "_MERGE_AT", 3)  # exercise both the sorted arrays and the tails
+    index = DedupIndex()
+    for i, text in enumerate(OTHERS):
+        index.add(f"o{i}", fingerprint(text))
+    index.add("base", fingerprint(BASE))
+    assert [cid for cid, _ in index.near(fingerprint(EDITS[1]))] == ["base"]
+    assert index.near(fingerprint(BASE), exclude="base") == []
+    index.add("base", fingerprint(OTHERS[0]))  # re-uploaded under the same id
+    assert index.near(fingerprint(EDITS[1])) == []
+    assert sorted(cid for cid, _ in index.near(fingerprint(OTHERS[0]))) == ["base", "o0"]
+    assert index.remove("o0") and not index.remove("o0")
+    assert [cid for cid, _ in index.near(fingerprint(OTHERS[0]))] == ["base"]
+    assert len(index) == len(OTHERS) and index.stats()["doc_ids"] == len(OTHERS) + 2
+
+
+def test_fingerprint_encoding():
+    fp = fingerprint(BASE)
+    assert len(fp) == dedup.FINGERPRINT_BYTES and decode(encode(fp)) == fp
+    assert fingerprint("") is None and fingerprint(" • , ") is None
+    assert encode(None) is None and decode(None) is None and decode("") is None
+    assert decode("not base64!") is None and decode(encode(fp[:-1])) is None
+
+
+@pytest.mark.parametrize("min_similarity", [0, -0.1, 1.01])
+def test_min_similarity_must_be_a_fraction(min_similarity):
+    with pytest.raises(ValueError):
+        DedupIndex(min_similarity)
+
+
+def _section(monkeypatch, block: dict) -> None:
+    monkeypatch.setattr(dedup, "config_section", lambda name, defaults: {**defaults, **block})
+
+
+def test_policy_rejects_unknown_actions(monkeypatch):
+    _section(monkeypatch, {"min_similarity": 0.9, "action": "flag"})
+    assert DedupPolicy.from_config() == DedupPolicy(True, 0.9, "flag")
+    _section(monkeypatch, {"action": "drop"})
+    with pytest.raises(ValueError):
+        DedupPolicy.from_config()
@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+
+from app.jobs import FairScheduler, JobQueueFull, JobRunner, MemoryJobStore, RetryLater, SqliteJobStore
+
+
+class Upload:
+    def __init__(self, size: int = 100):
+        self.size = size
+        self.cleaned = False
+
+    def cleanup(self):
+        self.cleaned = True
+
+
+async def _drain(sched: FairScheduler, n: int, release: bool = True) -> list[str]:
+    order = []
+    for _ in range(n):
+        lane, item = await sched.take()
+        order.append(item)
+        if release:
+            await sched.release(lane)
+    return order
+
+
+def test_small_burst_gives_the_large_lane_a_turn():
+    async def scenario():
+        sched = FairScheduler(large_slots=1, small_burst=3)
+        for i in range(8):
+            await sched.submit("small", f"s{i}")
+        for i in range(3):
+            await sched.submit("large", f"L{i}")
+        return await _drain(sched, 11)
+
+    assert asyncio.run(scenario()) == ["s0", "s1", "s2", "L0", "s3", "s4", "s5", "L1", "s6", "s7", "L2"]
+
+
+def test_large_lane_is_capped_at_large_slots():
+    async def scenario():
+        sched = FairScheduler(large_slots=2, small_burst=1)
+        for i in range(4):
+            await sched.submit("large", f"L{i}")
+        running = await _drain(sched, 2, release=False)
+        waiting = asyncio.ensure_future(sched.take())
+        await asyncio.sleep(0.01)
+        assert not waiting.done() and sched.running == {"small": 0, "large": 2}
+        await sched.submit("small", "s0")  # small jobs still run while the large slots are taken
+        assert await asyncio.wait_for(waiting, 1) == ("small", "s0")
+        await sched.release("small")
+        waiting = asyncio.ensure_future(sched.take())
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        await sched.release("large")
+        assert await asyncio.wait_for(waiting, 1) == ("large", "L2")
+        return running
+
+    assert asyncio.run(scenario()) == ["L0", "L1"]
+
+
+def test_max_pending_bounds_new_jobs_but_not_requeues():
+    async def scenario():
+        sched = FairScheduler(max_pending=2)
+        await sched.submit("small", "a")
+        await sched.submit("large", "b")
+        with pytest.raises(JobQueueFull):
+            await sched.submit("small", "c")
+        await sched.submit("small", "retry", front=True)
+        assert sched.stats()["queued"] == {"small": 2, "large": 1}
+        return await _drain(sched, 3)
+
+    assert asyncio.run(scenario()) == ["retry", "a", "b"]
+
+
+async def _wait(runner: JobRunner, job_id: str, timeout_s: float = 5) -> dict:
+    for _ in range(int(timeout_s / 0.01)):
+        job = runner.get(job_id)
+        if job is not None and job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish: {runner.get(job_id)}")
+
+
+def test_retry_later_waits_without_holding_the_worker(tmp_path):
+    runs = []
+
+    async def handler(filename, upload):
+        loop = asyncio.get_running_loop()
+        runs.append((filename, loop.time()))
+        if filename == "busy" and len(runs) == 1:
+            raise RetryLater(0.3)
+        return {"name": filename}
+
+    async def scenario():
+        runner = JobRunner(SqliteJobStore(str(tmp_path / "jobs.sqlite")), handler, workers=1)
+        runner.start()
+        busy_upload = Upload()
+        busy = await runner.submit("busy", busy_upload)
+        other = await runner.submit("other", Upload())
+        assert (await _wait(runner, other["job_id"]))["result"] == {"name": "other"}
+        assert runner.get(busy["job_id"])["status"] == "queued" and not busy_upload.cleaned
+        assert runner.stats()["delayed"] == 1
+        assert (await _wait(runner, busy["job_id"]))["result"] == {"name": "busy"}
+        assert busy_upload.cleaned
+        await runner.stop()
+
+    asyncio.run(scenario())
+    assert [name for name, _ in runs] == ["busy", "other", "busy"]
+    assert runs[1][1] - runs[0][1] < 0.2  # the worker was free during the delay
+    assert runs[2][1] - runs[0][1] >= 0.3
+
+
+def test_jobs_missing_from_the_store_are_skipped():
+    store = MemoryJobStore()
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def handler(filename, upload):
+            if filename == "first":
+                await gate.wait()
+            return {"name": filename}
+
+        runner = JobRunner(store, handler, workers=1)
+        runner.start()
+        first = await runner.submit("first", Upload())
+        lost_upload = Upload()
+        lost = await runner.submit("lost", lost_upload)
+        del store._jobs[lost["job_id"]]
+        after = await runner.submit("after", Upload())
+        gate.set()
+        assert (await _wait(runner, after["job_id"]))["result"] == {"name": "after"}
+        assert runner.get(first["job_id"])["status"] == "done"
+        assert lost_upload.cleaned and runner.stats()["running"] == {"small": 0, "large": 0}
+        await runner.stop()
+
+    asyncio.run(scenario())
+
+
+def test_stop_cleans_up_delayed_retries():
+    async def handler(filename, upload):
+        raise RetryLater(60)
+
+    async def scenario():
+        runner = JobRunner(MemoryJobStore(), handler, workers=1)
+        runner.start()
+        upload = Upload()
+        await runner.submit("busy", upload)
+        while not runner.stats()["delayed"]:
+            await asyncio.sleep(0.01)
+        await runner.stop()
+        return upload
+
+    assert asyncio.run(scenario()).cleaned
@@ -0,0 +1,55 @@
+import random
+
+from app.matcher import SkillMatcher
+
+PAIRS = [("go", "go"), ("golang", "go"), ("api", "api"), ("rest api", "api"), ("machine learning", "ml"),
+         ("learning", "learning"), ("c++", "cpp"), ("c", "c"), ("sql", "sql"), ("nosql", "nosql"),
+         ("node.js", "node"), ("ci/cd", "cicd"), ("yapay zeka", "ai"), ("ı", "dotless")]
+
+
+def _brute(pairs, text: str) -> set[tuple[int, int, str]]:
+    """Every occurrence of every surface whose outer neighbours are not word characters."""
+    def word(ch):
+        return ch.isalnum() or ch == "_"
+
+    out = set()
+    for surface, canonical in pairs:
+        start = text.find(surface)
+        while start != -1:
+            end = start + len(surface)
+            if (start == 0 or not word(text[start - 1])) and (end == len(text) or not word(text[end])):
+                out.add((start, end, canonical))
+            start = text.find(surface, start + 1)
+    return out
+
+
+def test_word_boundaries():
+    m = SkillMatcher(PAIRS)
+    assert m.matches("google, rapid, golangci, learnings, sqlite") == set()
+    assert m.matches("go; golang. rest api (python)") == {"go", "api"}
+    assert m.matches("machine learning") == {"ml", "learning"}  # overlapping surfaces both count
+    assert m.matches("c++/c, nosql and sql") == {"cpp", "c", "nosql", "sql"}
+    assert m.matches("c++x") == {"c"}  # "c" still ends before "+"
+    assert m.matches("node.js, ci/cd") == {"node", "cicd"}
+    assert m.matches("yapay zeka_") == set()  # "_" is a word character
+    assert m.matches("yapay zeka ve ı") == {"ai", "dotless"}
+
+
+def test_offsets_and_duplicates():
+    m = SkillMatcher(PAIRS + [(" Go ", "go"), ("GO", "go"), ("", "x"), (None, "y")])
+    assert m.size == len(PAIRS)  # surfaces are stripped and lowercased; blanks skipped
+    text = "go rest api"
+    assert sorted(m.find(text)) == [(0, 2, "go"), (3, 11, "api"), (8, 11, "api")]
+    assert [text[s:e] for s, e, _ in sorted(m.find(text))] == ["go", "rest api", "api"]
+    both = SkillMatcher([("ml", "ml"), ("ml", "machine learning")])
+    assert both.matches("ml") == {"ml", "machine learning"}
+
+
+def test_agrees_with_brute_force_on_random_text():
+    m = SkillMatcher(PAIRS)
+    rnd = random.Random(5)
+    alphabet = ["go", "golang", "api", "rest", " ", " ", ",", "c", "+", "sql", "no", "learning", "machine",
+                "node", ".", "js", "/", "ci", "cd", "_", "x", "1", "ı", "yapay", "zeka"]
+    for _ in range(2000):
+        text = "".join(rnd.choice(alphabet) for _ in range(rnd.randrange(0, 30)))
+        assert set(m.find(text)) == _brute(PAIRS, text), text
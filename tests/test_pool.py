@@ -0,0 +1,120 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.pool import ExtractionPool, ExtractionTimeout, QueueFull
+
+
+async def _wait_idle(pool: ExtractionPool, limit_s: float = 10.0) -> None:
+    end = time.monotonic() + limit_s
+    while pool.inflight and time.monotonic() < end:
+        await asyncio.sleep(0.05)
+
+
+def test_timeout_kills_running_job_and_frees_capacity():
+    async def scenario():
+        pool = ExtractionPool(workers=1, max_queue=0, timeout_s=1.0, prestart=False)
+        try:
+            assert await pool.run(os.getpid)  # worker up before the clock matters
+            t0 = time.monotonic()
+            with pytest.raises(ExtractionTimeout):
+                await pool.run(time.sleep, 60)
+            assert time.monotonic() - t0 < 5
+            await _wait_idle(pool)
+            assert pool.inflight == 0
+            assert await pool.run(os.getpid)  # capacity is back, on a new worker
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_jobs_sharing_the_killed_pool_are_retried():
+    async def scenario():
+        pool = ExtractionPool(workers=2, max_queue=2, timeout_s=3.0, prestart=False)
+        try:
+            await asyncio.gather(pool.run(os.getpid), pool.run(os.getpid))
+            hung = asyncio.ensure_future(pool.run(time.sleep, 60))
+            await asyncio.sleep(2.7)
+            # still running when the hung job's timeout kills the pool at t=3s
+            short = asyncio.ensure_future(pool.run(time.sleep, 0.5))
+            with pytest.raises(ExtractionTimeout):
+                await hung
+            assert await short is None  # rerun on the new pool within its own timeout
+            await _wait_idle(pool)
+            assert pool.inflight == 0
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_full_pool_recovers_after_timeouts():
+    async def scenario():
+        pool = ExtractionPool(workers=1, max_queue=1, timeout_s=1.0, prestart=False)
+        try:
+            await pool.run(os.getpid)
+            results = await asyncio.gather(pool.run(time.sleep, 60), pool.run(time.sleep, 60),
+                                           return_exceptions=True)
+            assert all(isinstance(r, ExtractionTimeout) for r in results)
+            await _wait_idle(pool)
+            assert pool.inflight == 0
+            assert await pool.run(os.getpid)
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_hung_worker_is_killed_by_its_reported_pid():
+    async def scenario():
+        pool = ExtractionPool(workers=1, max_queue=0, timeout_s=1.0, prestart=False)
+        try:
+            pid = await pool.run(os.getpid)
+            pool._executor._processes = {}  # the executor's own bookkeeping is not needed
+            with pytest.raises(ExtractionTimeout):
+                await pool.run(time.sleep, 60)
+            end = time.monotonic() + 5
+            while _alive(pid) and time.monotonic() < end:
+                await asyncio.sleep(0.05)
+            assert not _alive(pid)
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_a_recycle_respects_capacity():
+    async def scenario():
+        pool = ExtractionPool(workers=2, max_queue=0, timeout_s=1.5, prestart=False)
+        release = pool._release
+
+        def taken_at_once():  # another caller grabs every freed slot
+            release()
+            pool._inflight += 1
+
+        try:
+            await asyncio.gather(pool.run(os.getpid), pool.run(os.getpid))
+            hung = asyncio.ensure_future(pool.run(time.sleep, 60))
+            await asyncio.sleep(1.2)
+            short = asyncio.ensure_future(pool.run(time.sleep, 0.5))
+            await asyncio.sleep(0.1)
+            pool._release = taken_at_once
+            results = await asyncio.gather(hung, short, return_exceptions=True)
+            assert isinstance(results[0], ExtractionTimeout)
+            assert isinstance(results[1], QueueFull)
+            assert pool.inflight <= pool.capacity
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,174 @@
+import copy
+import random
+import sqlite3
+
+import pytest
+
+from app.candidates import CandidateStore, _apply_config
+from app.index import SkillIndex
+from app.rescore import affected_ids, config_delta
+
+SKILLS = ["Python", "SQL", "Pandas", "Docker", "Kubernetes", "Java", "Golang", "Excel", "Tableau",
+          "Spark", "Airflow", "Rust", "dbt", "Statistics", "sklearn", "Reporting"]
+
+
+def _cv(i: int) -> dict:
+    rnd = random.Random(i)
+    return {"name": f"Candidate {i}", "skills": rnd.sample(SKILLS, rnd.randint(2, 7)),
+            "experience": [f"Engineer Jan {2008 + i % 15} - Dec 2023"],
+            "education": [rnd.choice(["BSc Computer Science", "MSc Statistics", "PhD Physics"])]}
+
+
+def _edit(raw: dict, fn) -> dict:
+    out = copy.deepcopy(raw)
+    fn(out["scoring"])
+    return out
+
+
+def test_config_delta_kinds(raw_config, use_config):
+    old = use_config(raw_config)
+    sc = raw_config["scoring"]
+
+    delta = config_delta(old, use_config(_edit(raw_config, lambda s: s["roles"]["data scientist"]["nice"].append("rust"))))
+    assert delta.surfaces == (("rust", "rust"),) and delta.members == {"rust"} and not delta.keywords
+
+    delta = config_delta(old, use_config(_edit(raw_config, lambda s: s["aliases"]["go"].append("golang lang"))))
+    assert delta.surfaces == (("golang lang", "go"),) and not delta.members and not delta.keywords
+
+    delta = config_delta(old, use_config(_edit(raw_config, lambda s: s["aliases"].pop("report"))))
+    assert delta.keywords == {"report"} and not delta.surfaces
+
+    # "docker" stays in the config, only its role changes: no re-match, just a recount
+    def move(s):
+        s["roles"]["backend engineer"]["nice"].remove("docker")
+        s["roles"]["data scientist"]["nice"].append("docker")
+    delta = config_delta(old, use_config(_edit(raw_config, move)))
+    assert delta.members == {"docker"} and not delta.keywords and not delta.surfaces
+
+    delta = config_delta(old, use_config(_edit(raw_config, lambda s: s["roles"].pop("business analyst"))))
+    assert delta.roles_removed == ("business analyst",)
+    assert "excel" in delta.keywords and "sql" not in delta.keywords  # sql is still another role's keyword
+
+    delta = config_delta(old, use_config(_edit(raw_config, lambda s: s.update(experience_thresholds=[0, 1, 2, 3, 4, 5]))))
+    assert delta.points_only
+    assert sc == raw_config["scoring"]
+
+
+def test_affected_ids_uses_old_matches_and_new_surfaces(raw_config, use_config):
+    cfg = use_config(raw_config)
+    records = {cid: _apply_config({"id": cid, "skills": skills, "experience_years": 1.0, "education_level": "master"}, cfg)
+               for cid, skills in {"a": ["python", "sql"], "b": ["reporting", "excel"], "c": ["golang"],
+                                   "d": ["rust", "dbt"], "e": ["tableau"]}.items()}
+    index = SkillIndex.build(records.values(), cfg.digest)
+    assert sorted(affected_ids(index, keywords={"report"})) == ["b"]
+    assert sorted(affected_ids(index, keywords={"go", "tableau"})) == ["c", "e"]
+    assert sorted(affected_ids(index, surfaces=[("rust", "rust")])) == ["d"]
+    assert sorted(affected_ids(index, surfaces=[("dbt", "dbt"), ("sql", "sql")])) == ["a", "d"]
+    index.remove("d")
+    assert affected_ids(index, surfaces=[("rust", "rust")]) == []
+
+
+def _reference_ranking(store: CandidateStore, cfg) -> dict:
+    ref = CandidateStore()
+    ref._records = {cid: _apply_config(copy.deepcopy(r), cfg) for cid, r in store._records.items()}
+    ref.index = ref._rebuild_index(cfg)
+    return {role: ref.rank(role, dict(cfg.weights)) for role in cfg.roles}
+
+
+def _ranking(store: CandidateStore, cfg) -> dict:
+    assert store.table().digest == cfg.digest
+    return {role: store.rank(role, dict(cfg.weights)) for role in cfg.roles}
+
+
+def _points(store: CandidateStore, cfg) -> dict:
+    """Points per role and candidate (a reopened pool orders re-written rows last, so ties rank differently)."""
+    return {role: sorted((r["id"], r["points"]) for r in ranked) for role, ranked in _ranking(store, cfg).items()}
+
+
+@pytest.fixture
+def persisted(monkeypatch):
+    """Ids written by CandidateStore._persist, per non-empty call."""
+    calls = []
+    persist = CandidateStore._persist
+
+    def spy(self, records):
+        if records:
+            calls.append(sorted(r["id"] for r in records))
+        persist(self, records)
+
+    monkeypatch.setattr(CandidateStore, "_persist", spy)
+    return calls
+
+
+def test_only_affected_records_are_rewritten(raw_config, use_config, tmp_path, persisted):
+    cfg = use_config(raw_config)
+    path = str(tmp_path / "pool.sqlite")
+    store = CandidateStore(path)
+    for i in range(300):
+        store.add(f"c{i}", _cv(i))
+    store.table()
+    persisted.clear()
+
+    steps = [
+        lambda s: s["roles"]["data scientist"]["nice"].append("rust"),
+        lambda s: s["aliases"].update(spark=["pyspark"]) or s["roles"]["data scientist"]["nice"].append("spark"),
+        lambda s: s["roles"].pop("business analyst"),
+        lambda s: s["roles"].update({"business analyst": {"must": ["dbt"], "nice": ["airflow"]}}),
+        lambda s: s["roles"].update({"data engineer": {"must": ["spark", "sql"], "nice": ["airflow", "docker"]}}),
+        lambda s: s.update(experience_thresholds=[0, 1, 2, 4, 6, 8]),
+    ]
+    raw = raw_config
+    for step in steps:
+        raw = _edit(raw, step)
+        old, cfg = cfg, use_config(raw)
+        index = store.index
+        store.rescorer.run(cfg)
+        written = persisted.pop() if persisted else []
+        assert not persisted  # one write: the re-matched records
+        assert len(written) == store.rescorer.status()["updated"] < len(store)
+        assert store.index is index  # patched in place
+        assert _ranking(store, cfg) == _reference_ranking(store, cfg)
+
+    # "business analyst" came back with other keywords: hits stored under the
+    # first config for that role must not resurface
+    assert all(h == [0, 0] or r["digest"] == cfg.digest
+               for r in map(store.view, store._records) for h in [r["role_hits"]["business analyst"]]
+               if not {"dbt", "airflow"} & set(r["matched"]))
+
+    with sqlite3.connect(path) as db:
+        digests = {d for (d,) in db.execute("SELECT json_extract(payload, '$.digest') FROM candidates")}
+    assert len(digests) > 1  # unaffected rows still carry older digests
+    reopened = CandidateStore(path)
+    assert _points(reopened, cfg) == _points(store, cfg)
+    assert not any(persisted)  # trusted on reopen, not re-matched
+
+
+def test_view_resolves_added_and_removed_roles(raw_config, use_config):
+    cfg = use_config(raw_config)
+    store = CandidateStore()
+    store.add("x", {"name": "X", "skills": ["Excel", "Python"], "experience": [], "education": []})
+    store.table()
+    new = use_config(_edit(raw_config, lambda s: s["roles"].update({"ops": {"must": ["terraform"], "nice": []}})))
+    store.rescorer.run(new)
+    record = store.get("x")
+    assert record["digest"] == cfg.digest and "ops" not in record["role_hits"]  # not rewritten
+    view = store.view("x")
+    assert view["digest"] == new.digest and view["role_hits"]["ops"] == [0, 0]
+    assert view["role_hits"]["business analyst"] == record["role_hits"]["business analyst"]
+
+
+def test_shared_snapshot_reads_trusted_rows(raw_config, use_config, tmp_path):
+    use_config(raw_config)
+    path, shm = str(tmp_path / "pool.sqlite"), str(tmp_path / "shm")
+    store = CandidateStore(path)
+    for i in range(100):
+        store.add(f"c{i}", _cv(i))
+    store.table()
+    cfg = use_config(_edit(raw_config, lambda s: s["roles"].update({"data engineer": {"must": ["spark"], "nice": ["dbt"]}})))
+    store.rescorer.run(cfg)
+    expected = _points(store, cfg)
+    (tmp_path / "shm").mkdir()
+    first = CandidateStore(path, shared_dir=shm)   # writes the snapshot
+    second = CandidateStore(path, shared_dir=shm)  # maps it
+    assert _points(first, cfg) == expected
+    assert _points(second, cfg) == expected
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from app import profiles
+from app.parser import simple_parse_cv
+from app.scorer import cv_features, features_batch, score_batch, score_features, score_roles
+from app.settings import CONFIG_PATH, parse_yaml
+from bench.synthetic import synthetic_cv
+
+KEYS = ("skills_points", "experience_points", "education_points", "total", "weighted")
+WEIGHTS = {"skills": 0.5, "experience": 0.3, "education": 0.2}
+
+
+def _raw(**scoring) -> dict:
+    with open(CONFIG_PATH, "rb") as fh:
+        raw = parse_yaml(fh.read())
+    raw["scoring"].update(scoring)
+    return raw
+
+
+@pytest.fixture(params=[[0, 0.5, 1, 2, 3, 4], [0, 1, 2, 4, 6, 8], [1, 1, 1, 5, 5, 5]])
+def cfg(request, monkeypatch):
+    cfg = profiles.compile_config(_raw(experience_thresholds=request.param))
+    monkeypatch.setattr(profiles, "_doc", None)
+    monkeypatch.setattr(profiles, "_current", cfg)
+    return cfg
+
+
+def _cvs() -> list[dict]:
+    rnd = random.Random(3)
+    cvs = [simple_parse_cv(synthetic_cv(jobs=i % 8, seed=i)) for i in range(200)]
+    # precomputed features on and around every threshold
+    years = [0, 0.4, 0.5, 0.6, 1, 1.9, 2, 3, 4, 4.5, 5, 6, 8, 8.1, 30]
+    cvs += [{"skills": ["Python", "SQL"], "experience_years": y, "education_level": "master"} for y in years]
+    cvs += [{"skills": ["Pandas"], "experience_years": round(rnd.uniform(0, 12), 1), "education_level": "phd"}
+            for _ in range(100)]
+    return cvs
+
+
+def test_score_and_batch_agree(cfg):
+    cvs = _cvs()
+    for job in ("data scientist", "", "no such role"):
+        cols = score_batch(features_batch(cvs), job, WEIGHTS)
+        for i, cv in enumerate(cvs):
+            single = score_features(cv_features(cv), job, WEIGHTS)
+            assert single["points"] == {k: int(cols[k][i]) for k in KEYS}, (job, cv)
+
+
+def test_score_roles_agrees_with_score(cfg):
+    for cv in _cvs()[::7]:
+        features = cv_features(cv)
+        for entry in score_roles(features, WEIGHTS)["roles"]:
+            assert entry["points"] == score_features(features, entry["role"], WEIGHTS)["points"]
+
+
+def test_experience_points_stay_on_the_scale(cfg):
+    years = [0, *cfg.thresholds, max(cfg.thresholds) + 1, 100]
+    feats = [{"experience_years": y} for y in years]
+    cols = score_batch(feats, "", WEIGHTS)
+    assert all(0 <= p <= 5 for p in cols["experience_points"].tolist())
+    assert cols["experience_points"][-1] == 5
+
+
+@pytest.mark.parametrize("thresholds", [[], [0, 1, 2, 3], [0, 0.5, 1, 2, 3, 4, 5], [0, 2, 1, 3, 4, 5], ["a"] * 6])
+def test_experience_thresholds_must_be_six_ascending_numbers(thresholds):
+    with pytest.raises(ValueError):
+        profiles.compile_config(_raw(experience_thresholds=thresholds))
@@ -0,0 +1,88 @@
+import hashlib
+import random
+
+import pytest
+
+from app import shared
+from app.shared import SharedCache
+
+SIZE_MB = 1 / 16  # the smallest ring: 64 KB, 16 slots
+
+
+def _key(name) -> bytes:
+    return hashlib.sha256(str(name).encode()).digest()
+
+
+def _cache(tmp_path, name: str = "c.cache") -> SharedCache:
+    return SharedCache(str(tmp_path / name), SIZE_MB)
+
+
+def test_values_are_shared_through_the_file(tmp_path):
+    first = _cache(tmp_path)
+    assert first.put(_key(1), b"one") and first.put(_key(2), b"")
+    second = _cache(tmp_path)  # another worker mapping the same file
+    assert second.get(_key(1)) == b"one" and second.get(_key(2)) == b""
+    assert second.get(_key(3)) is None
+    second.put(_key(1), b"uno")
+    assert first.get(_key(1)) == b"uno"
+    assert first.stats()["entries"] == 2 and first.stats()["writes"] == 3
+
+
+def test_full_key_is_checked_not_just_the_slot_prefix(tmp_path):
+    cache = _cache(tmp_path)
+    a, b = _key("a"), _key("a")[:16] + _key("b")[16:]
+    cache.put(a, b"value of a")
+    assert cache.get(b) is None
+    cache.put(b, b"value of b")  # same prefix: takes over the slot
+    assert cache.get(b) == b"value of b" and cache.get(a) is None
+
+
+@pytest.mark.parametrize("field", ["value", "crc", "position", "key"])
+def test_corrupted_entries_read_as_misses(tmp_path, field):
+    cache = _cache(tmp_path)
+    key, value = _key("k"), b"payload " * 20
+    cache.put(key, value)
+    mm = cache._mm
+    entry = mm.find(key, cache._data)  # the entry header starts with the full key
+    at = {"value": entry + shared._ENTRY.size + 3, "crc": entry + 44, "position": entry + 32, "key": entry + 31}[field]
+    mm[at] ^= 0x01
+    assert cache.get(key) is None
+    mm[at] ^= 0x01
+    assert cache.get(key) == value
+
+
+def test_overwritten_entries_are_misses_never_wrong_data(tmp_path):
+    cache = _cache(tmp_path)
+    rnd = random.Random(23)
+    latest = {}
+    for step in range(3000):
+        k = rnd.randrange(60)
+        value = bytes([step % 251]) * rnd.randrange(0, 3000)
+        assert cache.put(_key(k), value)
+        latest[k] = value
+        probe = rnd.randrange(60)
+        assert cache.get(_key(probe)) in (None, latest.get(probe))
+    assert cache.get(_key(k)) == latest[k]  # the last write always survives
+    hits = sum(cache.get(_key(k)) is not None for k in latest)
+    assert 0 < hits < len(latest)  # the ring has wrapped many times
+    assert cache.stats()["entries"] >= hits
+
+
+def test_oversized_values_and_clear(tmp_path):
+    cache = _cache(tmp_path)
+    assert not cache.put(_key("big"), bytes(cache.capacity // 4))
+    assert cache.get(_key("big")) is None
+    for i in range(5):
+        cache.put(_key(i), b"x")
+    cache.clear()
+    assert all(cache.get(_key(i)) is None for i in range(5)) and cache.stats()["entries"] == 0
+    cache.put(_key(0), b"y")
+    assert cache.get(_key(0)) == b"y"
+
+
+def test_size_is_fixed_once_created(tmp_path):
+    _cache(tmp_path)
+    with pytest.raises(ValueError):
+        SharedCache(str(tmp_path / "c.cache"), SIZE_MB * 2)
+    with pytest.raises(ValueError):
+        SharedCache(str(tmp_path / "tiny.cache"), 0.01)
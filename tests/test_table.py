@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.parser import simple_parse_cv
+from app.scorer import features_from_parsed
+from app.table import CandidateTable
+from bench.synthetic import synthetic_cv
+
+
+def _cvs() -> list[dict]:
+    cvs = [simple_parse_cv(synthetic_cv(jobs=i % 5, seed=i)) for i in range(50)]
+    cvs += [
+        {"name": None, "email": None, "phone": None, "skills": [], "education": [], "experience": []},
+        {"name": "Çağla Öztürk", "email": "", "phone": "+90 555 000 00 00", "skills": ["Python", "python", "C++"],
+         "education": ["İstanbul Üniversitesi, Yüksek Lisans", ""], "experience": ["Mart 2020 - Halen", "led a team"]},
+        {"skills": ["SQL"]},  # fields left out come back as None / []
+    ]
+    return cvs
+
+
+def test_round_trip_through_api_json():
+    cvs = _cvs()
+    table = CandidateTable.from_dicts(json.loads(json.dumps(cvs)))
+    assert len(table) == len(cvs) and len(table.skill_pool) < sum(len(cv.get("skills") or []) for cv in cvs)
+    back = json.loads(json.dumps(table.to_dicts()))
+    assert back[:-1] == cvs[:-1]
+    assert back[-1] == {"name": None, "email": None, "phone": None, "skills": ["SQL"], "education": [], "experience": []}
+    assert table[-2].to_dict() == cvs[-2] and table[-2].name == "Çağla Öztürk"
+
+
+def test_features_match_the_scorer():
+    cvs = _cvs()
+    table = CandidateTable.from_dicts(cvs)
+    assert [view.features() for view in table] == [features_from_parsed(cv) for cv in cvs]
+    np.testing.assert_array_equal(table.years(), [features_from_parsed(cv)["experience_years"] for cv in cvs])
+
+
+def test_rejects_unknown_fields_and_rows():
+    table = CandidateTable.from_dicts(_cvs()[:3])
+    with pytest.raises(ValueError):
+        table.append({"skills": [], "salary": 1})
+    assert len(table) == 3
+    with pytest.raises(IndexError):
+        table[3]
+    assert table[-1].row == 2
@@ -0,0 +1,144 @@
+import random
+
+import pytest
+
+from app.features import exp_months_batch, exp_months_from_lines
+from app.parser import simple_parse_cv
+from app.tenure import RANGE_RE, extract_intervals, merged_months, month_index, months_batch, months_from_lines
+from bench.synthetic import synthetic_cv
+
+NOW = month_index(2025, 6)
+
+PRESENT = [
+    (["Jan 2020 - Present"], 65),
+    (["Jan 2020 - present"], 65),
+    (["January 2020 to Current"], 65),
+    (["03/2021 - Halen"], 51),
+    (["Mart 2020 – Günümüz"], 63),
+    (["Eylül 2023 - Devam ediyor"], 21),
+]
+ENGLISH = [
+    (["Jul 2024 - Sep 2024"], 2),
+    (["July 2022 – September 2024"], 26),
+    (["2022 - 2024"], 24),
+    (["2019-2021"], 24),
+    (["Sept 2020 - Oct 2020"], 1),
+    (["Sep. 2020 - Dec. 2020"], 3),
+]
+TURKISH = [
+    (["Şubat 2019 - Ağustos 2019"], 6),
+    (["Subat 2019 - Agustos 2019"], 6),
+    (["EYLÜL 2018 - ARALIK 2019"], 15),
+    (["Ocak 2021 - Nisan 2021"], 3),
+]
+NUMERIC = [
+    (["03/2021 - 05/2021"], 2),
+    (["03.2021 - 05.2021"], 2),
+    (["3/2021 – 11/2021"], 8),
+    (["12.2020 - 02/2021"], 2),
+]
+OVERLAPS = [
+    (["2018 - 2020", "2019 - 2021"], 36),
+    (["Jan 2020 - Jan 2022", "Jun 2020 - Dec 2020"], 24),
+    (["2010 - 2012", "2015 - 2016"], 36),
+    (["Jan 2020 - Jun 2020", "Jun 2020 - Dec 2020"], 11),
+    (["Jan 2020 - Present", "2021 - 2022"], 65),
+]
+DROPPED = [
+    (["2021 - 2019"], 0),
+    (["Dec 2020 - Jan 2020"], 0),
+    (["Jan 2020 - Jan 2020"], 0),
+    (["Graduated in 2020, joined 2021"], 0),
+    (["Item 12020-2021"], 0),
+    (["v2.2019 - 2020"], 0),
+]
+NOT_MONTHS = [
+    (["Since 2019 - 2021"], 24),
+    (["Since Mar 2019 - Jun 2020"], 15),
+    (["Engineer 2015 - Manager 2019"], 0),
+    (["Marty 2019 - 2020"], 12),
+]
+CASES = PRESENT + ENGLISH + TURKISH + NUMERIC + OVERLAPS + DROPPED + NOT_MONTHS
+
+
+@pytest.mark.parametrize("lines,expected", PRESENT)
+def test_present_ends_at_now(lines, expected):
+    assert months_from_lines(lines, NOW) == expected
+    assert months_from_lines(lines, NOW + 12) == expected + 12
+
+
+@pytest.mark.parametrize("lines,expected", ENGLISH + TURKISH)
+def test_month_names(lines, expected):
+    assert months_from_lines(lines, NOW) == expected
+
+
+@pytest.mark.parametrize("lines,expected", NUMERIC)
+def test_numeric_months(lines, expected):
+    assert months_from_lines(lines, NOW) == expected
+
+
+@pytest.mark.parametrize("lines,expected", OVERLAPS)
+def test_overlaps_are_merged(lines, expected):
+    assert months_from_lines(lines, NOW) == expected
+
+
+@pytest.mark.parametrize("lines,expected", DROPPED)
+def test_reversed_empty_and_non_ranges_are_dropped(lines, expected):
+    assert months_from_lines(lines, NOW) == expected
+
+
+@pytest.mark.parametrize("lines,expected", NOT_MONTHS)
+def test_only_month_names_are_months(lines, expected):
+    assert months_from_lines(lines, NOW) == expected
+
+
+@pytest.mark.parametrize("text", ["Since 2019 - 2020", "Until 2020 - 2021", "Mayor 2020 - 2021"])
+def test_other_words_leave_the_bare_year(text):
+    m = RANGE_RE.search(text)
+    assert m["mon1"] is None and m["y1"] == text.split()[1]
+
+
+def test_reversed_range_is_dropped_but_others_count():
+    assert extract_intervals("2021 - 2019 \n2015 - 2016", NOW) == [(month_index(2015), month_index(2016))]
+
+
+def test_batch_equals_single_on_cases():
+    lists = [lines for lines, _ in CASES]
+    assert months_batch(lists, NOW).tolist() == [months_from_lines(lines, NOW) for lines in lists]
+    assert months_batch([], NOW).tolist() == []
+
+
+def _fmt(idx: int, rnd: random.Random) -> str:
+    y, m = divmod(idx, 12)
+    style = rnd.randrange(4)
+    if style == 0:
+        return f"{['Jan','Feb','Mar','Apr','May','Jun','Jul','Aug','Sep','Oct','Nov','Dec'][m]} {y}"
+    if style == 1:
+        return f"{m + 1:02d}/{y}"
+    if style == 2:
+        return f"{['Ocak','Şubat','Mart','Nisan','Mayıs','Haziran','Temmuz','Ağustos','Eylül','Ekim','Kasım','Aralık'][m]} {y}"
+    return f"{m + 1}.{y}"
+
+
+def test_random_sections_batch_single_and_brute_force_agree():
+    rnd = random.Random(7)
+    sections, truths = [], []
+    for _ in range(2000):
+        intervals = []
+        for _ in range(rnd.randrange(0, 6)):
+            s = month_index(rnd.randrange(1995, 2025), rnd.randrange(1, 13))
+            intervals.append((s, s + rnd.randrange(1, 60)))
+        truth = len({m for s, e in intervals for m in range(s, e)})
+        assert merged_months(intervals) == truth
+        sections.append([f"{_fmt(s, rnd)} - {_fmt(e, rnd)} Engineer" for s, e in intervals])
+        truths.append(truth)
+    assert months_batch(sections, NOW).tolist() == truths
+    assert [months_from_lines(lines, NOW) for lines in sections] == truths
+
+
+def test_exp_months_batch_matches_per_cv_with_fallback():
+    rnd = random.Random(3)
+    parsed = [simple_parse_cv(synthetic_cv(jobs=rnd.randrange(0, 8), seed=i))["experience"] for i in range(200)]
+    parsed.append(["led a team", "", "built things"])  # no dates: 2 months per bullet
+    assert exp_months_batch(parsed).tolist() == [exp_months_from_lines(p) for p in parsed]
+    assert exp_months_from_lines(parsed[-1]) == 4